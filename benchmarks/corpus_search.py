@@ -0,0 +1,83 @@
+"""
+Local corpus search: FTS5 index lookups vs. re-ranking every stored page.
+
+Indexes synthetic company pages and reports into a temporary CorpusIndex,
+then answers queries two ways: through the index (what search_local_corpus
+does) and by BM25-ranking every page's text on each query, as a cache
+without an index would have to. Reports indexing rate, query latency and
+whether the page holding the answer ranks first.
+
+Usage (from the repository root):
+    python -m benchmarks.corpus_search --documents 2000 --queries 200
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.resources.corpus_index import CorpusIndex
+from src.resources.ranking import bm25_scores, tokenize
+
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Tyrell", "Cyberdyne", "Soylent"]
+TOPICS = ["pricing", "layoffs", "acquisition", "earnings", "launch", "lawsuit", "partnership", "outage"]
+FILLER = (
+    "The company serves customers worldwide and regularly publishes updates for investors, partners "
+    "and employees about strategy, governance and community programs. "
+)
+
+
+def make_document(rng: random.Random, index: int):
+    company = rng.choice(COMPANIES)
+    topic = rng.choice(TOPICS)
+    marker = f"ref{index:06d}"
+    body = "\n".join([f"{company} {topic} update", FILLER * rng.randint(5, 30), f"{company} {topic} details {marker}."])
+    return f"https://news.example.com/{company.lower()}/{index}", company, topic, marker, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000, help="Pages to index")
+    parser.add_argument("--queries", type=int, default=200, help="Queries to run")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = [make_document(rng, index) for index in range(args.documents)]
+    queries = [rng.choice(documents) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = CorpusIndex(Path(tmp) / "corpus.sqlite3")
+        start = time.perf_counter()
+        for url, _, _, _, body in documents:
+            index.add_page(url, body)
+        indexing = time.perf_counter() - start
+
+        indexed_ms, indexed_top = [], 0
+        for url, company, topic, marker, _ in queries:
+            start = time.perf_counter()
+            hits = index.search(f"{company} {topic} {marker}", limit=5)
+            indexed_ms.append((time.perf_counter() - start) * 1000)
+            indexed_top += bool(hits) and hits[0].source == url
+
+    tokenized = [tokenize(body) for *_, body in documents]
+    scan_ms, scan_top = [], 0
+    for url, company, topic, marker, _ in queries:
+        start = time.perf_counter()
+        scores = bm25_scores(tokenize(f"{company} {topic} {marker}"), tokenized)
+        best = max(range(len(scores)), key=scores.__getitem__)
+        scan_ms.append((time.perf_counter() - start) * 1000)
+        scan_top += documents[best][0] == url
+
+    print(f"indexed {args.documents} pages in {indexing:.2f}s ({args.documents / indexing:.0f} pages/s)")
+    print(f"{'method':<10} {'p50 ms':>8} {'p95 ms':>8} {'top-1 hit':>10}")
+    for method, latencies, top in (("fts5", indexed_ms, indexed_top), ("scan", scan_ms, scan_top)):
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{method:<10} {statistics.median(latencies):>8.2f} {p95:>8.2f} {top / len(queries):>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
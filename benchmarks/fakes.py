@@ -0,0 +1,177 @@
+import asyncio
+import collections
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+
+def text_response(text: str) -> Any:
+    """
+    Build a fake `GenerateContentResponse` holding a single text part.
+    """
+    part = SimpleNamespace(text=text, function_call=None)
+    content = SimpleNamespace(role="model", parts=[part])
+    return SimpleNamespace(candidates=[SimpleNamespace(content=content)])
+
+
+def function_call_response(name: str, args: Dict[str, Any]) -> Any:
+    """
+    Build a fake `GenerateContentResponse` requesting a single tool call.
+    """
+    call = SimpleNamespace(name=name, args=dict(args))
+    part = SimpleNamespace(text=None, function_call=call)
+    content = SimpleNamespace(role="model", parts=[part])
+    return SimpleNamespace(candidates=[SimpleNamespace(content=content)])
+
+
+class FakeRateLimitError(Exception):
+    """
+    Stand-in for `genai.errors.ClientError` with code 429 RESOURCE_EXHAUSTED,
+    carrying a RetryInfo detail like the real API.
+    """
+
+    def __init__(self, retry_delay: float):
+        self.code = 429
+        self.status = "RESOURCE_EXHAUSTED"
+        self.details = {
+            "error": {
+                "code": 429,
+                "status": "RESOURCE_EXHAUSTED",
+                "details": [{
+                    "@type": "type.googleapis.com/google.rpc.RetryInfo",
+                    "retryDelay": f"{retry_delay:.3f}s",
+                }],
+            },
+        }
+        super().__init__(f"429 RESOURCE_EXHAUSTED. {self.details}")
+
+
+class _FakeModels:
+    def __init__(self, owner: "FakeGeminiClient"):
+        self._owner = owner
+
+    async def generate_content(self, *, model: str, contents: Any, config: Any = None) -> Any:
+        return await self._owner._generate(model=model, contents=contents, config=config)
+
+    async def generate_content_stream(self, *, model: str, contents: Any, config: Any = None) -> Any:
+        return self._owner._generate_stream(model=model, contents=contents, config=config)
+
+
+class _FakeCaches:
+    """
+    Minimal stand-in for `client.aio.caches` that records created caches.
+    """
+
+    def __init__(self, owner: "FakeGeminiClient"):
+        self._owner = owner
+        self.created: List[Dict[str, Any]] = []
+        self.updated: List[str] = []
+
+    async def create(self, *, model: str, config: Any = None) -> Any:
+        if not self._owner.caching_available:
+            raise RuntimeError("Cached content is not supported for this model")
+        name = f"cachedContents/fake-{len(self.created)}"
+        self.created.append({"name": name, "model": model, "config": config})
+        return SimpleNamespace(name=name, expire_time=None)
+
+    async def update(self, *, name: str, config: Any = None) -> Any:
+        self.updated.append(name)
+        return SimpleNamespace(name=name, expire_time=None)
+
+
+class FakeGeminiClient:
+    """
+    Stand-in for `genai.Client().aio` that injects latency and records calls.
+
+    Behavior:
+    - `latency` seconds are spent on every `models.generate_content` call.
+    - With `blocking=True` the latency is spent in `time.sleep`, which mimics
+      the old synchronous client freezing the event loop.
+    - `responder(contents, config)` builds the response; defaults to a final answer.
+    - `calls`, `in_flight` and `max_in_flight` are recorded for reporting;
+      each call records the `cached_content` it reused, if any.
+    - `caches` accepts context-cache creation unless `caching_available=False`.
+    - With `rate_limit`, at most that many calls are accepted per trailing
+      `rate_window` seconds; the rest raise FakeRateLimitError (429) with a
+      retry delay, and are counted in `throttled`.
+    - `models.generate_content_stream` yields each response part as its own
+      chunk, padded with empty text chunks to `stream_chunks`; the latency is
+      spread evenly over the chunks.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        responder: Optional[Callable[[Any, Any], Any]] = None,
+        blocking: bool = False,
+        caching_available: bool = True,
+        stream_chunks: int = 8,
+        rate_limit: Optional[int] = None,
+        rate_window: float = 60.0,
+    ):
+        self.latency = latency
+        self.blocking = blocking
+        self.caching_available = caching_available
+        self.stream_chunks = stream_chunks
+        self.responder = responder or (lambda contents, config: text_response("FINAL ANSWER: ok"))
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.throttled = 0
+        self._accepted: "collections.deque[float]" = collections.deque()
+        self.calls: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.models = _FakeModels(self)
+        self.caches = _FakeCaches(self)
+
+    def _admit(self) -> None:
+        if self.rate_limit is None:
+            return
+        now = time.monotonic()
+        while self._accepted and self._accepted[0] <= now - self.rate_window:
+            self._accepted.popleft()
+        if len(self._accepted) >= self.rate_limit:
+            self.throttled += 1
+            raise FakeRateLimitError(self._accepted[0] + self.rate_window - now)
+        self._accepted.append(now)
+
+    def _record(self, model: str, contents: Any, config: Any) -> None:
+        self.calls.append({
+            "model": model,
+            "contents": contents,
+            "config": config,
+            "cached_content": getattr(config, "cached_content", None),
+        })
+
+    async def _generate(self, *, model: str, contents: Any, config: Any) -> Any:
+        self._admit()
+        self._record(model, contents, config)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.blocking:
+                time.sleep(self.latency)
+            else:
+                await asyncio.sleep(self.latency)
+            return self.responder(contents, config)
+        finally:
+            self.in_flight -= 1
+
+    async def _generate_stream(self, *, model: str, contents: Any, config: Any) -> Any:
+        self._admit()
+        self._record(model, contents, config)
+        response = self.responder(contents, config)
+        content = response.candidates[0].content
+        chunks = [[part] for part in content.parts]
+        while len(chunks) < self.stream_chunks:
+            chunks.append([SimpleNamespace(text="", function_call=None)])
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            for chunk_parts in chunks:
+                await asyncio.sleep(self.latency / len(chunks))
+                chunk_content = SimpleNamespace(role=content.role, parts=chunk_parts)
+                yield SimpleNamespace(candidates=[SimpleNamespace(content=chunk_content)], usage_metadata=None)
+        finally:
+            self.in_flight -= 1
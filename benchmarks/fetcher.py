@@ -0,0 +1,110 @@
+"""
+Page fetch time and bytes read: blocking urlopen vs. the async capped fetcher.
+
+Serves synthetic HTML pages from a local HTTP server with throttled
+bandwidth, optionally gzip-compressed. The "urlopen" mode reproduces the old
+`browse_page` (blocking read of the whole body on the event loop); the
+"fetcher" mode uses `PageFetcher` with its byte cap, fetching concurrently.
+
+Usage (from the repository root):
+    python -m benchmarks.fetcher --pages 8 --page-kib 2048 --cap-kib 256
+"""
+
+import argparse
+import asyncio
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.request import urlopen
+
+from src.resources.fetcher import PageFetcher
+
+CHUNK = 16 * 1024
+
+
+def _page(size: int) -> bytes:
+    head = b'<html><head><meta charset="iso-8859-1"><title>Caf\xe9</title></head><body>'
+    para = b"<p>Temporal announced product updates for durable execution and pricing.</p>\n"
+    return head + para * (size // len(para)) + b"</body></html>"
+
+
+def _handler(body: bytes, bandwidth: int):
+    compressed = gzip.compress(body)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+            data = compressed if use_gzip else body
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(data)))
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.end_headers()
+            try:
+                for start in range(0, len(data), CHUNK):
+                    self.wfile.write(data[start:start + CHUNK])
+                    time.sleep(CHUNK / bandwidth)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+def serve(body: bytes, bandwidth: int) -> Tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(body, bandwidth))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/page"
+
+
+async def _urlopen(url: str, pages: int) -> int:
+    total = 0
+    for _ in range(pages):
+        with urlopen(url, timeout=60) as resp:
+            total += len(resp.read())
+    return total
+
+
+async def _fetcher(url: str, pages: int, cap: int) -> int:
+    fetcher = PageFetcher(max_bytes=cap, timeout=60)
+    try:
+        results = await asyncio.gather(*(fetcher.fetch(url) for _ in range(pages)))
+    finally:
+        await fetcher.aclose()
+    assert results[0].encoding == "iso8859-1" and "Café" in results[0].text
+    return sum(len(result.content) for result in results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=8, help="Pages per mode")
+    parser.add_argument("--page-kib", type=int, default=2048, help="Uncompressed page size")
+    parser.add_argument("--cap-kib", type=int, default=256, help="Fetcher byte cap")
+    parser.add_argument("--bandwidth-kib", type=int, default=4096, help="Server bandwidth per connection (KiB/s)")
+    args = parser.parse_args()
+
+    server, url = serve(_page(args.page_kib * 1024), args.bandwidth_kib * 1024)
+    try:
+        print(f"{'mode':<8} {'pages':>6} {'wall s':>8} {'body KiB':>10}")
+        for mode in ("urlopen", "fetcher"):
+            start = time.perf_counter()
+            if mode == "urlopen":
+                total = asyncio.run(_urlopen(url, args.pages))
+            else:
+                total = asyncio.run(_fetcher(url, args.pages, args.cap_kib * 1024))
+            wall = time.perf_counter() - start
+            print(f"{mode:<8} {args.pages:>6} {wall:>8.2f} {total // 1024:>10,}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
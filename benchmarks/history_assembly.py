@@ -0,0 +1,69 @@
+"""
+PromptHistory.to_messages: incremental cache vs. full re-assembly.
+
+Replays the message pattern of an AgentLoopWorkflow run (tool result plus
+facts/plan updates per step, then the assistant turn) and assembles the
+Gemini messages after every step, as the workflow does. The baseline builds a
+fresh PromptAssembly over every entry each time.
+
+Usage (from the repository root):
+    python -m benchmarks.history_assembly --steps 30 --repeat 20
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from src.resources.myprompts.assembly import PromptAssembly
+from src.resources.myprompts.history import EntryKind, PromptHistory
+from src.resources.myprompts.models import BasePrompt, SystemPrompt, TaskPrompt
+from src.resources.myprompts.provider import LLMProvider
+
+
+def _full_assembly(history: PromptHistory):
+    prompts = [entry.prompt for entry in history.entries]
+    return PromptAssembly(prompts=prompts).build(provider=LLMProvider.GEMINI)
+
+
+def _cached_assembly(history: PromptHistory):
+    return history.to_messages(provider=LLMProvider.GEMINI)
+
+
+def _simulate_run(steps: int, assemble: Callable[[PromptHistory], list]) -> float:
+    history = PromptHistory()
+    history.add(SystemPrompt(text="You are an expert Competitive Analysis Agent. " * 20), pinned=True)
+    history.add(TaskPrompt(text="Analyze the top 3 competitors for Temporal."), pinned=True)
+    history.add(BasePrompt(text="Step-by-step plan: ... " * 10), pinned=True)
+
+    elapsed = 0.0
+    for step in range(steps):
+        history.add(BasePrompt(role="assistant", text=f"Thinking about step {step}. " * 5))
+        start = time.perf_counter()
+        assemble(history)
+        elapsed += time.perf_counter() - start
+
+        history.add(BasePrompt(role="tool", text='{"snippet": "' + "page text " * 400 + '"}'), kind=EntryKind.TOOL)
+        history.add(BasePrompt(text="Update the facts. " * 30), kind=EntryKind.PLANNING)
+        history.add(BasePrompt(text="Update the plan. " * 30), kind=EntryKind.PLANNING)
+        start = time.perf_counter()
+        assemble(history)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=30, help="Agent steps per simulated run")
+    parser.add_argument("--repeat", type=int, default=20, help="Simulated runs per variant")
+    args = parser.parse_args()
+
+    calls = args.steps * 2
+    print(f"{'variant':<10} {'runs':>5} {'calls/run':>10} {'ms/run':>10} {'us/call':>10}")
+    for name, assemble in (("full", _full_assembly), ("cached", _cached_assembly)):
+        total = sum(_simulate_run(args.steps, assemble) for _ in range(args.repeat))
+        per_run = total / args.repeat
+        print(f"{name:<10} {args.repeat:>5} {calls:>10} {per_run * 1000:>10.2f} {per_run / calls * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Throttled fetches with and without the per-host politeness scheduler.
+
+A local HTTP server answers 429 (with Retry-After) whenever more than
+`--server-concurrency` requests are in flight, like a news or IR host
+protecting itself. Many concurrent agents then fetch pages from it.
+"unscheduled" fires every request at once with no retries; "scheduled" uses
+the HostScheduler defaults (or the flags below), which queue, pace and retry.
+
+Usage (from the repository root):
+    python -m benchmarks.host_scheduler --requests 40 --server-concurrency 4
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.resources.fetcher import PageFetcher
+from src.resources.host_scheduler import HostScheduler
+
+BODY = b"<html><body><p>Quarterly results and investor news.</p></body></html>"
+
+
+def serve(limit: int, latency: float):
+    lock = threading.Lock()
+    state = {"in_flight": 0, "rejected": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            with lock:
+                busy = state["in_flight"] >= limit
+                if busy:
+                    state["rejected"] += 1
+                else:
+                    state["in_flight"] += 1
+            if busy:
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            try:
+                time.sleep(latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(BODY)))
+                self.end_headers()
+                self.wfile.write(BODY)
+            finally:
+                with lock:
+                    state["in_flight"] -= 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+
+async def _run(fetcher: PageFetcher, base: str, requests: int):
+    async def one(index: int) -> bool:
+        try:
+            await fetcher.fetch(f"{base}/page/{index}")
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(one(index) for index in range(requests)))
+    finally:
+        await fetcher.aclose()
+    return sum(results), time.perf_counter() - start, fetcher.scheduler.stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40, help="Concurrent page fetches")
+    parser.add_argument("--server-concurrency", type=int, default=4, help="In-flight requests the server accepts")
+    parser.add_argument("--latency", type=float, default=0.2, help="Server response time in seconds")
+    parser.add_argument("--host-concurrency", type=int, default=4, help="Scheduler concurrency per host")
+    parser.add_argument("--rate", type=float, default=20.0, help="Scheduler requests per second per host")
+    args = parser.parse_args()
+
+    modes = {
+        "unscheduled": lambda: PageFetcher(scheduler=HostScheduler(concurrency=10_000, rate=0), max_retries=0),
+        "scheduled": lambda: PageFetcher(
+            scheduler=HostScheduler(concurrency=args.host_concurrency, rate=args.rate, burst=args.host_concurrency),
+        ),
+    }
+
+    print(f"{'mode':<12} {'ok':>4} {'failed':>7} {'429s':>6} {'wall s':>7} {'mean wait s':>12} {'max wait s':>11}")
+    for mode, make_fetcher in modes.items():
+        server, base, state = serve(args.server_concurrency, args.latency)
+        try:
+            ok, wall, stats = asyncio.run(_run(make_fetcher(), base, args.requests))
+        finally:
+            server.shutdown()
+        host = stats.get("127.0.0.1", {})
+        print(
+            f"{mode:<12} {ok:>4} {args.requests - ok:>7} {state['rejected']:>6} {wall:>7.2f} "
+            f"{host.get('mean_wait_seconds', 0):>12.2f} {host.get('max_wait_seconds', 0):>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+HTML-to-text throughput and useful-text yield: regex stripping vs. TextExtractor.
+
+Runs over a corpus of saved HTML pages (`--corpus DIR` with *.html files) or,
+without one, over synthetic pages with inline scripts, styles, navigation and
+footers around an article. Both methods produce the 4000-character snippet
+`browse_page` returns. Yield is the share of snippet words that occur in the
+page's <p>/<h1-6> text, i.e. how much of the snippet is body content rather
+than code or boilerplate.
+
+Usage (from the repository root):
+    python -m benchmarks.html_extraction --corpus saved_pages/ --repeat 5
+"""
+
+import argparse
+import html
+import re
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from src.resources.html_text import extract_text
+
+SNIPPET_CHARS = 4000
+_CONTENT_RE = re.compile(r"<(p|h[1-6])\b[^>]*>(.*?)</\1>", re.IGNORECASE | re.DOTALL)
+_WORD_RE = re.compile(r"\w+")
+
+
+def regex_snippet(text: str) -> str:
+    # The previous browse_page: strip tags over the full document, then cut.
+    no_tags = re.sub(r"<[^>]+>", " ", text)
+    unescaped = html.unescape(no_tags)
+    return re.sub(r"\s+", " ", unescaped).strip()[:SNIPPET_CHARS]
+
+
+def parser_snippet(text: str) -> str:
+    return extract_text(text, max_chars=SNIPPET_CHARS)
+
+
+def content_words(page: str) -> set:
+    words = set()
+    for _, inner in _CONTENT_RE.findall(page):
+        words.update(word.lower() for word in _WORD_RE.findall(html.unescape(re.sub(r"<[^>]+>", " ", inner))))
+    return words
+
+
+def useful_yield(snippet: str, words: set) -> float:
+    snippet_words = [word.lower() for word in _WORD_RE.findall(snippet)]
+    if not snippet_words:
+        return 0.0
+    return sum(1 for word in snippet_words if word in words) / len(snippet_words)
+
+
+def synthetic_corpus(pages: int = 50) -> List[str]:
+    corpus = []
+    for index in range(pages):
+        script = "function track(e){window.dataLayer=window.dataLayer||[];dataLayer.push({event:e,id:%d});}\n" % index
+        style = ".nav a{color:#333;padding:4px}.hero{background:url(hero.png)}\n"
+        links = "".join(f'<li><a href="/section/{n}">Section {n}</a></li>' for n in range(60))
+        paragraphs = "".join(
+            f"<p>Company {index} reported quarterly revenue growth in segment {n}, "
+            f"citing durable execution demand and new enterprise pricing.</p>"
+            for n in range(40)
+        )
+        corpus.append(
+            f"<html><head><title>Company {index} results</title>"
+            f"<style>{style * 40}</style><script>{script * 80}</script></head><body>"
+            f'<header><nav class="main-nav"><ul>{links}</ul></nav></header>'
+            f'<div class="cookie-banner">We use cookies to improve your experience.</div>'
+            f"<main><article><h1>Company {index} quarterly results</h1>{paragraphs}</article></main>"
+            f"<footer><ul>{links}</ul><p>Copyright 2026</p></footer>"
+            f"<script>{script * 40}</script></body></html>"
+        )
+    return corpus
+
+
+def _measure(method: Callable[[str], str], corpus: List[str], words: List[set], repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        snippets = [method(page) for page in corpus]
+    elapsed = time.perf_counter() - start
+    yields = [useful_yield(snippet, page_words) for snippet, page_words in zip(snippets, words)]
+    return elapsed / repeat, sum(yields) / len(yields), sum(map(len, snippets)) / len(snippets)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="Directory of saved *.html pages")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the corpus to average")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = [path.read_text(errors="replace") for path in sorted(Path(args.corpus).glob("*.html"))]
+    else:
+        corpus = synthetic_corpus()
+    words = [content_words(page) for page in corpus]
+    megabytes = sum(len(page.encode("utf-8")) for page in corpus) / 1e6
+
+    print(f"{len(corpus)} pages, {megabytes:.1f} MB")
+    print(f"{'method':<7} {'pages/s':>9} {'MB/s':>8} {'snippet chars':>14} {'useful yield':>13}")
+    for name, method in (("regex", regex_snippet), ("parser", parser_snippet)):
+        elapsed, mean_yield, mean_chars = _measure(method, corpus, words, args.repeat)
+        print(
+            f"{name:<7} {len(corpus) / elapsed:>9.1f} {megabytes / elapsed:>8.1f} "
+            f"{mean_chars:>14.0f} {mean_yield:>13.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Concurrent LLM steps per worker vs. activity slots.
+
+Drives `llm_step_activity` directly against a latency-injecting fake client,
+with a semaphore standing in for the worker's activity slots. The "blocking"
+mode spends the latency in `time.sleep`, reproducing the old synchronous
+client; the "async" mode uses the shared async client path.
+
+Usage (from the repository root):
+    python -m benchmarks.llm_concurrency --latency 0.5 --slots 1,2,4,8,16
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.resources.gemini_client import set_async_client
+from src.resources.custom_types.types import AgentStepInput
+from src.workflows.gemini_research_agent.activities import llm_step_activity
+
+from .fakes import FakeGeminiClient
+
+
+async def _run(slots: int, steps: int, client: FakeGeminiClient) -> float:
+    set_async_client(client)
+    semaphore = asyncio.Semaphore(slots)
+    step = AgentStepInput(
+        task="benchmark",
+        history=[{"role": "user", "parts": [{"text": "Analyze Temporal."}]}],
+    )
+
+    async def one() -> None:
+        async with semaphore:
+            await llm_step_activity(step)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(steps)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake Gemini latency in seconds")
+    parser.add_argument("--slots", default="1,2,4,8,16", help="Comma-separated activity slot counts")
+    parser.add_argument("--steps-per-slot", type=int, default=4, help="LLM steps scheduled per slot")
+    args = parser.parse_args()
+
+    print(f"{'mode':<9} {'slots':>5} {'steps':>6} {'wall s':>8} {'steps/s':>8} {'max in flight':>14}")
+    for slots in (int(s) for s in args.slots.split(",")):
+        steps = slots * args.steps_per_slot
+        for mode in ("blocking", "async"):
+            client = FakeGeminiClient(latency=args.latency, blocking=(mode == "blocking"))
+            wall = asyncio.run(_run(slots, steps, client))
+            print(
+                f"{mode:<9} {slots:>5} {steps:>6} {wall:>8.2f} "
+                f"{steps / wall:>8.2f} {client.max_in_flight:>14}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Time-to-first-tool for streamed vs. non-streamed LLM steps.
+
+Drives `llm_step_activity` against a fake client whose responses request a
+tool call in the first chunk and spend the rest of the latency on trailing
+chunks. The streamed step returns once the function call arrives; the
+non-streamed step waits for the whole response.
+
+Usage (from the repository root):
+    python -m benchmarks.llm_streaming --latency 4 --chunks 8 --steps 5
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.resources.gemini_client import set_async_client
+from src.resources.custom_types.types import AgentStepInput
+from src.workflows.gemini_research_agent.activities import llm_step_activity
+
+from .fakes import FakeGeminiClient, function_call_response
+
+
+async def _run(stream: bool, steps: int, client: FakeGeminiClient) -> float:
+    set_async_client(client)
+    step = AgentStepInput(
+        task="benchmark",
+        history=[{"role": "user", "parts": [{"text": "Analyze Temporal."}]}],
+        stream=stream,
+    )
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        output = await llm_step_activity(step)
+        assert output.tool_calls, "expected a tool call"
+    return (time.perf_counter() - start) / steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=4.0, help="Fake full-response latency in seconds")
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks per streamed response")
+    parser.add_argument("--steps", type=int, default=5, help="LLM steps per mode")
+    args = parser.parse_args()
+
+    def responder(contents, config):
+        return function_call_response("validate_company", {"company_name": "Temporal"})
+
+    print(f"{'mode':<11} {'steps':>6} {'time to first tool s':>21}")
+    for stream in (False, True):
+        client = FakeGeminiClient(latency=args.latency, responder=responder, stream_chunks=args.chunks)
+        per_step = asyncio.run(_run(stream, args.steps, client))
+        print(f"{'streaming' if stream else 'buffered':<11} {args.steps:>6} {per_step:>21.2f}")
+
+
+if __name__ == "__main__":
+    main()
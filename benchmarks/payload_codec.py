@@ -0,0 +1,126 @@
+"""
+Payload bytes and encode/decode CPU time per compression codec.
+
+Payloads come from a recorded agent run, i.e. a workflow history exported with
+`temporal workflow show --workflow-id <id> --output json > run.json`. Without
+`--recording`, a synthetic 30-step run is generated instead: LLM step inputs
+with by-value chat history, scraped page text, and a final result carrying a
+base64 PDF.
+
+Usage (from the repository root):
+    python -m benchmarks.payload_codec --recording run.json --repeat 5
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+from temporalio.api.common.v1 import Payload
+from temporalio.contrib.pydantic import pydantic_data_converter
+
+from src.resources.custom_types.types import AgentStepInput, ToolCall
+from src.workflows.gemini_research_agent.codec import CompressionCodec, zstandard
+
+SAMPLE_PDF = Path(__file__).resolve().parent.parent / "reports" / "Example: Temporal Report.pdf"
+
+
+def _payload_dicts(node: Any) -> Iterator[dict]:
+    # Exported histories hold payloads as {"metadata": {...}, "data": "<base64>"}.
+    if isinstance(node, dict):
+        if "data" in node and isinstance(node.get("metadata"), dict):
+            yield node
+            return
+        for value in node.values():
+            yield from _payload_dicts(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _payload_dicts(value)
+
+
+def load_recording(path: Path) -> List[Payload]:
+    payloads = []
+    for raw in _payload_dicts(json.loads(path.read_text())):
+        metadata = {key: base64.b64decode(value) for key, value in raw["metadata"].items()}
+        payloads.append(Payload(metadata=metadata, data=base64.b64decode(raw.get("data", ""))))
+    return payloads
+
+
+def synthesize_run(steps: int = 30) -> List[Payload]:
+    to_payloads = pydantic_data_converter.payload_converter.to_payloads
+    page_text = " ".join(
+        f"Temporal announced product update {i} for durable execution, workflows and pricing."
+        for i in range(60)
+    )
+    history: List[dict] = [
+        {"role": "user", "parts": [{"text": "You are an expert Competitive Analysis Agent. " * 10}]},
+        {"role": "user", "parts": [{"text": "Analyze the top 3 competitors for Temporal."}]},
+    ]
+
+    values: List[Any] = []
+    for step in range(steps):
+        values.append(AgentStepInput(task="Temporal", history=list(history)))
+        call = ToolCall(name="browse_page", arguments={"url": f"https://example.com/{step}", "instructions": "news"})
+        result = json.dumps({"url": call.arguments["url"], "snippet": page_text[:4000], "note": ""})
+        values.extend([call, result])
+        history.append({"role": "model", "parts": [{"text": result}]})
+        history.append({"role": "user", "parts": [{"text": f"Update facts and plan after step {step}. " * 8}]})
+
+    pdf = SAMPLE_PDF.read_bytes() if SAMPLE_PDF.exists() else b"%PDF-1.4 " + bytes(range(256)) * 400
+    values.append({"markdown_report": "# Report\n\n" + page_text, "pdf_base64": base64.b64encode(pdf).decode()})
+
+    payloads: List[Payload] = []
+    for value in values:
+        payloads.extend(to_payloads([value]))
+    return payloads
+
+
+async def _measure(codec: Optional[CompressionCodec], payloads: List[Payload], repeat: int):
+    if codec is None:
+        return sum(p.ByteSize() for p in payloads), 0.0, 0.0
+
+    encode_cpu = decode_cpu = 0.0
+    encoded: List[Payload] = []
+    for _ in range(repeat):
+        start = time.process_time()
+        encoded = await codec.encode(payloads)
+        encode_cpu += time.process_time() - start
+        start = time.process_time()
+        await codec.decode(encoded)
+        decode_cpu += time.process_time() - start
+    return sum(p.ByteSize() for p in encoded), encode_cpu / repeat, decode_cpu / repeat
+
+
+async def _main(args: argparse.Namespace) -> None:
+    payloads = load_recording(Path(args.recording)) if args.recording else synthesize_run(args.steps)
+    codecs = [
+        ("none", None),
+        ("zlib-1", CompressionCodec("zlib", args.min_bytes, 1)),
+        ("zlib-6", CompressionCodec("zlib", args.min_bytes, 6)),
+    ]
+    if zstandard is not None:
+        codecs.append(("zstd-3", CompressionCodec("zstd", args.min_bytes, 3)))
+
+    print(f"{len(payloads)} payloads, min_bytes={args.min_bytes}")
+    print(f"{'codec':<8} {'bytes':>12} {'ratio':>7} {'encode ms':>10} {'decode ms':>10}")
+    baseline = None
+    for name, codec in codecs:
+        size, encode_cpu, decode_cpu = await _measure(codec, payloads, args.repeat)
+        baseline = baseline or size
+        print(f"{name:<8} {size:>12,} {baseline / size:>7.2f} {encode_cpu * 1000:>10.2f} {decode_cpu * 1000:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recording", help="Workflow history JSON exported with the Temporal CLI")
+    parser.add_argument("--steps", type=int, default=30, help="Steps in the synthetic run")
+    parser.add_argument("--min-bytes", type=int, default=2048, help="Compression size threshold")
+    parser.add_argument("--repeat", type=int, default=5, help="Encode/decode rounds to average")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Prefix cache reuse across LLM steps.
+
+Drives `llm_step_activity` for a run of steps against a fake client that
+records which requests referenced a cached context. Modes: "cached" (caching
+available), "unavailable" (cache creation fails, requests fall back to the
+full prefix) and "disabled". Prefix tokens are the chars/4 estimate of the
+system instruction plus tool declarations sent in full.
+
+By default the prefix is the agent's real system instruction and tool
+declarations, checked against the production caching minimum
+(GEMINI_PREFIX_CACHE_MIN_TOKENS). That prefix is below the minimum, so every
+mode sends it in full; `--system-tokens` pads the system instruction to show
+the savings once a prefix does qualify.
+
+Usage (from the repository root):
+    python -m benchmarks.prefix_cache --steps 30
+    python -m benchmarks.prefix_cache --steps 30 --system-tokens 6000
+"""
+
+import argparse
+import asyncio
+
+from src.resources.gemini_client import set_async_client
+from src.resources.mytools import TOOL_SCHEMAS
+from src.resources.prefix_cache import PREFIX_CACHE_MIN_TOKENS, PrefixCacheManager, estimate_prefix_tokens
+from src.resources.custom_types.types import AgentStepInput
+from src.workflows.gemini_research_agent import activities
+from src.workflows.gemini_research_agent.workflow import agent_system_instruction
+
+from .fakes import FakeGeminiClient
+
+
+async def _run(mode: str, steps: int, system_instruction: str) -> dict:
+    client = FakeGeminiClient(latency=0.0, caching_available=(mode != "unavailable"))
+    set_async_client(client)
+    manager = PrefixCacheManager(client_getter=lambda: client, enabled=(mode != "disabled"))
+    activities.PREFIX_CACHE = manager
+
+    history = [{"role": "user", "parts": [{"text": "Analyze Temporal."}]}]
+    for _ in range(steps):
+        await activities.llm_step_activity(
+            AgentStepInput(task="benchmark", history=history, system_instruction=system_instruction)
+        )
+
+    prefix_tokens = estimate_prefix_tokens(system_instruction, TOOL_SCHEMAS)
+    reused = sum(1 for call in client.calls if call["cached_content"])
+    return {
+        "reused": reused,
+        "creates": len(client.caches.created),
+        "fallbacks": manager.stats["fallbacks"],
+        "prefix_tokens_sent": prefix_tokens * (steps - reused + len(client.caches.created)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=30, help="LLM steps per run")
+    parser.add_argument(
+        "--system-tokens",
+        type=int,
+        default=None,
+        help="Pad the system instruction to about this many tokens instead of using the agent's own",
+    )
+    args = parser.parse_args()
+
+    if args.system_tokens is None:
+        system_instruction = agent_system_instruction()
+        source = "agent system instruction"
+    else:
+        system_instruction = "You are an expert Competitive Analysis Agent. " * (args.system_tokens // 10)
+        source = f"padded to ~{args.system_tokens} tokens"
+    prefix_tokens = estimate_prefix_tokens(system_instruction, TOOL_SCHEMAS)
+    print(
+        f"prefix: {source} + tool declarations, ~{prefix_tokens:,} tokens "
+        f"(caching minimum {PREFIX_CACHE_MIN_TOKENS:,}; "
+        f"{'cacheable' if prefix_tokens >= PREFIX_CACHE_MIN_TOKENS else 'below the minimum, sent in full'})"
+    )
+
+    print(f"{'mode':<12} {'steps':>6} {'reused':>7} {'creates':>8} {'fallbacks':>10} {'prefix tokens sent':>19}")
+    for mode in ("cached", "unavailable", "disabled"):
+        result = asyncio.run(_run(mode, args.steps, system_instruction))
+        print(
+            f"{mode:<12} {args.steps:>6} {result['reused']:>7} {result['creates']:>8} "
+            f"{result['fallbacks']:>10} {result['prefix_tokens_sent']:>19,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
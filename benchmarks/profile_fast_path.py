@@ -0,0 +1,105 @@
+"""
+LLM calls and time to first browse: company profile fast path vs. step-by-step.
+
+Replays the start of an agent run against a fake client with a fixed latency
+per call. The fake model follows the initial plan: validate, identify the
+sector, identify competitors, then browse. In "fast" mode the single
+`profile_company` call runs first and its results are seeded into history,
+as AgentLoopWorkflow does with `fast_profile`; in "stepwise" mode each lookup
+costs an agent step plus a tool call.
+
+Usage (from the repository root):
+    python -m benchmarks.profile_fast_path --latency 1.0
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from src.resources.gemini_client import set_async_client
+from src.resources.custom_types.types import AgentStepInput, CompanyProfile, ToolCall
+from src.workflows.gemini_research_agent import activities
+
+from .fakes import FakeGeminiClient, function_call_response, text_response
+
+COMPANY = "Temporal"
+NEXT_CALL = [
+    ("is_valid", "validate_company", {"company_name": COMPANY}),
+    ("sector", "identify_sector", {"company_name": COMPANY}),
+    ("competitors", "identify_competitors", {"company_name": COMPANY, "sector": "Developer Tools"}),
+]
+
+
+def _responder(contents: Any, config: Any) -> Any:
+    if getattr(config, "response_schema", None) is not None:
+        return text_response(json.dumps({
+            "is_valid": True,
+            "normalized_name": COMPANY,
+            "sector": "Developer Tools",
+            "competitors": ["Cadence", "AWS Step Functions", "Airflow"],
+            "confidence": 0.9,
+            "reason": "fake",
+        }))
+    if getattr(config, "response_mime_type", None) == "application/json":
+        prompt = str(contents)
+        if "top competitors" in prompt:
+            return text_response(json.dumps({"competitors": ["Cadence"], "sector": "Developer Tools", "reason": "fake"}))
+        if "industry sector" in prompt:
+            return text_response(json.dumps({"sector": "Developer Tools", "confidence": 0.9, "reason": "fake"}))
+        return text_response(json.dumps({"is_valid": True, "normalized_name": COMPANY, "confidence": 1, "reason": "fake"}))
+
+    # Agent step: request the first lookup whose result is not in history yet.
+    history = json.dumps(contents)
+    for marker, name, arguments in NEXT_CALL:
+        if f'\\"{marker}\\"' not in history:
+            return function_call_response(name, arguments)
+    return function_call_response("browse_page", {"url": "https://temporal.io", "instructions": "news"})
+
+
+def _tool_message(text: str) -> Dict[str, Any]:
+    return {"role": "user", "parts": [{"text": text}]}
+
+
+async def _run(mode: str, latency: float) -> Dict[str, float]:
+    client = FakeGeminiClient(latency=latency, responder=_responder)
+    set_async_client(client)
+    activities.TOOL_CACHE.ttls = {}
+
+    history: List[Dict[str, Any]] = [_tool_message(f"Analyze the top competitors of {COMPANY}.")]
+    start = time.perf_counter()
+    if mode == "fast":
+        raw = await activities.tool_activity(ToolCall(name="profile_company", arguments={"company_name": COMPANY}))
+        for seed in CompanyProfile.model_validate_json(raw).to_seeded_tool_results(COMPANY):
+            history.append(_tool_message(seed.result))
+
+    steps = 0
+    while True:
+        steps += 1
+        output = await activities.llm_step_activity(AgentStepInput(task=COMPANY, history=history))
+        call = output.tool_calls[0]
+        if call.name == "browse_page":
+            break
+        history.append(_tool_message(await activities.tool_activity(call)))
+
+    return {
+        "llm_calls": len(client.calls),
+        "agent_steps": steps,
+        "first_browse": time.perf_counter() - start,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=1.0, help="Fake Gemini latency per call in seconds")
+    args = parser.parse_args()
+
+    print(f"{'mode':<9} {'llm calls':>10} {'agent steps':>12} {'first browse s':>15}")
+    for mode in ("stepwise", "fast"):
+        result = asyncio.run(_run(mode, args.latency))
+        print(f"{mode:<9} {result['llm_calls']:>10} {result['agent_steps']:>12} {result['first_browse']:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
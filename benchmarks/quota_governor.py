@@ -0,0 +1,91 @@
+"""
+Gemini calls against a throttling API: blind retries vs. the quota governor.
+
+A fake client accepts `--rate-limit` calls per `--window` seconds and answers
+429 with a RetryInfo delay beyond that. A burst of callers then runs final
+report steps, agent steps and tool calls at once. "ungoverned" calls the API
+directly and retries 429s with Temporal's default backoff (1 s, doubling);
+"governed" goes through QuotaGovernor and retries after the delay it returns,
+as the activities do via `next_retry_delay`. Reports 429s, wall time and
+mean completion time per priority.
+
+Usage (from the repository root):
+    python -m benchmarks.quota_governor --calls 60 --rate-limit 10 --window 1
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+
+from benchmarks.fakes import FakeGeminiClient, FakeRateLimitError
+from src.resources.custom_types.types import CallPriority
+from src.resources.quota import QuotaExceededError, QuotaGovernor
+
+MIX = [CallPriority.FINAL_REPORT] + [CallPriority.AGENT_STEP] * 3 + [CallPriority.TOOL] * 6
+
+
+async def _ungoverned(client: FakeGeminiClient, priority: CallPriority) -> None:
+    delay = 1.0
+    while True:
+        try:
+            await client.models.generate_content(model="fake", contents="prompt")
+            return
+        except FakeRateLimitError:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 100.0)
+
+
+async def _governed(client: FakeGeminiClient, governor: QuotaGovernor, priority: CallPriority) -> None:
+    while True:
+        try:
+            async with governor.reserve(priority, tokens=100):
+                await client.models.generate_content(model="fake", contents="prompt")
+            return
+        except QuotaExceededError as exc:
+            await asyncio.sleep(exc.retry_after)
+
+
+async def _run(mode: str, args) -> tuple:
+    client = FakeGeminiClient(latency=args.latency, rate_limit=args.rate_limit, rate_window=args.window)
+    governor = QuotaGovernor(
+        rpm=args.rate_limit * 60 / args.window,
+        tpm=10**9,
+        max_concurrency=args.rate_limit,
+        initial_concurrency=args.rate_limit,
+        burst_seconds=args.window,
+    )
+    finished = defaultdict(list)
+    start = time.perf_counter()
+
+    async def one(priority: CallPriority) -> None:
+        if mode == "governed":
+            await _governed(client, governor, priority)
+        else:
+            await _ungoverned(client, priority)
+        finished[priority].append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(MIX[index % len(MIX)]) for index in range(args.calls)))
+    return time.perf_counter() - start, client.throttled, finished, governor.stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=60, help="Calls issued at once")
+    parser.add_argument("--rate-limit", type=int, default=10, help="Calls the fake API accepts per window")
+    parser.add_argument("--window", type=float, default=1.0, help="Rate-limit window in seconds")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per accepted call")
+    args = parser.parse_args()
+
+    names = [priority.name.lower() for priority in CallPriority]
+    print(f"{'mode':<12} {'429s':>6} {'wall s':>7} " + " ".join(f"{name + ' s':>14}" for name in names))
+    for mode in ("ungoverned", "governed"):
+        wall, throttled, finished, stats = asyncio.run(_run(mode, args))
+        means = " ".join(f"{statistics.mean(finished[priority]):>14.2f}" for priority in CallPriority)
+        print(f"{mode:<12} {throttled:>6} {wall:>7.2f} {means}")
+    print(f"governor: limit {stats['limit']}, throttled {stats['throttled']}, waits {stats['by_priority']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+PDF render throughput for large reports: inline on the event loop vs. the
+thread and process render pools.
+
+Renders `--reports` copies of a synthetic long report concurrently, the way
+a worker would when many agent runs finish together, while a ticker task
+measures how long the event loop is stalled (the delay every other async
+activity on the worker would see). Also reports PDF size as raw bytes vs. the
+base64 text the activity used to return.
+
+Usage (from the repository root):
+    python -m benchmarks.report_rendering --reports 8 --sections 60 --workers 4
+"""
+
+import argparse
+import asyncio
+import base64
+import time
+
+from src.resources.rendering import RenderPool, render_pdf
+
+PARAGRAPH = (
+    "Competitor pricing moved toward usage-based plans this quarter, while enterprise "
+    "customers negotiated multi-year commitments with committed-spend discounts. "
+) * 4
+
+
+def make_report(sections: int) -> str:
+    lines = ["# Competitive Analysis Report", ""]
+    for index in range(sections):
+        lines += [f"## Section {index + 1}", "", PARAGRAPH, "", "### Notes", "", PARAGRAPH, ""]
+    return "\n".join(lines)
+
+
+async def _ticker(stop: asyncio.Event, stalls: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        stalls.append(time.perf_counter() - start - 0.005)
+
+
+async def _run(render, reports: int, markdown: str):
+    stop = asyncio.Event()
+    stalls: list = []
+    ticker = asyncio.create_task(_ticker(stop, stalls))
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    pdfs = await asyncio.gather(*(render(markdown) for _ in range(reports)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return pdfs, wall, max(stalls, default=0.0)
+
+
+async def _inline(markdown: str) -> bytes:
+    # The previous activity: ReportLab work directly inside the coroutine.
+    return render_pdf(markdown)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=8, help="Reports rendered concurrently")
+    parser.add_argument("--sections", type=int, default=60, help="Sections per report")
+    parser.add_argument("--workers", type=int, default=4, help="Render pool size")
+    args = parser.parse_args()
+
+    markdown = make_report(args.sections)
+    pdf = render_pdf(markdown)
+    print(f"report: {len(markdown)} chars of Markdown, {len(pdf)} PDF bytes raw, "
+          f"{len(base64.b64encode(pdf))} as base64")
+
+    print(f"{'mode':<8} {'wall s':>7} {'reports/s':>10} {'max loop stall ms':>18}")
+    for mode in ("inline", "thread", "process"):
+        pool = None if mode == "inline" else RenderPool(kind=mode, max_workers=args.workers)
+        render = _inline if pool is None else pool.render
+        try:
+            if pool is not None:
+                # Start the pool (and spawn its processes) outside the timing.
+                asyncio.run(_run(render, args.workers, "# warm-up"))
+            _, wall, stall = asyncio.run(_run(render, args.reports, markdown))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        print(f"{mode:<8} {wall:>7.2f} {args.reports / wall:>10.1f} {stall * 1000:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Snippet relevance: the first N characters of a page vs. BM25-ranked passages.
+
+Builds synthetic extracted pages in which one paragraph answers the browse
+instructions (pricing, layoffs, a product launch, ...) and sits at a random
+depth among generic company filler. Reports how often that paragraph makes it
+into the snippet, the snippet size and the ranking time per page.
+
+Usage (from the repository root):
+    python -m benchmarks.snippet_ranking --pages 200 --budget 4000
+"""
+
+import argparse
+import random
+import time
+
+from src.resources.ranking import rank_passages
+
+FILLER = [
+    "The company was founded more than two decades ago and has grown through a mix of organic expansion and acquisitions.",
+    "Our mission is to deliver value to customers, partners and shareholders across every market we serve.",
+    "Leadership regularly reviews strategy with the board and publishes updates on governance and sustainability.",
+    "Employees are encouraged to take part in community programs and volunteer days throughout the year.",
+    "The firm operates offices in North America, Europe and Asia, supported by regional service centers.",
+    "Investor relations materials, including annual reports and presentations, are available on request.",
+]
+
+NEEDLES = [
+    ("What pricing changes were announced for the enterprise plan?",
+     "Starting next quarter, enterprise plan pricing rises to 45 dollars per seat, with annual contracts locked at the old price."),
+    ("Did the company announce layoffs or restructuring?",
+     "The restructuring plan eliminates about 1,200 roles, roughly eight percent of headcount, mostly in sales operations."),
+    ("Which new product was launched and when?",
+     "In March the company launched Atlas, a product for warehouse robotics, available first to existing logistics customers."),
+    ("What did the company report for quarterly revenue growth?",
+     "Quarterly revenue grew 14 percent year over year to 3.2 billion, driven by subscription revenue growth in cloud services."),
+]
+
+
+def make_page(rng: random.Random, paragraphs: int, needle: str) -> str:
+    lines = [rng.choice(FILLER) + " " + rng.choice(FILLER) for _ in range(paragraphs)]
+    lines.insert(rng.randrange(paragraphs), needle)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic pages to rank")
+    parser.add_argument("--paragraphs", type=int, default=150, help="Filler paragraphs per page")
+    parser.add_argument("--budget", type=int, default=4000, help="Snippet characters")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = []
+    for _ in range(args.pages):
+        instructions, needle = rng.choice(NEEDLES)
+        cases.append((instructions, needle, make_page(rng, args.paragraphs, needle)))
+
+    methods = {
+        "first chars": lambda text, query: text[:args.budget],
+        "bm25 ranked": lambda text, query: rank_passages(text, query, args.budget)["snippet"],
+    }
+
+    print(f"{'method':<12} {'answer found':>13} {'mean chars':>11} {'ms/page':>8}")
+    for method, snippet_of in methods.items():
+        found = chars = 0
+        start = time.perf_counter()
+        for instructions, needle, text in cases:
+            snippet = snippet_of(text, instructions)
+            found += needle in snippet
+            chars += len(snippet)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{method:<12} {found / len(cases):>12.0%} {chars / len(cases):>11.0f} "
+            f"{elapsed / len(cases) * 1000:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
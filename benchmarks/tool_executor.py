@@ -0,0 +1,73 @@
+"""
+Tool dispatch by policy: a blocking tool on the event loop vs. in the thread pool.
+
+Registers two fake tools: `blocking_lookup` (a synchronous call that blocks,
+like SQLite or a legacy HTTP client) and `network_call` (an async call that
+waits on I/O). Runs many of both concurrently through ToolExecutor, first with
+`blocking_lookup` declared executor="async" (the old inline behavior), then
+executor="thread", and reports wall time and the latency seen by the async
+tool.
+
+Usage (from the repository root):
+    python -m benchmarks.tool_executor --calls 40 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.resources.mytools import TOOL_POLICIES, ToolPolicy
+from src.resources.mytools.executor import ToolExecutor
+from src.resources.mytools.registry import register_tool
+
+LATENCY = [0.05]
+
+
+def blocking_lookup(key: str) -> str:
+    time.sleep(LATENCY[0])
+    return key
+
+
+async def network_call(key: str) -> str:
+    await asyncio.sleep(LATENCY[0])
+    return key
+
+
+async def _run(executor: ToolExecutor, calls: int):
+    # Latency from the moment the whole batch is submitted.
+    async def timed(name: str, index: int) -> float:
+        await executor.run(name, {"key": str(index)})
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(
+        *(timed("blocking_lookup", index) for index in range(calls)),
+        *(timed("network_call", index) for index in range(calls)),
+    )
+    return time.perf_counter() - start, latencies[calls:]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=40, help="Concurrent calls of each tool")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each call takes")
+    parser.add_argument("--threads", type=int, default=16, help="Tool thread pool size")
+    args = parser.parse_args()
+    LATENCY[0] = args.latency
+
+    register_tool(network_call, ToolPolicy(timeout_seconds=600))
+    print(f"{'blocking_lookup':<16} {'wall s':>7} {'network_call mean s':>20} {'max s':>7}")
+    for kind in ("async", "thread"):
+        register_tool(blocking_lookup, ToolPolicy(executor=kind, timeout_seconds=600))
+        executor = ToolExecutor(thread_workers=args.threads)
+        try:
+            wall, latencies = asyncio.run(_run(executor, args.calls))
+        finally:
+            executor.shutdown()
+        assert TOOL_POLICIES["blocking_lookup"].executor == kind
+        print(f"{kind:<16} {wall:>7.2f} {statistics.mean(latencies):>20.3f} {max(latencies):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from .blobstore import BlobStore, LocalBlobStore
+from .custom_types.types import ArtifactHandle
+from .rendering import RENDERER_VERSION
+from .storage import CACHE_DIR
+
+# The worker writes reports here and the CLI (run.py) reads them back, so both
+# must resolve to the same directory: run them on one host from the same
+# working directory, or set ARTIFACT_STORE_DIR to shared storage for both.
+ARTIFACT_STORE_DIR = Path(os.environ.get("ARTIFACT_STORE_DIR", CACHE_DIR / "artifacts")).expanduser().resolve()
+
+
+def report_key(markdown_report: str) -> str:
+    """
+    Index key of the PDF rendered from `markdown_report` by the current
+    renderer (not the PDF's own digest).
+    """
+    return hashlib.sha256(f"{RENDERER_VERSION}\0{markdown_report}".encode("utf-8")).hexdigest()
+
+
+class ArtifactNotFoundError(FileNotFoundError):
+    """
+    Raised when a handle's content is not in this process's artifact store,
+    typically because the reader does not share ARTIFACT_STORE_DIR with the
+    worker that wrote it.
+    """
+
+    def __init__(self, handle: ArtifactHandle, location: str):
+        super().__init__(
+            f"Artifact {handle.digest} ({handle.media_type}) is not in the artifact store at {location}; "
+            "set ARTIFACT_STORE_DIR to the directory the worker stores artifacts in"
+        )
+        self.handle = handle
+
+
+class ArtifactStore:
+    """
+    Report artifacts (Markdown, PDF) kept in a blob store and passed around
+    as small handles.
+
+    Behavior:
+    - `put` stores data under its SHA-256 digest and returns a handle; with
+      `key` (such as `report_key`) the handle is also recorded in a key index.
+    - `find` returns the handle recorded for a key while its content is
+      still stored, or None. It reads only the small index entry.
+    - `read` returns the content behind a handle and raises
+      ArtifactNotFoundError when the store does not have it.
+    - Every method does blocking disk I/O; async callers run them in a thread.
+    """
+
+    def __init__(self, store: BlobStore, index_dir: Path):
+        self.blob_store = store
+        self.index_dir = Path(index_dir)
+
+    def _index_path(self, key: str) -> Path:
+        return self.index_dir / key[:2] / f"{key}.json"
+
+    def put(self, data: bytes, media_type: str, key: Optional[str] = None) -> ArtifactHandle:
+        digest = hashlib.sha256(data).hexdigest()
+        self.blob_store.put(digest, data)
+        handle = ArtifactHandle(digest=digest, media_type=media_type, size=len(data))
+        if key is not None:
+            self._link(key, handle)
+        return handle
+
+    def _link(self, key: str, handle: ArtifactHandle) -> None:
+        # Temporary file and atomic rename, as in LocalBlobStore.
+        path = self._index_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(handle.model_dump_json())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def find(self, key: str) -> Optional[ArtifactHandle]:
+        try:
+            handle = ArtifactHandle.model_validate_json(self._index_path(key).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        return handle if self.blob_store.exists(handle.digest) else None
+
+    @property
+    def location(self) -> str:
+        return str(getattr(self.blob_store, "root", type(self.blob_store).__name__))
+
+    def read(self, handle: ArtifactHandle) -> bytes:
+        data = self.blob_store.get(handle.digest)
+        if data is None:
+            raise ArtifactNotFoundError(handle, self.location)
+        return data
+
+
+ARTIFACTS = ArtifactStore(LocalBlobStore(ARTIFACT_STORE_DIR), ARTIFACT_STORE_DIR / "keys")
@@ -0,0 +1,230 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .myprompts.blocks import decode_block, encode_block
+from .storage import CACHE_DIR
+
+BLOB_STORE_DIR = Path(os.environ.get("BLOB_STORE_DIR", CACHE_DIR / "blobs"))
+BLOCK_CACHE_MAX_ENTRIES = int(os.environ.get("BLOCK_CACHE_MAX_ENTRIES", "4096"))
+# History blocks only matter while their run is active: drop blocks unused
+# for this long, and the least recently used ones beyond the size cap. A
+# run that references an evicted block resends its full history.
+HISTORY_BLOB_TTL_SECONDS = float(os.environ.get("HISTORY_BLOB_TTL_SECONDS", str(24 * 60 * 60)))
+HISTORY_BLOB_MAX_BYTES = int(os.environ.get("HISTORY_BLOB_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Seconds between eviction sweeps of a blob store, per process.
+BLOB_SWEEP_INTERVAL_SECONDS = float(os.environ.get("BLOB_SWEEP_INTERVAL_SECONDS", "600"))
+
+
+class MissingBlocksError(KeyError):
+    """
+    Raised when referenced blocks are neither cached nor in the blob store.
+    """
+
+    def __init__(self, digests: List[str]):
+        super().__init__(f"{len(digests)} history block(s) not found")
+        self.digests = digests
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed blob storage. Keys are SHA-256 hex digests of the data.
+    """
+
+    @abstractmethod
+    def put(self, digest: str, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, digest: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def exists(self, digest: str) -> bool:
+        ...
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Filesystem blob store, sharded by digest prefix (`ab/cd/abcd...`).
+
+    Writes go through a temporary file and an atomic rename, so concurrent
+    writers of the same blob on one host are safe.
+
+    With `ttl_seconds` or `max_bytes`, the store evicts: reads and repeated
+    writes refresh a blob's mtime, and at most every `sweep_interval`
+    seconds a write sweeps out blobs unused for `ttl_seconds`, then the
+    least recently used ones until the store fits in `max_bytes`. Without
+    either, blobs are kept forever.
+    """
+
+    def __init__(
+        self,
+        root: Path = BLOB_STORE_DIR,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sweep_interval: float = BLOB_SWEEP_INTERVAL_SECONDS,
+    ):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.stats: Counter = Counter()
+        self._evicts = ttl_seconds is not None or max_bytes is not None
+        self._next_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def _touch(self, path: Path) -> bool:
+        # Whether the blob exists; marks it as recently used when evicting.
+        if not self._evicts:
+            return path.exists()
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, digest: str, data: bytes) -> None:
+        path = self._path(digest)
+        if self._touch(path):
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        if self._evicts:
+            self._sweep_if_due()
+
+    def get(self, digest: str) -> Optional[bytes]:
+        path = self._path(digest)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return data
+
+    def exists(self, digest: str) -> bool:
+        return self._path(digest).exists()
+
+    def _sweep_if_due(self) -> None:
+        now = time.time()
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep(now)
+        finally:
+            self._sweep_lock.release()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Delete blobs unused for `ttl_seconds`, then the least recently used
+        ones until the store holds at most `max_bytes`. Returns the number
+        of files deleted. Safe to run from several processes at once.
+        """
+        now = time.time() if now is None else now
+        blobs = []
+        for path in self.root.glob("*/*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        blobs.sort()
+
+        total = sum(size for _, size, _ in blobs)
+        deleted = 0
+        for mtime, size, path in blobs:
+            expired = self.ttl_seconds is not None and now - mtime > self.ttl_seconds
+            oversize = self.max_bytes is not None and total > self.max_bytes
+            if not expired and not oversize:
+                # Oldest first: every later blob is newer and the total only shrinks.
+                break
+            if path.name.startswith(".tmp-") and not expired:
+                # A write in progress; its blob is about to be renamed into place.
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+        self.stats["sweeps"] += 1
+        self.stats["evictions"] += deleted
+        return deleted
+
+
+class BlockResolver:
+    """
+    Store and rehydrate history message blocks by digest.
+
+    Behavior:
+    - `store_blocks` verifies each block against its digest and writes blocks the
+      store does not have yet.
+    - `resolve` serves blocks from an in-process LRU cache, falling back to
+      the blob store, and raises MissingBlocksError for unknown digests,
+      including blocks the store has evicted.
+    """
+
+    def __init__(self, store: BlobStore, max_entries: int = BLOCK_CACHE_MAX_ENTRIES):
+        self.blob_store = store
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, digest: str, message: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[digest] = message
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def store_blocks(self, blocks: Dict[str, Dict[str, Any]]) -> None:
+        for digest, message in blocks.items():
+            data = encode_block(message)
+            if hashlib.sha256(data).hexdigest() != digest:
+                raise ValueError(f"History block does not match its digest {digest}")
+            self.blob_store.put(digest, data)
+            self._remember(digest, message)
+
+    def resolve(self, digests: List[str]) -> List[Dict[str, Any]]:
+        messages: List[Dict[str, Any]] = []
+        missing: List[str] = []
+        for digest in digests:
+            with self._lock:
+                message = self._cache.get(digest)
+                if message is not None:
+                    self._cache.move_to_end(digest)
+            if message is None:
+                data = self.blob_store.get(digest)
+                if data is None:
+                    missing.append(digest)
+                    continue
+                message = decode_block(data)
+                self._remember(digest, message)
+            messages.append(message)
+
+        if missing:
+            raise MissingBlocksError(missing)
+        return messages
+
+
+HISTORY_BLOCKS = BlockResolver(
+    LocalBlobStore(ttl_seconds=HISTORY_BLOB_TTL_SECONDS, max_bytes=HISTORY_BLOB_MAX_BYTES)
+)
@@ -1,38 +1,60 @@
+import asyncio
 import json
 import re
-import html
-from urllib.request import urlopen
+import time
+from typing import Optional
 
 from google import genai
-
+from pydantic import BaseModel
+
+from .corpus_index import CORPUS_INDEX
+from .fetcher import FETCHER
+from .gemini_client import GEMINI_MODEL, get_async_client
+from .html_text import extract_text_stream
+from .page_cache import PAGE_CACHE
+from .quota import GEMINI_GOVERNOR, estimate_tokens
+from .ranking import rank_passages
 from .mytools.decorators import tool
 from .custom_types.types import (
     ValidateCompanyArgs,
     IdentifySectorArgs,
     IdentifyCompetitorsArgs,
     BrowsePageArgs,
+    BrowsePagesArgs,
+    SearchLocalCorpusArgs,
+    CallPriority,
     GenerateReportArgs,
+    ProfileCompanyArgs,
+    CompanyProfile,
 )
 
-client = genai.Client()
-
 def _normalize_company_name(name: str) -> str:
     return re.sub(r"\s+", " ", name or "").strip()
 
 
-def _call_gemini_json(prompt: str) -> str:
+async def _call_gemini_json(prompt: str, response_schema: Optional[type[BaseModel]] = None) -> str:
     """
     Helper to call Gemini with a JSON-only response contract.
     Returns the raw JSON string from the first candidate.
+
+    With `response_schema`, the model is constrained to that Pydantic model's
+    schema (structured output).
+
+    Uses the shared async client so the worker event loop stays free
+    while the request is in flight. Calls queue behind agent steps in
+    GEMINI_GOVERNOR and raise QuotaExceededError on 429.
     """
     config = genai.types.GenerateContentConfig(
         response_mime_type="application/json",
+        response_schema=response_schema,
     )
-    resp = client.models.generate_content(
-        model="gemini-2.5-pro",
-        contents=prompt,
-        config=config,
-    )
+    async with GEMINI_GOVERNOR.reserve(CallPriority.TOOL, estimate_tokens(prompt)) as reservation:
+        resp = await get_async_client().models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=config,
+        )
+        reservation.tokens_used = getattr(getattr(resp, "usage_metadata", None), "total_token_count", None)
     msg = resp.candidates[0].content
     part = msg.parts[0]
     txt = getattr(part, "text", None)
@@ -41,8 +63,8 @@ def _call_gemini_json(prompt: str) -> str:
     return txt
 
 
-@tool
-def validate_company(args: ValidateCompanyArgs) -> str:
+@tool(max_concurrency=16, timeout_seconds=25)
+async def validate_company(args: ValidateCompanyArgs) -> str:
     """
     Validate if the input company name corresponds to a real, recognized company.
 
@@ -76,11 +98,11 @@ Respond with a single JSON object with fields:
 
 Do not include any text before or after the JSON.
 """
-    return _call_gemini_json(prompt)
+    return await _call_gemini_json(prompt)
 
 
-@tool
-def identify_sector(args: IdentifySectorArgs) -> str:
+@tool(max_concurrency=16, timeout_seconds=25)
+async def identify_sector(args: IdentifySectorArgs) -> str:
     """
     Determine the primary industry sector of the given company.
 
@@ -109,11 +131,11 @@ If you genuinely cannot determine a sector, use "Unknown sector" with low confid
 
 Do not include any text before or after the JSON.
 """
-    return _call_gemini_json(prompt)
+    return await _call_gemini_json(prompt)
 
 
-@tool
-def identify_competitors(args: IdentifyCompetitorsArgs) -> str:
+@tool(max_concurrency=16, timeout_seconds=25)
+async def identify_competitors(args: IdentifyCompetitorsArgs) -> str:
     """
     Identify the top competitors in the given sector, excluding the input company.
 
@@ -148,61 +170,257 @@ and explain why in the reason.
 
 Do not include any text before or after the JSON.
 """
-    return _call_gemini_json(prompt)
+    return await _call_gemini_json(prompt)
 
 
-def _strip_html(text: str) -> str:
-    # Remove HTML tags and collapse whitespace.
-    no_tags = re.sub(r"<[^>]+>", " ", text)
-    unescaped = html.unescape(no_tags)
-    return re.sub(r"\s+", " ", unescaped).strip()
+@tool(max_concurrency=16, timeout_seconds=45)
+async def profile_company(args: ProfileCompanyArgs) -> str:
+    """
+    Validate a company, identify its sector and its top competitors in one call.
 
+    Behavior:
+    - A single structured-output LLM call replaces validate_company,
+      identify_sector and identify_competitors.
+    - The response is validated against the CompanyProfile model.
+    - Returns structured JSON with:
+      - is_valid: boolean
+      - normalized_name: cleaned-up company name (or null)
+      - sector: short sector label
+      - competitors: up to 3 competitor names, excluding the company itself
+      - confidence: 0–1 float
+      - reason: short explanation
+    - The agent should treat is_valid=False as a hard signal to stop further analysis.
+    """
+    print("[TOOL] profile_company")
+    candidate = _normalize_company_name(args.company_name or "")
+    prompt = f"""
+You are an expert in business, industry classification and competitive analysis.
+
+Task: For the following company name, determine whether it refers to a real, recognized
+company, identify its primary industry sector, and identify its top competitors.
+
+Company: "{candidate}"
+
+Respond with a single JSON object with fields:
+- "is_valid": boolean
+- "normalized_name": string or null
+- "sector": short sector label, such as "Technology", "EdTech", "Finance", etc.
+  Use "Unknown sector" if you genuinely cannot determine one.
+- "competitors": array of up to 3 real-world competitor company names, excluding the focal company.
+  Use an empty array if the company is not valid.
+- "confidence": number between 0 and 1
+- "reason": short string explanation
 
-@tool
-def browse_page(args: BrowsePageArgs) -> str:
+Do not include any text before or after the JSON.
+"""
+    raw = await _call_gemini_json(prompt, response_schema=CompanyProfile)
+    profile = CompanyProfile.model_validate_json(raw)
+
+    own_names = {candidate.casefold(), _normalize_company_name(profile.normalized_name or "").casefold()}
+    profile.competitors = [
+        name for name in profile.competitors
+        if _normalize_company_name(name).casefold() not in own_names
+    ][:3]
+    return profile.model_dump_json()
+
+
+# Characters of page text extracted (and cached) per page; snippets are
+# ranked passages chosen from it.
+BROWSE_EXTRACT_CHARS = 40000
+# Characters of ranked passages returned by browse_page, and seconds it may
+# spend fetching (kept under its tool timeout, throttling backoff included).
+BROWSE_SNIPPET_CHARS = 4000
+BROWSE_PAGE_DEADLINE_SECONDS = 20.0
+# Limits for browse_pages: URLs per call, concurrent fetches, seconds per call
+# (kept under the tool activity timeout) and characters of text per URL.
+BROWSE_PAGES_MAX_URLS = 10
+BROWSE_PAGES_MAX_CONCURRENCY = 10
+BROWSE_PAGES_MAX_DEADLINE_SECONDS = 25.0
+BROWSE_PAGES_SNIPPET_CHARS = 1500
+# Results and characters of snippet per result returned by search_local_corpus.
+CORPUS_SEARCH_MAX_RESULTS = 10
+CORPUS_SEARCH_SNIPPET_CHARS = 600
+
+
+async def _fetch_page_text(url: str, max_chars: int = BROWSE_EXTRACT_CHARS, deadline: Optional[float] = None) -> str:
+    """
+    Main-content text of a page. Fresh copies come from PAGE_CACHE; stale
+    ones are revalidated with a conditional GET and reused on 304. Newly
+    fetched text is also added to the local corpus index. A throttled host
+    whose pause would outlast `deadline` raises HostThrottledError. Cache
+    and index reads and writes run in a thread, since SQLite may wait on
+    other processes' locks (and the index on a running search).
+    """
+    cached = await asyncio.to_thread(PAGE_CACHE.get, url)
+    if cached is not None and cached.fresh:
+        PAGE_CACHE.stats["hits"] += 1
+        return cached.text[:max_chars]
+
+    headers = cached.conditional_headers() if cached is not None else None
+    async with FETCHER.open(url, headers=headers, deadline=deadline) as page:
+        response_headers = page.response.headers
+        revalidated = page.response.status_code == 304 and cached is not None
+        if not revalidated:
+            text = await extract_text_stream(
+                page.iter_bytes(),
+                page.response.headers.get("content-type"),
+                max_chars=max_chars,
+            )
+
+    if revalidated:
+        await asyncio.to_thread(PAGE_CACHE.refresh, url, response_headers)
+        PAGE_CACHE.stats["revalidated"] += 1
+        return cached.text[:max_chars]
+
+    PAGE_CACHE.stats["misses"] += 1
+    await asyncio.to_thread(PAGE_CACHE.put, url, text, response_headers)
+    await asyncio.to_thread(CORPUS_INDEX.add_page, url, text)
+    return text
+
+
+@tool(max_concurrency=32, timeout_seconds=25)
+async def browse_page(args: BrowsePageArgs) -> str:
     """
     Browse a webpage and extract information based on instructions.
 
     Behavior:
-    - Performs a simple HTTP GET for the given URL.
-    - Strips HTML tags and returns the first few kilobytes of visible text.
+    - Performs an async HTTP GET through the shared, pooled fetcher; the body
+      is read only up to the fetcher's byte cap.
+    - Decodes with the charset from the headers or <meta> tag.
+    - Extracts main-content text (headings and paragraphs; no scripts, styles
+      or navigation) incrementally, and stops reading once it has enough.
+    - Extracted text is cached on disk with the page's ETag/Last-Modified;
+      stale entries are revalidated with a conditional request.
+    - Splits the text into passages, ranks them against the instructions
+      with BM25 and returns the best ones (in page order) within 4000
+      characters; without instructions, the start of the page.
+    - A host that throttles for longer than the call's 20-second budget
+      fails fast, with the retry delay in the note.
     - Does not execute JavaScript or handle complex layouts.
     - Returns structured JSON with:
       - url: the requested URL
-      - snippet: extracted text snippet
+      - snippet: selected passages
+      - passages: [{index, score}] of the selected passages
+      - coverage: passages and characters returned vs. the extracted page
       - instructions: echoed instructions for grounding
       - note: limitations or errors, if any
+      - error: why the page could not be fetched, only on failure
     """
     print("[TOOL] browse_page")
     url = args.url
     instructions = args.instructions or ""
 
-    snippet = ""
-    note = ""
+    ranked = {"snippet": "", "passages": [], "coverage": {}}
+    error = ""
 
     try:
-        with urlopen(url, timeout=10) as resp:
-            raw = resp.read()
-            try:
-                html_text = raw.decode("utf-8", errors="ignore")
-            except Exception:
-                html_text = raw.decode(errors="ignore")
-            cleaned = _strip_html(html_text)
-            # Limit length to keep responses manageable.
-            snippet = cleaned[:4000]
+        text = await _fetch_page_text(url, deadline=time.monotonic() + BROWSE_PAGE_DEADLINE_SECONDS)
+        # Keep only the passages relevant to the instructions.
+        ranked = rank_passages(text, instructions, BROWSE_SNIPPET_CHARS)
     except Exception as exc:
-        note = f"Failed to fetch URL: {exc}"
+        error = f"Failed to fetch URL: {exc}"
 
     result = {
         "url": url,
-        "snippet": snippet,
+        **ranked,
         "instructions": instructions,
-        "note": note or "Content fetched successfully; snippet may be truncated.",
+        "note": error or "Content fetched successfully; snippet holds the passages most relevant to the instructions.",
     }
+    if error:
+        result["error"] = error
+    return json.dumps(result)
+
+
+@tool(max_concurrency=8, timeout_seconds=28)
+async def browse_pages(args: BrowsePagesArgs) -> str:
+    """
+    Browse several webpages at once and extract information based on instructions.
+
+    Prefer this over several browse_page calls when you already know which
+    pages to read (for example, the newsrooms of every competitor).
+
+    Behavior:
+    - Fetches up to 10 distinct URLs concurrently, at most `max_concurrency`
+      at a time, within `deadline_seconds` for the whole call.
+    - Returns the passages of each page most relevant to the instructions
+      (BM25-ranked, 1500 characters per URL); a URL that fails or misses
+      the deadline gets an error instead of failing the whole call. A
+      throttled host whose retry delay runs past the deadline fails at
+      once, with the delay in the error.
+    - Returns structured JSON with:
+      - instructions: echoed instructions for grounding
+      - results: list of {url, snippet, passages, coverage} or {url, error},
+        in request order
+    """
+    print("[TOOL] browse_pages")
+    urls = list(dict.fromkeys(url.strip() for url in args.urls if url and url.strip()))
+    skipped = urls[BROWSE_PAGES_MAX_URLS:]
+    urls = urls[:BROWSE_PAGES_MAX_URLS]
+    semaphore = asyncio.Semaphore(max(1, min(args.max_concurrency, BROWSE_PAGES_MAX_CONCURRENCY)))
+    deadline = max(1.0, min(args.deadline_seconds, BROWSE_PAGES_MAX_DEADLINE_SECONDS))
+    deadline_at = time.monotonic() + deadline
+
+    async def browse_one(url: str) -> dict:
+        async with semaphore:
+            try:
+                text = await _fetch_page_text(url, deadline=deadline_at)
+                return {"url": url, **rank_passages(text, args.instructions or "", BROWSE_PAGES_SNIPPET_CHARS)}
+            except Exception as exc:
+                reason = (str(exc).splitlines() or [type(exc).__name__])[0]
+                return {"url": url, "error": f"Failed to fetch URL: {reason}"}
+
+    tasks = [asyncio.ensure_future(browse_one(url)) for url in urls]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+
+    results = [
+        task.result() if task.done() and not task.cancelled()
+        else {"url": url, "error": f"Not fetched within {deadline:g}s"}
+        for url, task in zip(urls, tasks)
+    ]
+    results.extend(
+        {"url": url, "error": f"Skipped: at most {BROWSE_PAGES_MAX_URLS} URLs per call"}
+        for url in skipped
+    )
+    return json.dumps({"instructions": args.instructions or "", "results": results})
+
+
+@tool(executor="thread", max_concurrency=4, timeout_seconds=10)
+def search_local_corpus(args: SearchLocalCorpusArgs) -> str:
+    """
+    Search pages fetched and reports written in earlier runs.
+
+    Try this before browsing: answering from the local index takes
+    milliseconds, and past reports on the same companies are often enough.
+
+    Behavior:
+    - Full-text search (any of the query's words, ranked by BM25) over every
+      page browse_page/browse_pages has fetched and every final report.
+    - `kind` limits results to "page" or "report".
+    - Returns structured JSON with:
+      - query: echoed query
+      - results: list of {source, kind, title, score, snippet, indexed_at},
+        best first; source is the page URL or report id, snippets are short
+        excerpts around the matches
+      - note: present when nothing matched
+    """
+    print("[TOOL] search_local_corpus")
+    kind = (args.kind or "").strip().lower() or None
+    hits = CORPUS_INDEX.search(
+        args.query,
+        limit=max(1, min(args.max_results, CORPUS_SEARCH_MAX_RESULTS)),
+        kind=kind,
+        snippet_chars=CORPUS_SEARCH_SNIPPET_CHARS,
+    )
+    result = {"query": args.query, "results": [hit.model_dump() for hit in hits]}
+    if not hits:
+        result["note"] = "No indexed pages or reports matched; browse the web instead."
     return json.dumps(result)
 
 
-@tool
+@tool(executor="thread", timeout_seconds=10)
 def generate_report(args: GenerateReportArgs) -> str:
     """
     Generate a competitive analysis report with a comparison table and actionable insights.
@@ -0,0 +1,180 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from .ranking import tokenize
+from .storage import CACHE_DIR, open_sqlite
+
+logger = logging.getLogger(__name__)
+
+CORPUS_INDEX_PATH = Path(os.environ.get("CORPUS_INDEX_PATH", CACHE_DIR / "corpus.sqlite3"))
+# Documents kept in the index; the oldest are dropped beyond it.
+CORPUS_INDEX_MAX_DOCUMENTS = int(os.environ.get("CORPUS_INDEX_MAX_DOCUMENTS", "20000"))
+# Tokens of context around the matches returned per result.
+CORPUS_SNIPPET_TOKENS = 48
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    title TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_indexed_at ON documents(indexed_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, body, tokenize='porter unicode61');
+"""
+
+
+class CorpusHit(BaseModel):
+    source: str
+    kind: str
+    title: str
+    score: float
+    snippet: str
+    indexed_at: float
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    FTS5 MATCH expression for free text: any of the query's terms, each
+    quoted so user input never reaches the FTS query syntax.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class CorpusIndex:
+    """
+    Persistent full-text index over fetched pages and finished reports,
+    backed by SQLite FTS5.
+
+    Behavior:
+    - Each document is keyed by its source (a page URL, or `report:<id>`);
+      adding it again replaces the previous text.
+    - `search` ranks with FTS5's BM25 (titles weigh more than bodies) and
+      returns a bounded snippet around the matches of each hit.
+    - At most `max_documents` are kept, dropping the oldest first.
+    - Storage errors are logged; searches then return no hits.
+    - Calls block on SQLite and on a lock shared with running searches;
+      async callers run them with asyncio.to_thread.
+    """
+
+    def __init__(self, path: Path = CORPUS_INDEX_PATH, max_documents: int = CORPUS_INDEX_MAX_DOCUMENTS):
+        self.path = Path(path)
+        self.max_documents = max_documents
+        self.stats: Counter = Counter()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily so importing this module never touches the disk.
+        if self._conn is None:
+            self._conn = open_sqlite(self.path)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def add(self, source: str, kind: str, title: str, body: str) -> None:
+        if not body.strip():
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._delete(conn, source)
+                    cursor = conn.execute(
+                        "INSERT INTO documents (source, kind, title, indexed_at) VALUES (?, ?, ?, ?)",
+                        (source, kind, title, time.time()),
+                    )
+                    conn.execute(
+                        "INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+                        (cursor.lastrowid, title, body),
+                    )
+                    self._evict(conn)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            self.stats[f"indexed_{kind}"] += 1
+        except sqlite3.Error as exc:
+            logger.warning("Corpus index write failed for %s: %s", source, exc)
+
+    def add_page(self, url: str, text: str) -> None:
+        # Extracted text leads with the page title when it has one.
+        title = text.strip().split("\n", 1)[0][:200]
+        self.add(url, "page", title, text)
+
+    def add_report(self, source: str, title: str, markdown: str) -> None:
+        self.add(source, "report", title, markdown)
+
+    def _delete(self, conn: sqlite3.Connection, source: str) -> None:
+        row = conn.execute("SELECT id FROM documents WHERE source = ?", (source,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM documents_fts WHERE rowid = ?", row)
+            conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+        excess = count - self.max_documents
+        if excess <= 0:
+            return
+        ids = conn.execute("SELECT id FROM documents ORDER BY indexed_at ASC LIMIT ?", (excess,)).fetchall()
+        conn.executemany("DELETE FROM documents_fts WHERE rowid = ?", ids)
+        conn.executemany("DELETE FROM documents WHERE id = ?", ids)
+        self.stats["evictions"] += len(ids)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        kind: Optional[str] = None,
+        snippet_chars: int = 600,
+    ) -> List[CorpusHit]:
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        sql = (
+            "SELECT d.source, d.kind, d.title, bm25(documents_fts, 5.0, 1.0) AS rank, "
+            f"snippet(documents_fts, 1, '', '', ' … ', {CORPUS_SNIPPET_TOKENS}), d.indexed_at "
+            "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+            "WHERE documents_fts MATCH ?"
+        )
+        params: list = [expression]
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        try:
+            with self._lock:
+                rows = self._connection().execute(sql, params).fetchall()
+        except sqlite3.Error as exc:
+            logger.warning("Corpus index search failed for %r: %s", query, exc)
+            return []
+        self.stats["searches"] += 1
+        # FTS5's bm25() is lower-is-better; report it as a positive score.
+        return [
+            CorpusHit(
+                source=source,
+                kind=doc_kind,
+                title=title,
+                score=round(-rank, 3),
+                snippet=" ".join(snippet.split())[:snippet_chars],
+                indexed_at=indexed_at,
+            )
+            for source, doc_kind, title, rank, snippet, indexed_at in rows
+        ]
+
+
+CORPUS_INDEX = CorpusIndex()
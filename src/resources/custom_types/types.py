@@ -1,9 +1,95 @@
+import json
+from enum import IntEnum
+
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 
 
+class CallPriority(IntEnum):
+    """
+    Queue order of Gemini calls under the worker's quota governor; lower
+    values go first.
+    """
+
+    FINAL_REPORT = 0
+    AGENT_STEP = 1
+    TOOL = 2
+
+
+class ToolCall(BaseModel):
+    name: str
+    arguments: Dict[str, Any]
+
+
+class SeededToolResult(BaseModel):
+    """
+    A tool result computed outside the agent loop (for example, shared by a
+    parent workflow) and seeded into the agent's history up front.
+    """
+
+    tool_call: ToolCall
+    result: str
+
+
+class AgentSnapshot(BaseModel):
+    """
+    Compact agent state carried across continue-as-new.
+    """
+
+    step_counter: int
+    tools_used: List[str] = []
+    # Summaries of tool results gathered so far
+    facts: List[str] = []
+    # Latest plan / reasoning from the model
+    plan: str = ""
+    history_tokens_saved: Dict[int, int] = {}
+    continue_as_new_count: int = 0
+    # Memoized tool results (small ones only) keyed by canonical call
+    tool_memo: Dict[str, str] = {}
+    tool_calls_memoized: int = 0
+
+
 class AgentInput(BaseModel):
     task: str
+    seeded_tool_results: List[SeededToolResult] = []
+    max_steps: int = 30
+    # Profile the company (validity, sector, competitors) with one structured
+    # call before the agent loop, instead of three separate tool steps.
+    # Skipped when seeded_tool_results are given.
+    fast_profile: bool = True
+    # Start the predicted next lookup (validate -> sector -> competitors)
+    # concurrently with each LLM step; unused results are discarded.
+    speculate: bool = False
+
+    # Estimated-token budget for the prompt history; older tool outputs and
+    # planning updates are compacted once it is exceeded. None disables it.
+    history_token_budget: Optional[int] = 24000
+    # Number of most recent history entries never compacted
+    history_keep_recent: int = 6
+    # Send history to the LLM activity as block digests instead of by value
+    externalize_history: bool = True
+    # Stream LLM steps; a stream that stalls after its first chunk then fails
+    # on the heartbeat timeout instead of running to the full step timeout.
+    # Until the first chunk the activity heartbeats on a timer.
+    stream_llm_steps: bool = True
+    llm_heartbeat_timeout_seconds: int = 30
+
+    # Continue-as-new once the event history reaches either threshold, so
+    # replay cost stays bounded for long runs.
+    continue_as_new_history_events: int = 2000
+    continue_as_new_history_bytes: int = 8 * 1024 * 1024
+    # Set when resuming from continue-as-new
+    snapshot: Optional[AgentSnapshot] = None
+
+
+class PortfolioInput(BaseModel):
+    """
+    A list of companies to research, with at most `max_concurrent`
+    child agent workflows running at once.
+    """
+
+    companies: List[str]
+    max_concurrent: int = 5
 
 
 class AgentStepInput(BaseModel):
@@ -12,12 +98,21 @@ class AgentStepInput(BaseModel):
     """
 
     task: str
-    history: List[Dict[str, Any]]
+    history: List[Dict[str, Any]] = []
 
+    # History by reference: ordered message digests, plus only those blocks
+    # the activity side has not stored yet. Used instead of `history` when set.
+    history_refs: List[str] = []
+    new_blocks: Dict[str, Dict[str, Any]] = {}
 
-class ToolCall(BaseModel):
-    name: str
-    arguments: Dict[str, Any]
+    # Static system text, sent as a system instruction so the activity can
+    # serve it (with the tool declarations) from a provider-side prefix cache.
+    system_instruction: Optional[str] = None
+    # Stream the response, heartbeating per chunk (on a timer until the first
+    # one) and returning as soon as a function call arrives.
+    stream: bool = False
+    # Queue priority when Gemini quota is scarce
+    priority: CallPriority = CallPriority.AGENT_STEP
 
 
 class AgentStepOutput(BaseModel):
@@ -27,13 +122,44 @@ class AgentStepOutput(BaseModel):
     # Plain-text final answer
     output_text: Optional[str] = None
 
-    # If tool requested:
-    tool_call: Optional[ToolCall] = None
+    # Every tool requested in this model turn, in the order the model emitted them
+    tool_calls: List[ToolCall] = []
 
     # Raw model message for history (optional)
     model_message: Dict[str, Any]
 
 
+class ArtifactHandle(BaseModel):
+    """
+    Reference to a stored artifact; fetch the content with ARTIFACTS.read.
+    """
+
+    # SHA-256 of the content
+    digest: str
+    media_type: str
+    size: int
+
+
+class ReportArtifacts(BaseModel):
+    markdown: ArtifactHandle
+    pdf: ArtifactHandle
+    # False when an identical report had already been rendered
+    rendered: bool
+
+
+class AgentResult(BaseModel):
+    """
+    Final result of an agent run.
+    """
+
+    # Stored final report; absent when no final answer was reached
+    markdown: Optional[ArtifactHandle] = None
+    pdf: Optional[ArtifactHandle] = None
+    # Last model output when the run stopped without a final answer
+    partial_output: str = ""
+    stats: Dict[str, Any] = {}
+
+
 class ValidateCompanyArgs(BaseModel):
     company_name: str
 
@@ -52,6 +178,77 @@ class BrowsePageArgs(BaseModel):
     instructions: str
 
 
+class BrowsePagesArgs(BaseModel):
+    urls: List[str]
+    instructions: str
+    # Pages fetched at once, and the time budget for the whole call
+    max_concurrency: int = 5
+    deadline_seconds: float = 20.0
+
+
+class SearchLocalCorpusArgs(BaseModel):
+    query: str
+    max_results: int = 5
+    # "page" or "report" to search only one kind of document
+    kind: Optional[str] = None
+
+
+class IndexReportInput(BaseModel):
+    source: str
+    title: str
+    markdown: str
+
+
 class GenerateReportArgs(BaseModel):
     company_name: str
     context: str
+
+
+class ProfileCompanyArgs(BaseModel):
+    company_name: str
+
+
+class CompanyProfile(BaseModel):
+    """
+    Structured output of the single-call company profile.
+    """
+
+    is_valid: bool
+    normalized_name: Optional[str] = None
+    sector: str = "Unknown sector"
+    competitors: List[str] = []
+    confidence: float = 0.0
+    reason: str = ""
+
+    def to_seeded_tool_results(self, company_name: str) -> List[SeededToolResult]:
+        """
+        Express the profile as the results of validate_company, identify_sector
+        and identify_competitors, so it can be seeded like precomputed lookups.
+        """
+        validate = {
+            "is_valid": self.is_valid,
+            "normalized_name": self.normalized_name,
+            "confidence": self.confidence,
+            "reason": self.reason,
+        }
+        seeds = [SeededToolResult(
+            tool_call=ToolCall(name="validate_company", arguments={"company_name": company_name}),
+            result=json.dumps(validate),
+        )]
+        if not self.is_valid:
+            return seeds
+
+        sector = {"sector": self.sector, "confidence": self.confidence, "reason": self.reason}
+        competitors = {"competitors": self.competitors, "sector": self.sector, "reason": self.reason}
+        seeds.append(SeededToolResult(
+            tool_call=ToolCall(name="identify_sector", arguments={"company_name": company_name}),
+            result=json.dumps(sector),
+        ))
+        seeds.append(SeededToolResult(
+            tool_call=ToolCall(
+                name="identify_competitors",
+                arguments={"company_name": company_name, "sector": self.sector},
+            ),
+            result=json.dumps(competitors),
+        ))
+        return seeds
@@ -0,0 +1,217 @@
+import asyncio
+import codecs
+import contextlib
+import itertools
+import os
+import re
+import time
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from pydantic import BaseModel
+
+from .host_scheduler import HostScheduler, HostThrottledError, backoff_seconds, retry_after_seconds
+
+# Stop reading a response body after this many (decompressed) bytes.
+FETCH_MAX_BYTES = int(os.environ.get("FETCH_MAX_BYTES", str(256 * 1024)))
+FETCH_TIMEOUT_SECONDS = float(os.environ.get("FETCH_TIMEOUT_SECONDS", "10"))
+# Pool limits for the shared client; idle connections are kept alive per host.
+FETCH_MAX_CONNECTIONS = int(os.environ.get("FETCH_MAX_CONNECTIONS", "64"))
+FETCH_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("FETCH_MAX_KEEPALIVE_CONNECTIONS", "32"))
+# Retries of throttled responses (429/503) before the status is returned as an error.
+FETCH_MAX_RETRIES = int(os.environ.get("FETCH_MAX_RETRIES", "3"))
+FETCH_USER_AGENT = os.environ.get("FETCH_USER_AGENT", "gemini-research-agent/0.1 (+https://temporal.io)")
+
+# Bytes scanned for a <meta charset> declaration when headers have none.
+_META_SNIFF_BYTES = 4096
+_HEADER_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+_RETRYABLE_STATUSES = {429, 503}
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def _known_encoding(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_charset(content_type: Optional[str], head: bytes) -> str:
+    """
+    Pick the charset for a response body: byte-order mark, then the
+    Content-Type header, then a <meta> declaration, then UTF-8.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    match = _HEADER_CHARSET_RE.search(content_type or "")
+    encoding = _known_encoding(match.group(1)) if match else None
+    if encoding:
+        return encoding
+
+    match = _META_CHARSET_RE.search(head[:_META_SNIFF_BYTES])
+    encoding = _known_encoding(match.group(1).decode("ascii", "ignore")) if match else None
+    return encoding or "utf-8"
+
+
+class FetchResult(BaseModel):
+    url: str
+    status: int
+    headers: Dict[str, str] = {}
+    content: bytes = b""
+    encoding: str = "utf-8"
+    # True when the body was cut off at the byte cap.
+    truncated: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+class FetchStream:
+    """
+    An open response whose body is read incrementally, up to a byte cap.
+    """
+
+    def __init__(self, response: httpx.Response, max_bytes: int):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.received = 0
+        self.truncated = False
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        # Chunks are already gzip/deflate-decoded by httpx.
+        async for chunk in self.response.aiter_bytes():
+            remaining = self.max_bytes - self.received
+            if len(chunk) >= remaining:
+                self.truncated = True
+                if remaining:
+                    self.received += remaining
+                    yield chunk[:remaining]
+                return
+            self.received += len(chunk)
+            yield chunk
+
+    def result(self, content: bytes) -> FetchResult:
+        return FetchResult(
+            url=str(self.response.url),
+            status=self.response.status_code,
+            headers=dict(self.response.headers),
+            content=content,
+            encoding=detect_charset(self.response.headers.get("content-type"), content),
+            truncated=self.truncated,
+        )
+
+
+class PageFetcher:
+    """
+    Async HTTP fetcher shared by browsing tools.
+
+    Behavior:
+    - One pooled `httpx.AsyncClient` per event loop; keep-alive connections
+      are reused per host.
+    - Bodies are streamed and reading stops at `max_bytes` (after gzip/deflate
+      decoding), so large pages cost neither full download time nor memory.
+    - Charset comes from a BOM, the Content-Type header or a <meta> tag.
+    - Requests go through a per-host `HostScheduler` (concurrency cap, token
+      bucket); 429/503 responses pause the host for their Retry-After, or a
+      jittered backoff, and are retried up to `max_retries` times.
+    - With a `deadline`, a pause that would outlast it raises
+      HostThrottledError (carrying the delay) instead of waiting.
+    - 4xx/5xx statuses raise `httpx.HTTPStatusError`; 304 is returned as-is.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = FETCH_MAX_BYTES,
+        timeout: float = FETCH_TIMEOUT_SECONDS,
+        max_connections: int = FETCH_MAX_CONNECTIONS,
+        max_keepalive_connections: int = FETCH_MAX_KEEPALIVE_CONNECTIONS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        scheduler: Optional[HostScheduler] = None,
+        max_retries: int = FETCH_MAX_RETRIES,
+    ):
+        self.max_bytes = max_bytes
+        self.scheduler = scheduler or HostScheduler()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the loop that opened them.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+                transport=self.transport,
+                headers={"User-Agent": FETCH_USER_AGENT, "Accept-Encoding": "gzip, deflate"},
+            )
+            self._loop = loop
+        return self._client
+
+    @contextlib.asynccontextmanager
+    async def open(
+        self,
+        url: str,
+        max_bytes: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[FetchStream]:
+        """
+        Open a streamed GET; leaving the block closes the response without
+        reading the rest of the body. `deadline` is a time.monotonic() value
+        that throttling backoff must not run past.
+        """
+        cap = self.max_bytes if max_bytes is None else max_bytes
+        host = (urlsplit(url).hostname or "").lower()
+        for attempt in itertools.count():
+            async with self.scheduler.slot(host, deadline):
+                async with self._get_client().stream("GET", url, headers=headers) as resp:
+                    if resp.status_code in _RETRYABLE_STATUSES and attempt < self.max_retries:
+                        delay = retry_after_seconds(resp.headers)
+                        delay = backoff_seconds(attempt) if delay is None else delay
+                        self.scheduler.penalize(host, delay)
+                        if deadline is not None and time.monotonic() + delay > deadline:
+                            raise HostThrottledError(host, delay)
+                        continue
+                    # 304 Not Modified is a valid answer to a conditional request.
+                    if resp.status_code >= 400:
+                        resp.raise_for_status()
+                    yield FetchStream(resp, cap)
+                    return
+
+    async def fetch(
+        self,
+        url: str,
+        max_bytes: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+        deadline: Optional[float] = None,
+    ) -> FetchResult:
+        async with self.open(url, max_bytes, headers, deadline) as page:
+            content = b"".join([chunk async for chunk in page.iter_bytes()])
+            return page.result(content)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+FETCHER = PageFetcher()
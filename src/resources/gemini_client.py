@@ -0,0 +1,50 @@
+import os
+from typing import Any, Optional
+
+import httpx
+from google import genai
+
+GEMINI_MODEL = "gemini-2.5-pro"
+
+# Connection pool limits for the shared async client. Every activity running
+# in the worker process multiplexes its Gemini calls over this one pool.
+GEMINI_MAX_CONNECTIONS = int(os.environ.get("GEMINI_MAX_CONNECTIONS", "32"))
+GEMINI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("GEMINI_MAX_KEEPALIVE_CONNECTIONS", "16"))
+
+_client: Optional[genai.Client] = None
+_async_client: Optional[Any] = None
+
+
+def _build_client() -> genai.Client:
+    limits = httpx.Limits(
+        max_connections=GEMINI_MAX_CONNECTIONS,
+        max_keepalive_connections=GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    return genai.Client(
+        http_options=genai.types.HttpOptions(async_client_args={"limits": limits}),
+    )
+
+
+def get_async_client() -> Any:
+    """
+    Return the process-wide async Gemini client (`client.aio`).
+
+    The client is created lazily on first use so that importing tool and
+    activity modules does not require credentials.
+    """
+    global _client, _async_client
+    if _async_client is None:
+        _client = _build_client()
+        _async_client = _client.aio
+    return _async_client
+
+
+def set_async_client(client: Any) -> None:
+    """
+    Replace the shared async client, e.g. with a fake client in benchmarks.
+
+    The replacement only needs to expose `models.generate_content(...)` as a
+    coroutine, mirroring `genai.Client().aio`.
+    """
+    global _async_client
+    _async_client = client
@@ -0,0 +1,176 @@
+import asyncio
+import contextlib
+import email.utils
+import os
+import random
+import time
+from typing import AsyncIterator, Dict, Mapping, Optional
+
+# Per-host politeness defaults for outbound page fetches.
+FETCH_HOST_CONCURRENCY = int(os.environ.get("FETCH_HOST_CONCURRENCY", "4"))
+FETCH_HOST_RATE_PER_SECOND = float(os.environ.get("FETCH_HOST_RATE_PER_SECOND", "2"))
+FETCH_HOST_BURST = int(os.environ.get("FETCH_HOST_BURST", "4"))
+# Backoff after 429/503 responses that carry no Retry-After.
+FETCH_BACKOFF_BASE_SECONDS = float(os.environ.get("FETCH_BACKOFF_BASE_SECONDS", "1"))
+FETCH_BACKOFF_MAX_SECONDS = float(os.environ.get("FETCH_BACKOFF_MAX_SECONDS", "30"))
+# Longest pause applied to a host; longer Retry-After values are clamped.
+FETCH_RETRY_AFTER_MAX_SECONDS = float(os.environ.get("FETCH_RETRY_AFTER_MAX_SECONDS", "60"))
+
+
+def retry_after_seconds(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header given as delta-seconds or an HTTP date.
+    """
+    value = (headers.get("retry-after") or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+def backoff_seconds(attempt: int, base: float = FETCH_BACKOFF_BASE_SECONDS, cap: float = FETCH_BACKOFF_MAX_SECONDS) -> float:
+    # Exponential backoff with "equal jitter": half fixed, half random.
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class HostThrottledError(Exception):
+    """
+    A host asked for a pause that does not fit in the caller's deadline.
+    Retryable: `retry_after` is the pause in seconds.
+    """
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"{host} is throttling requests; retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class _HostState:
+    def __init__(self, concurrency: int, burst: int):
+        self.slots = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.queued = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class HostScheduler:
+    """
+    Per-host politeness for outbound requests, shared by the worker process.
+
+    Behavior:
+    - At most `concurrency` requests in flight per host; further requests
+      queue (FIFO) rather than fail.
+    - Requests start no faster than a token bucket of `rate` per second with
+      `burst` capacity per host.
+    - `penalize` pauses a host, e.g. for a Retry-After or jittered backoff
+      after a 429/503; queued requests wait it out, unless the pause runs
+      past their deadline, in which case they raise HostThrottledError.
+    - `stats` reports queue depth, in-flight count and wait times per host.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = FETCH_HOST_CONCURRENCY,
+        rate: float = FETCH_HOST_RATE_PER_SECOND,
+        burst: int = FETCH_HOST_BURST,
+    ):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self._hosts: Dict[str, _HostState] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _state(self, host: str) -> _HostState:
+        # Semaphores and locks belong to the loop that created them.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._hosts = {}
+            self._loop = loop
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.concurrency, self.burst)
+        return state
+
+    async def _wait_turn(self, host: str, state: _HostState, deadline: Optional[float]) -> None:
+        async with state.lock:
+            while True:
+                now = time.monotonic()
+                if deadline is not None and state.blocked_until > deadline:
+                    raise HostThrottledError(host, state.blocked_until - now)
+                if state.blocked_until > now:
+                    await asyncio.sleep(state.blocked_until - now)
+                    continue
+                if self.rate <= 0:
+                    return
+                state.tokens = min(self.burst, state.tokens + (now - state.refilled_at) * self.rate)
+                state.refilled_at = now
+                if state.tokens >= 1:
+                    state.tokens -= 1
+                    return
+                await asyncio.sleep((1 - state.tokens) / self.rate)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, host: str, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Wait for a request slot on `host` and hold it for the block.
+        `deadline` is a time.monotonic() value the wait must not outlast.
+        """
+        state = self._state(host)
+        if deadline is not None and state.blocked_until > deadline:
+            raise HostThrottledError(host, state.blocked_until - time.monotonic())
+        state.queued += 1
+        queued_at = time.monotonic()
+        try:
+            await state.slots.acquire()
+            try:
+                await self._wait_turn(host, state, deadline)
+            except BaseException:
+                state.slots.release()
+                raise
+        finally:
+            state.queued -= 1
+
+        waited = time.monotonic() - queued_at
+        state.requests += 1
+        state.wait_total += waited
+        state.wait_max = max(state.wait_max, waited)
+        state.in_flight += 1
+        try:
+            yield
+        finally:
+            state.in_flight -= 1
+            state.slots.release()
+
+    def penalize(self, host: str, delay: float) -> None:
+        """
+        Hold new requests to `host` for `delay` seconds.
+        """
+        state = self._state(host)
+        state.throttled += 1
+        state.blocked_until = max(state.blocked_until, time.monotonic() + min(delay, FETCH_RETRY_AFTER_MAX_SECONDS))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            host: {
+                "queued": state.queued,
+                "in_flight": state.in_flight,
+                "requests": state.requests,
+                "throttled": state.throttled,
+                "mean_wait_seconds": round(state.wait_total / state.requests, 3) if state.requests else 0.0,
+                "max_wait_seconds": round(state.wait_max, 3),
+            }
+            for host, state in sorted(self._hosts.items())
+        }
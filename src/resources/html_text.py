@@ -0,0 +1,251 @@
+import codecs
+from html.parser import HTMLParser
+from typing import AsyncIterator, List, Optional
+
+from .fetcher import detect_charset
+
+# Elements whose whole subtree is never main content.
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+}
+# Page chrome that is only boilerplate outside an article or main element.
+CHROME_TAGS = {"header", "footer"}
+CONTENT_TAGS = {"article", "main"}
+# Never boilerplate, whatever their role, id or class say.
+CONTENT_ROOT_TAGS = {"html", "body"} | CONTENT_TAGS
+# Skipped subtrees whose text is never content, not even as a fallback.
+RAW_TEXT_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe"}
+# Elements that end a block of text.
+BLOCK_TAGS = {
+    "p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "dt", "dd", "blockquote",
+    "pre", "td", "th", "tr", "div", "section", "article", "main", "figcaption",
+    "table", "ul", "ol", "dl", "body", "br", "hr",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+_BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog"}
+# Whole id/class tokens that mark chrome; "has-sidebar" or "menu-open" on a
+# wrapper do not match.
+_BOILERPLATE_TOKENS = {
+    "nav", "navbar", "navigation", "menu", "main-menu", "footer", "site-footer",
+    "sidebar", "cookie-banner", "cookie-consent", "cookie-notice", "breadcrumb",
+    "breadcrumbs", "share", "share-buttons", "social", "social-links",
+    "subscribe", "newsletter", "popup", "modal",
+}
+# Short blocks that are mostly link text (menus, tag lists) are dropped.
+_LINK_BLOCK_MAX_CHARS = 120
+_LINK_DENSITY_LIMIT = 0.5
+_FEED_CHARS = 16 * 1024
+
+
+class TextExtractor(HTMLParser):
+    """
+    Incremental HTML-to-text extractor for main page content.
+
+    Behavior:
+    - Drops script, style, navigation, header/footer and similar subtrees,
+      including elements marked as navigation or menus by role or by a
+      whole id/class token. html, body, main and article are never dropped;
+      a main or article inside an element dropped for its attributes ends
+      the skip, since that element wraps the content after all.
+    - Keeps the title, headings and paragraph-like blocks, one per line.
+    - Drops short blocks that are mostly link text.
+    - Falls back to the dropped text when filtering leaves no blocks.
+    - `done` turns true once `max_chars` of text are collected; callers feed
+      chunks until then and stop reading the document.
+    """
+
+    def __init__(self, max_chars: Optional[int] = None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.blocks: List[str] = []
+        self.chars = 0
+        self._skip_tag: Optional[str] = None
+        self._skip_nesting = 0
+        # Whether the skip came from role/id/class rather than the tag.
+        self._skip_by_attrs = False
+        self._raw_depth = 0
+        # Text of dropped subtrees and blocks, used when nothing else is kept.
+        self._fallback: List[str] = []
+        self._fallback_chars = 0
+        self._in_title = False
+        self._title = ""
+        self._block: List[str] = []
+        self._link_chars = 0
+        self._link_depth = 0
+        self._heading = False
+        self._content_depth = 0
+
+    @property
+    def done(self) -> bool:
+        return self.max_chars is not None and self.chars >= self.max_chars
+
+    def _is_boilerplate(self, tag: str, attrs: List[tuple]) -> bool:
+        if tag in CONTENT_ROOT_TAGS:
+            return False
+        if tag in CHROME_TAGS and self._content_depth:
+            return False
+        if tag in SKIP_TAGS:
+            return True
+        return self._boilerplate_attrs(attrs)
+
+    @staticmethod
+    def _boilerplate_attrs(attrs: List[tuple]) -> bool:
+        for name, value in attrs:
+            if not value:
+                continue
+            if name == "role" and value.lower() in _BOILERPLATE_ROLES:
+                return True
+            if name in ("id", "class") and any(token in _BOILERPLATE_TOKENS for token in value.lower().split()):
+                return True
+        return False
+
+    def _keep_fallback(self, text: str) -> None:
+        # Only needed while no block has been kept.
+        if self.blocks or (self.max_chars is not None and self._fallback_chars >= self.max_chars):
+            return
+        self._fallback.append(text)
+        self._fallback_chars += len(text)
+
+    def _flush(self) -> None:
+        text = " ".join("".join(self._block).split())
+        link_chars = self._link_chars
+        heading = self._heading
+        self._block = []
+        self._link_chars = 0
+        self._heading = False
+        if not text or self.done:
+            return
+        if not heading and len(text) <= _LINK_BLOCK_MAX_CHARS and link_chars > _LINK_DENSITY_LIMIT * len(text):
+            self._keep_fallback(text)
+            return
+        self.blocks.append(text)
+        self.chars += len(text) + 1
+
+    def handle_starttag(self, tag: str, attrs: List[tuple]) -> None:
+        if self._skip_tag is not None:
+            if tag in CONTENT_TAGS and self._skip_by_attrs and not self._raw_depth:
+                # The skipped element wraps the main content; stop skipping.
+                self._skip_tag = None
+            else:
+                if tag == self._skip_tag:
+                    self._skip_nesting += 1
+                if tag in RAW_TEXT_TAGS and tag not in VOID_TAGS:
+                    self._raw_depth += 1
+                return
+        if tag == "title":
+            self._in_title = True
+            return
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS:
+                self._flush()
+            return
+        if self._is_boilerplate(tag, attrs):
+            self._flush()
+            self._skip_tag = tag
+            self._skip_nesting = 1
+            self._skip_by_attrs = tag not in SKIP_TAGS
+            self._raw_depth = 1 if tag in RAW_TEXT_TAGS else 0
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in CONTENT_TAGS:
+            self._content_depth += 1
+        if tag in HEADING_TAGS:
+            self._heading = True
+        elif tag == "a":
+            self._link_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_tag is not None:
+            if tag in RAW_TEXT_TAGS:
+                self._raw_depth = max(0, self._raw_depth - 1)
+            if tag == self._skip_tag:
+                self._skip_nesting -= 1
+                if self._skip_nesting == 0:
+                    self._skip_tag = None
+                    self._raw_depth = 0
+            return
+        if tag == "title":
+            self._in_title = False
+            return
+        if tag == "a":
+            self._link_depth = max(0, self._link_depth - 1)
+            return
+        if tag in CONTENT_TAGS:
+            self._content_depth = max(0, self._content_depth - 1)
+        if tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self._title += data
+            return
+        if self._skip_tag is not None:
+            if not self._raw_depth:
+                self._keep_fallback(data)
+            return
+        if self.done:
+            return
+        self._block.append(data)
+        if self._link_depth:
+            self._link_chars += len(data.strip())
+
+    def text(self) -> str:
+        self._flush()
+        title = " ".join(self._title.split())
+        blocks = self.blocks
+        if not blocks and self._fallback:
+            # Filtering dropped everything; unfiltered text beats none.
+            fallback = " ".join(" ".join(self._fallback).split())
+            blocks = [fallback] if fallback else []
+        if title and (not blocks or blocks[0] != title):
+            blocks = [title] + blocks
+        text = "\n".join(blocks)
+        return text[:self.max_chars] if self.max_chars is not None else text
+
+
+def extract_text(html: str, max_chars: Optional[int] = None) -> str:
+    """
+    Main-content text of an HTML document, up to `max_chars`.
+    """
+    extractor = TextExtractor(max_chars)
+    # Fed in chunks, like a stream, so parsing stops once enough text is in.
+    for start in range(0, len(html), _FEED_CHARS):
+        extractor.feed(html[start:start + _FEED_CHARS])
+        if extractor.done:
+            return extractor.text()
+    extractor.close()
+    return extractor.text()
+
+
+async def extract_text_stream(
+    chunks: AsyncIterator[bytes],
+    content_type: Optional[str] = None,
+    max_chars: Optional[int] = None,
+) -> str:
+    """
+    Extract main-content text from a byte stream, stopping as soon as
+    `max_chars` of text are collected. The charset is detected from
+    `content_type` or the first chunk.
+    """
+    extractor = TextExtractor(max_chars)
+    decoder = None
+    try:
+        async for chunk in chunks:
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(detect_charset(content_type, chunk))(errors="replace")
+            extractor.feed(decoder.decode(chunk))
+            if extractor.done:
+                break
+        else:
+            if decoder is not None:
+                extractor.feed(decoder.decode(b"", final=True))
+            extractor.close()
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    return extractor.text()
@@ -0,0 +1,22 @@
+import hashlib
+import json
+from typing import Any, Dict
+
+
+def encode_block(message: Dict[str, Any]) -> bytes:
+    """
+    Canonical byte encoding of a provider message, used for content addressing.
+    """
+    return json.dumps(message, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode_block(data: bytes) -> Dict[str, Any]:
+    return json.loads(data.decode("utf-8"))
+
+
+def block_digest(message: Dict[str, Any]) -> str:
+    """
+    SHA-256 digest of a message block. Pure and deterministic, so it is safe
+    to compute inside workflow code.
+    """
+    return hashlib.sha256(encode_block(message)).hexdigest()
@@ -1,22 +1,196 @@
 # myprompts/history.py
 
-from pydantic import BaseModel
-from typing import List
+from enum import Enum
+from pydantic import BaseModel, PrivateAttr
+from typing import Any, Dict, List, Optional
+from .blocks import block_digest
 from .models import BasePrompt
-from .assembly import PromptAssembly
 from .provider import LLMProvider
 
+# Rough characters-per-token ratio used for budgeting. Deliberately a pure
+# heuristic so compaction stays deterministic inside workflow code.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def summarize_text(text: str, max_chars: int) -> str:
+    """
+    Collapse whitespace and cut `text` to at most `max_chars` characters.
+    """
+    collapsed = " ".join(text.split())
+    if len(collapsed) <= max_chars:
+        return collapsed
+    return collapsed[: max(0, max_chars - 3)].rstrip() + "..."
+
+
+class EntryKind(str, Enum):
+    MESSAGE = "message"
+    TOOL = "tool"
+    PLANNING = "planning"
+
 
 class HistoryEntry(BaseModel):
     prompt: BasePrompt
+    kind: EntryKind = EntryKind.MESSAGE
+    # Pinned entries (system, task, plan) are never compacted.
+    pinned: bool = False
+    # Optional caller-provided summary used when the entry is compacted.
+    summary: Optional[str] = None
+    compacted: bool = False
+
+
+class CompactionReport(BaseModel):
+    tokens_before: int
+    tokens_after: int
+    tokens_saved: int
+    entries_compacted: int = 0
+    entries_dropped: int = 0
 
 
 class PromptHistory(BaseModel):
     entries: List[HistoryEntry] = []
 
-    def add(self, prompt: BasePrompt):
-        self.entries.append(HistoryEntry(prompt=prompt))
+    # Compaction settings; no compaction happens while token_budget is None.
+    token_budget: Optional[int] = None
+    keep_recent: int = 6
+    tool_summary_chars: int = 400
+    planning_summary_chars: int = 200
+
+    # Provider-specific messages assembled so far, and how many entries they cover.
+    _message_cache: Dict[LLMProvider, List[Dict[str, Any]]] = PrivateAttr(default_factory=dict)
+    _assembled_entries: Dict[LLMProvider, int] = PrivateAttr(default_factory=dict)
+    _digest_cache: Dict[LLMProvider, List[str]] = PrivateAttr(default_factory=dict)
+    _cached_entries_id: Optional[int] = PrivateAttr(default=None)
+
+    def _invalidate(self):
+        self._message_cache.clear()
+        self._assembled_entries.clear()
+        self._digest_cache.clear()
+        self._cached_entries_id = None
+
+    def add(
+        self,
+        prompt: BasePrompt,
+        kind: EntryKind = EntryKind.MESSAGE,
+        pinned: bool = False,
+        summary: Optional[str] = None,
+    ):
+        self.entries.append(HistoryEntry(prompt=prompt, kind=kind, pinned=pinned, summary=summary))
+
+    def replace(self, index: int, prompt: BasePrompt):
+        """
+        Replace the prompt of an existing entry, keeping its kind and flags.
+        """
+        self.entries[index].prompt = prompt
+        self.entries[index].compacted = False
+        self._invalidate()
+
+    def estimate_tokens(self) -> int:
+        return sum(estimate_tokens(entry.prompt.text) for entry in self.entries)
+
+    def compact(self, token_budget: Optional[int] = None) -> CompactionReport:
+        """
+        Shrink the history until its estimated size fits the token budget.
+
+        Behavior:
+        - Pinned entries and the `keep_recent` newest entries are never touched.
+        - Older tool outputs and planning exchanges are replaced, oldest first,
+          by their summary (or a truncated copy of their text).
+        - If that is not enough, compacted planning entries are dropped,
+          since later planning updates restate the facts and plan.
+        - Stops as soon as the history fits; the budget may still be exceeded
+          when pinned and recent entries alone are larger than it.
+        """
+        budget = token_budget if token_budget is not None else self.token_budget
+        before = self.estimate_tokens()
+        if budget is None or before <= budget:
+            return CompactionReport(tokens_before=before, tokens_after=before, tokens_saved=0)
+
+        total = before
+        window_start = max(0, len(self.entries) - self.keep_recent)
+        compacted = 0
+
+        # Pass 1: replace old tool outputs and planning messages with summaries.
+        for entry in self.entries[:window_start]:
+            if total <= budget:
+                break
+            if entry.pinned or entry.compacted or entry.kind == EntryKind.MESSAGE:
+                continue
+
+            if entry.kind == EntryKind.TOOL:
+                label, max_chars = "Compacted tool output", self.tool_summary_chars
+            else:
+                label, max_chars = "Compacted planning update", self.planning_summary_chars
+            summary = summarize_text(entry.summary or entry.prompt.text, max_chars)
+            text = f"[{label}] {summary}"
+            if len(text) >= len(entry.prompt.text):
+                continue
+
+            total += estimate_tokens(text) - estimate_tokens(entry.prompt.text)
+            entry.prompt = BasePrompt(role=entry.prompt.role, text=text)
+            entry.compacted = True
+            compacted += 1
+            self._invalidate()
+
+        # Pass 2: drop compacted planning entries outside the recent window.
+        dropped = 0
+        if total > budget:
+            kept: List[HistoryEntry] = []
+            for index, entry in enumerate(self.entries):
+                if (
+                    total > budget
+                    and index < window_start
+                    and entry.compacted
+                    and entry.kind == EntryKind.PLANNING
+                ):
+                    total -= estimate_tokens(entry.prompt.text)
+                    dropped += 1
+                    continue
+                kept.append(entry)
+            self.entries = kept
+            self._invalidate()
+
+        return CompactionReport(
+            tokens_before=before,
+            tokens_after=total,
+            tokens_saved=before - total,
+            entries_compacted=compacted,
+            entries_dropped=dropped,
+        )
+
+    def to_messages(self, provider: LLMProvider) -> List[Dict[str, Any]]:
+        """
+        Return provider-specific messages for the whole history.
+
+        Messages are cached per provider: only entries appended since the last
+        call are converted, and an unchanged history returns the cached list
+        as-is. Compaction and `replace` invalidate the cache. The returned list
+        is shared with the cache, so treat it as read-only.
+        """
+        assembled = self._assembled_entries.get(provider, 0)
+        # Rebuild if `entries` was reassigned or shrunk behind our back.
+        if self._cached_entries_id != id(self.entries) or assembled > len(self.entries):
+            self._invalidate()
+            self._cached_entries_id = id(self.entries)
+            assembled = 0
+
+        messages = self._message_cache.setdefault(provider, [])
+        for entry in self.entries[assembled:]:
+            messages.extend(entry.prompt.to_messages(provider=provider))
+        self._assembled_entries[provider] = len(self.entries)
+        return messages
+
+    def to_message_digests(self, provider: LLMProvider) -> List[str]:
+        """
+        Return the content digest of every message from `to_messages`, in order.
 
-    def to_messages(self, provider: LLMProvider):
-        prompts = [entry.prompt for entry in self.entries]
-        return PromptAssembly(prompts=prompts).build(provider=provider)
+        Digests are cached alongside the messages, so only new messages are hashed.
+        """
+        messages = self.to_messages(provider)
+        digests = self._digest_cache.setdefault(provider, [])
+        for message in messages[len(digests):]:
+            digests.append(block_digest(message))
+        return digests
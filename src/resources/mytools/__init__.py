@@ -1,4 +1,4 @@
-from .registry import register_tool, TOOL_REGISTRY, DISPATCH_TABLE
+from .registry import register_tool, is_failed_result, TOOL_REGISTRY, DISPATCH_TABLE, TOOL_POLICIES, ToolPolicy
 from .schemas import build_gemini_schema
 
 # Ensure tool modules are imported so decorators run and
@@ -8,4 +8,9 @@ from .. import company_research_tools as _company_tools  # noqa: F401
 
 # Backwards-compatible aliases used by workflow activities
 TOOL_DISPATCH = DISPATCH_TABLE
+# Tools declared @tool(idempotent=False); workflows never memoize or
+# speculatively run them.
+NON_IDEMPOTENT_TOOLS = frozenset(name for name, policy in TOOL_POLICIES.items() if not policy.idempotent)
 TOOL_SCHEMAS = [build_gemini_schema()]
+
+from .executor import TOOL_EXECUTOR  # noqa: E402
@@ -1,6 +1,23 @@
-from .registry import register_tool
+from typing import Optional
 
-def tool(func):
-    """Decorator that registers a tool function."""
-    register_tool(func)
-    return func
+from .registry import ToolPolicy, register_tool
+
+
+def tool(func=None, *, executor: Optional[str] = None, max_concurrency: Optional[int] = None,
+         timeout_seconds: float = 30.0, idempotent: bool = True):
+    """
+    Decorator that registers a tool function, optionally with its execution
+    policy: `@tool` or `@tool(executor="thread", timeout_seconds=10)`.
+    """
+    policy = ToolPolicy(
+        executor=executor,
+        max_concurrency=max_concurrency,
+        timeout_seconds=timeout_seconds,
+        idempotent=idempotent,
+    )
+
+    def register(fn):
+        register_tool(fn, policy)
+        return fn
+
+    return register(func) if func is not None else register
@@ -0,0 +1,220 @@
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import typing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+from .registry import DISPATCH_TABLE, TOOL_POLICIES, ToolPolicy
+
+logger = logging.getLogger(__name__)
+
+# Pool sizes shared by every tool declared with executor="thread" / "process".
+TOOL_THREAD_WORKERS = int(os.environ.get("TOOL_THREAD_WORKERS", "16"))
+TOOL_PROCESS_WORKERS = int(os.environ.get("TOOL_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def invoke_tool(fn, args: Dict[str, Any]) -> Any:
+    """
+    Invoke a registered tool function, supporting either:
+    - A single Pydantic model argument
+    - Standard kwargs
+
+    For `async def` tools the returned coroutine must be awaited by the caller.
+    """
+    sig = inspect.signature(fn)
+    params = list(sig.parameters.values())
+
+    if len(params) == 1:
+        param = params[0]
+        hints = typing.get_type_hints(fn)
+        annotation = hints.get(param.name)
+
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            model_cls = annotation
+            return fn(model_cls(**args))
+
+    return fn(**args)
+
+
+def _run_blocking(name: str, args: Dict[str, Any]) -> str:
+    # Runs in a pool thread or process; async tools get their own loop there.
+    result = invoke_tool(DISPATCH_TABLE[name], args)
+    if inspect.isawaitable(result):
+        result = asyncio.run(result)
+    return str(result)
+
+
+class _ToolStats:
+    def __init__(self):
+        self.queued = 0
+        self.running = 0
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        # Timed-out or cancelled pool calls whose worker is still busy.
+        self.overrunning = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+
+class ToolExecutor:
+    """
+    Runs registered tools according to their ToolPolicy.
+
+    Behavior:
+    - "async" tools run on the event loop; "thread" and "process" tools run
+      in shared pools (processes are spawned, and import the tool registry).
+    - Calls beyond a tool's `max_concurrency` queue per worker process.
+    - Each call is limited to the tool's `timeout_seconds` and raises
+      asyncio.TimeoutError past it. A pool thread or process cannot be
+      interrupted, so a timed-out (or cancelled) pool call keeps its
+      concurrency slot and counts as running, and as overrunning, until its
+      worker finishes; `max_concurrency` holds across timeouts.
+    - `stats` reports queue depth, running and overrunning calls, errors,
+      timeouts and queue/run times per tool.
+    """
+
+    def __init__(self, thread_workers: int = TOOL_THREAD_WORKERS, process_workers: int = TOOL_PROCESS_WORKERS):
+        self.thread_workers = max(1, thread_workers)
+        self.process_workers = max(1, process_workers)
+        self._stats: Dict[str, _ToolStats] = {}
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._threads: Optional[Executor] = None
+        self._processes: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def policy(self, name: str) -> ToolPolicy:
+        return TOOL_POLICIES.get(name) or ToolPolicy(executor="async")
+
+    def _limit(self, name: str, policy: ToolPolicy) -> Optional[asyncio.Semaphore]:
+        if not policy.max_concurrency:
+            return None
+        # Semaphores belong to the loop that created them.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._limits = {}
+            self._loop = loop
+        limit = self._limits.get(name)
+        if limit is None:
+            limit = self._limits[name] = asyncio.Semaphore(policy.max_concurrency)
+        return limit
+
+    def _pool(self, kind: str) -> Executor:
+        with self._lock:
+            if kind == "process":
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(
+                        max_workers=self.process_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                return self._processes
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="tool")
+            return self._threads
+
+    async def _run_async(self, name: str, args: Dict[str, Any]) -> str:
+        result = invoke_tool(DISPATCH_TABLE[name], args)
+        if inspect.isawaitable(result):
+            result = await result
+        return str(result)
+
+    @staticmethod
+    def _release(stats: _ToolStats, limit: Optional[asyncio.Semaphore]) -> None:
+        stats.running -= 1
+        if limit is not None:
+            limit.release()
+
+    def _release_when_done(self, future: asyncio.Future, stats: _ToolStats, limit: Optional[asyncio.Semaphore]) -> None:
+        stats.overrunning += 1
+
+        def finished(done: asyncio.Future) -> None:
+            if not done.cancelled():
+                done.exception()  # Retrieved, so a late failure is not logged as unhandled.
+            stats.overrunning -= 1
+            self._release(stats, limit)
+
+        future.add_done_callback(finished)
+
+    async def run(self, name: str, args: Dict[str, Any]) -> str:
+        """
+        Run tool `name` with `args` under its policy and return its result as text.
+        """
+        if name not in DISPATCH_TABLE:
+            raise KeyError(f"Unknown tool: {name}")
+        policy = self.policy(name)
+        stats = self._stats.setdefault(name, _ToolStats())
+        limit = self._limit(name, policy)
+
+        stats.queued += 1
+        queued_at = time.monotonic()
+        try:
+            if limit is not None:
+                await limit.acquire()
+        finally:
+            stats.queued -= 1
+
+        started_at = time.monotonic()
+        waited = started_at - queued_at
+        stats.calls += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+        stats.running += 1
+        future: Optional[asyncio.Future] = None
+        try:
+            if policy.executor in ("thread", "process"):
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._pool(policy.executor), _run_blocking, name, args)
+                # Shielded: a timeout must not detach the slot from the still-busy worker.
+                return await asyncio.wait_for(asyncio.shield(future), policy.timeout_seconds)
+            return await asyncio.wait_for(self._run_async(name, args), policy.timeout_seconds)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            raise
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - started_at
+            stats.run_total += elapsed
+            stats.run_max = max(stats.run_max, elapsed)
+            if future is not None and not future.done():
+                self._release_when_done(future, stats, limit)
+            else:
+                self._release(stats, limit)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "queued": stats.queued,
+                "running": stats.running,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "timeouts": stats.timeouts,
+                "overrunning": stats.overrunning,
+                "mean_wait_seconds": round(stats.wait_total / stats.calls, 3) if stats.calls else 0.0,
+                "max_wait_seconds": round(stats.wait_max, 3),
+                "mean_run_seconds": round(stats.run_total / stats.calls, 3) if stats.calls else 0.0,
+                "max_run_seconds": round(stats.run_max, 3),
+            }
+            for name, stats in sorted(self._stats.items())
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pools, self._threads, self._processes = (self._threads, self._processes), None, None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+TOOL_EXECUTOR = ToolExecutor()
@@ -1,9 +1,59 @@
 import inspect
-from typing import get_type_hints, get_origin, get_args
+import json
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, get_type_hints, get_origin, get_args
 from pydantic import BaseModel
 
 TOOL_REGISTRY = []
 DISPATCH_TABLE = {}
+TOOL_POLICIES: Dict[str, "ToolPolicy"] = {}
+
+EXECUTOR_KINDS = ("async", "thread", "process")
+
+
+@dataclass(frozen=True)
+class ToolPolicy:
+    """
+    How the worker runs a tool.
+
+    - executor: "async" runs on the worker's event loop (coroutines, or
+      trivial sync functions); "thread" and "process" run in pools so
+      blocking or CPU-bound work never stalls the loop. None picks "async"
+      for `async def` tools and "thread" otherwise.
+    - max_concurrency: calls of this tool running at once per worker; more
+      calls queue. None means unlimited.
+    - timeout_seconds: limit for one attempt.
+    - idempotent: False marks tools with side effects; their results are
+      never cached or memoized by the workflow, they are never run
+      speculatively, and failures are not retried.
+    """
+
+    executor: Optional[str] = None
+    max_concurrency: Optional[int] = None
+    timeout_seconds: float = 30.0
+    idempotent: bool = True
+
+    def __post_init__(self):
+        if self.executor is not None and self.executor not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown tool executor: {self.executor}")
+
+def is_failed_result(result: str) -> bool:
+    """
+    Whether a tool's JSON result reports a failure: a non-empty `error`
+    field at the top level or in any entry of `results`. Such results are
+    never reused for a repeated call, since the call may succeed next time.
+    """
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return False
+    if not isinstance(data, dict):
+        return False
+    if data.get("error"):
+        return True
+    entries = data.get("results")
+    return isinstance(entries, list) and any(isinstance(entry, dict) and entry.get("error") for entry in entries)
+
 
 def build_schema_from_pydantic_model(model: type[BaseModel]):
     """Return JSON schema for Gemini from a Pydantic model."""
@@ -96,9 +146,14 @@ def build_schema_from_function(func):
     }
 
 
-def register_tool(func):
+def register_tool(func, policy: Optional[ToolPolicy] = None):
     """Register a tool and build schema."""
     schema = build_schema_from_function(func)
     TOOL_REGISTRY.append(schema)
     DISPATCH_TABLE[func.__name__] = func
+
+    policy = policy or ToolPolicy()
+    if policy.executor is None:
+        policy = replace(policy, executor="async" if inspect.iscoroutinefunction(func) else "thread")
+    TOOL_POLICIES[func.__name__] = policy
     return func
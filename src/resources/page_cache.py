@@ -0,0 +1,195 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+from urllib.parse import urldefrag
+
+from pydantic import BaseModel
+
+from .storage import CACHE_DIR, open_sqlite
+
+logger = logging.getLogger(__name__)
+
+PAGE_CACHE_PATH = Path(os.environ.get("PAGE_CACHE_PATH", CACHE_DIR / "pages.sqlite3"))
+# Total size of cached page text; least-recently-used pages are evicted beyond it.
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("PAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Freshness when the response carries no usable Cache-Control max-age.
+PAGE_CACHE_DEFAULT_TTL_SECONDS = int(os.environ.get("PAGE_CACHE_DEFAULT_TTL_SECONDS", str(6 * 60 * 60)))
+# Upper bound on server-declared freshness.
+PAGE_CACHE_MAX_TTL_SECONDS = int(os.environ.get("PAGE_CACHE_MAX_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*(?:s-)?max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access);
+"""
+
+
+def page_key(url: str) -> str:
+    # Fragments never reach the server, so they do not distinguish pages.
+    return urldefrag(url.strip())[0]
+
+
+def freshness_seconds(headers: Mapping[str, str], default: float = PAGE_CACHE_DEFAULT_TTL_SECONDS) -> Optional[float]:
+    """
+    Seconds a response may be served without revalidation, from its
+    Cache-Control header. None means it must not be stored.
+    """
+    cache_control = headers.get("cache-control", "")
+    directives = cache_control.lower()
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    match = _MAX_AGE_RE.search(cache_control)
+    if match:
+        return min(float(match.group(1)), PAGE_CACHE_MAX_TTL_SECONDS)
+    return default
+
+
+class CachedPage(BaseModel):
+    url: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Persistent cache of extracted page text, backed by SQLite.
+
+    Behavior:
+    - Keyed by URL (without fragment); stores the extracted text with the
+      ETag and Last-Modified validators of the response it came from.
+    - Fresh entries are served as-is; stale ones are kept so callers can
+      revalidate them with a conditional request and `refresh` on 304.
+    - Total text size is bounded by `max_bytes`, evicting least-recently-used
+      pages first.
+    - Storage errors are logged and treated as misses.
+    """
+
+    def __init__(self, path: Path = PAGE_CACHE_PATH, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.stats: Counter = Counter()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily so importing this module never touches the disk.
+        if self._conn is None:
+            self._conn = open_sqlite(self.path)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        key = page_key(url)
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT text, etag, last_modified, expires_at FROM pages WHERE url = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), key))
+        except sqlite3.Error as exc:
+            logger.warning("Page cache read failed for %s: %s", key, exc)
+            return None
+        if row is None:
+            return None
+        return CachedPage(url=key, text=row[0], etag=row[1], last_modified=row[2], expires_at=row[3])
+
+    def put(self, url: str, text: str, headers: Mapping[str, str]) -> None:
+        ttl = freshness_seconds(headers)
+        if ttl is None:
+            return
+
+        key = page_key(url)
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO pages "
+                        "(url, text, etag, last_modified, fetched_at, expires_at, last_access, size) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, text, headers.get("etag"), headers.get("last-modified"), now, now + ttl, now, size),
+                    )
+                    self._evict(conn)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as exc:
+            logger.warning("Page cache write failed for %s: %s", key, exc)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for url, size in conn.execute("SELECT url, size FROM pages ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        self.stats["evictions"] += evicted
+
+    def refresh(self, url: str, headers: Mapping[str, str]) -> None:
+        """
+        Extend a revalidated (304 Not Modified) entry, picking up new validators.
+        """
+        ttl = freshness_seconds(headers)
+        key = page_key(url)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                if ttl is None:
+                    conn.execute("DELETE FROM pages WHERE url = ?", (key,))
+                    return
+                conn.execute(
+                    "UPDATE pages SET expires_at = ?, last_access = ?, "
+                    "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                    (now + ttl, now, headers.get("etag"), headers.get("last-modified"), key),
+                )
+        except sqlite3.Error as exc:
+            logger.warning("Page cache refresh failed for %s: %s", key, exc)
+
+
+PAGE_CACHE = PageCache()
@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from google import genai
+
+from .gemini_client import get_async_client
+
+logger = logging.getLogger(__name__)
+
+PREFIX_CACHE_ENABLED = os.environ.get("GEMINI_PREFIX_CACHE", "1").lower() not in ("0", "false", "no", "")
+PREFIX_CACHE_TTL_SECONDS = int(os.environ.get("GEMINI_PREFIX_CACHE_TTL_SECONDS", "3600"))
+# Extend a cache's TTL once it is this close to expiring.
+PREFIX_CACHE_REFRESH_MARGIN_SECONDS = int(os.environ.get("GEMINI_PREFIX_CACHE_REFRESH_MARGIN_SECONDS", "300"))
+# After a failed create, send the full prefix for this long before trying again.
+PREFIX_CACHE_RETRY_AFTER_SECONDS = int(os.environ.get("GEMINI_PREFIX_CACHE_RETRY_AFTER_SECONDS", "600"))
+# Explicit caching rejects prefixes below the model's minimum (4096 tokens for
+# gemini-2.5-pro); skip the API call below this estimate. The agent's own
+# system instruction and tool declarations come to roughly 2k tokens, so in
+# production they are sent in full (`python -m benchmarks.prefix_cache`
+# prints the current estimate).
+PREFIX_CACHE_MIN_TOKENS = int(os.environ.get("GEMINI_PREFIX_CACHE_MIN_TOKENS", "4096"))
+
+
+def prefix_key(model: str, system_instruction: str, tools: List[Any]) -> str:
+    """
+    Hash of the static request prefix: model, system instruction and tool declarations.
+    """
+    payload = json.dumps(
+        {"model": model, "system_instruction": system_instruction, "tools": tools},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_prefix_tokens(system_instruction: str, tools: List[Any]) -> int:
+    # Rough chars/4 estimate, matching PromptHistory's budgeting heuristic.
+    return len(json.dumps([system_instruction, tools], default=str)) // 4
+
+
+def is_stale_cache_error(exc: BaseException, name: str) -> bool:
+    """
+    Whether a failed request points at cached context `name` being gone:
+    a 403/404, or an error message naming the cached content. Other client
+    errors (bad request, payload too large) would fail uncached as well.
+    """
+    if getattr(exc, "code", None) in (403, 404):
+        return True
+    message = str(exc).lower()
+    return name.lower() in message or "cachedcontent" in message or "cached content" in message
+
+
+class _CachedPrefix:
+    def __init__(self, name: str, expires_at: float):
+        self.name = name
+        self.expires_at = expires_at
+
+
+class PrefixCacheManager:
+    """
+    Create and reuse provider-side cached contexts for static request prefixes.
+
+    Behavior:
+    - One cached context per prefix hash, created on first use with a TTL.
+    - The TTL is extended when a cache is within the refresh margin of expiring.
+    - Returns None (send the full prefix) when caching is disabled, the prefix
+      is too small to cache, or creation failed recently.
+    - `invalidate` forgets a cache the provider no longer recognizes.
+    - `stats` counts hits, creates, refreshes and fallbacks.
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any] = get_async_client,
+        enabled: bool = PREFIX_CACHE_ENABLED,
+        ttl_seconds: int = PREFIX_CACHE_TTL_SECONDS,
+        refresh_margin_seconds: int = PREFIX_CACHE_REFRESH_MARGIN_SECONDS,
+        retry_after_seconds: int = PREFIX_CACHE_RETRY_AFTER_SECONDS,
+        min_tokens: int = PREFIX_CACHE_MIN_TOKENS,
+    ):
+        self.client_getter = client_getter
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.min_tokens = min_tokens
+        self.stats: Counter = Counter()
+        self._entries: Dict[str, _CachedPrefix] = {}
+        self._unavailable_until: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def cached_content(self, model: str, system_instruction: str, tools: List[Any]) -> Optional[str]:
+        """
+        Return the cached context name for this prefix, or None to send it in full.
+        """
+        if not self.enabled:
+            return None
+
+        key = prefix_key(model, system_instruction, tools)
+        if self._unavailable_until.get(key, 0) > time.time():
+            self.stats["fallbacks"] += 1
+            return None
+
+        estimated_tokens = estimate_prefix_tokens(system_instruction, tools)
+        if estimated_tokens < self.min_tokens:
+            self._unavailable_until[key] = float("inf")
+            self.stats["fallbacks"] += 1
+            logger.info("Prefix of ~%d tokens is below the caching minimum; sending it in full.", estimated_tokens)
+            return None
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            client = self.client_getter()
+            now = time.time()
+            entry = self._entries.get(key)
+
+            if entry is not None and entry.expires_at - now > self.refresh_margin_seconds:
+                self.stats["hits"] += 1
+                return entry.name
+
+            if entry is not None and entry.expires_at > now:
+                try:
+                    await client.caches.update(
+                        name=entry.name,
+                        config=genai.types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+                    )
+                    entry.expires_at = now + self.ttl_seconds
+                    self.stats["refreshes"] += 1
+                    return entry.name
+                except Exception as exc:
+                    logger.warning("Refreshing cached prefix %s failed (%s); recreating it.", entry.name, exc)
+                    self._entries.pop(key, None)
+
+            try:
+                cache = await client.caches.create(
+                    model=model,
+                    config=genai.types.CreateCachedContentConfig(
+                        system_instruction=system_instruction,
+                        tools=tools,
+                        ttl=f"{self.ttl_seconds}s",
+                        display_name=f"agent-prefix-{key[:12]}",
+                    ),
+                )
+            except Exception as exc:
+                logger.warning("Prefix caching unavailable (%s); sending the full prefix.", exc)
+                self._unavailable_until[key] = now + self.retry_after_seconds
+                self.stats["fallbacks"] += 1
+                return None
+
+            self._entries[key] = _CachedPrefix(name=cache.name, expires_at=now + self.ttl_seconds)
+            self.stats["creates"] += 1
+            return cache.name
+
+    def invalidate(self, name: str) -> None:
+        for key, entry in list(self._entries.items()):
+            if entry.name == name:
+                del self._entries[key]
+
+
+PREFIX_CACHE = PrefixCacheManager()
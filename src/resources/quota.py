@@ -0,0 +1,343 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .custom_types.types import CallPriority
+
+logger = logging.getLogger(__name__)
+
+# Gemini quota for this worker process, in requests and tokens per minute.
+GEMINI_RPM = float(os.environ.get("GEMINI_RPM", "150"))
+GEMINI_TPM = float(os.environ.get("GEMINI_TPM", "2000000"))
+# Bounds and starting point of the adaptive concurrency limit. It starts at
+# the maximum (the worker's activity slots) and backs off on 429s or slow calls.
+GEMINI_MIN_CONCURRENCY = int(os.environ.get("GEMINI_MIN_CONCURRENCY", "1"))
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "32"))
+GEMINI_INITIAL_CONCURRENCY = int(os.environ.get("GEMINI_INITIAL_CONCURRENCY", str(GEMINI_MAX_CONCURRENCY)))
+# Calls slower than this shrink the concurrency limit.
+GEMINI_LATENCY_TARGET_SECONDS = float(os.environ.get("GEMINI_LATENCY_TARGET_SECONDS", "45"))
+# Pause after a 429 that carries no retry delay.
+GEMINI_THROTTLE_PAUSE_SECONDS = float(os.environ.get("GEMINI_THROTTLE_PAUSE_SECONDS", "10"))
+# Output tokens assumed per call when reserving token quota up front.
+GEMINI_OUTPUT_TOKENS_ESTIMATE = int(os.environ.get("GEMINI_OUTPUT_TOKENS_ESTIMATE", "1024"))
+
+_DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)s\s*$")
+
+
+class QuotaExceededError(Exception):
+    """
+    Raised when Gemini answered 429 RESOURCE_EXHAUSTED, or when a call could
+    not be admitted before its deadline. `retry_after` is the pause the
+    governor applied, or the expected wait for quota, in seconds.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Gemini quota exceeded; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    # genai.errors.ClientError (and test fakes) carry the HTTP status as `code`.
+    return getattr(exc, "code", None) == 429
+
+
+def retry_delay_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Retry delay suggested by a 429: the RetryInfo detail of the error body,
+    else the response's Retry-After header.
+    """
+    details = getattr(exc, "details", None)
+    error = details.get("error", details) if isinstance(details, dict) else None
+    for detail in (error or {}).get("details", []) if isinstance(error, dict) else []:
+        if isinstance(detail, dict) and str(detail.get("@type", "")).endswith("RetryInfo"):
+            match = _DURATION_RE.match(str(detail.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    value = str(headers.get("retry-after", "")).strip()
+    return float(value) if value.replace(".", "", 1).isdigit() else None
+
+
+def estimate_tokens(*texts: Any) -> int:
+    # Roughly four characters per token, plus room for the response.
+    return sum(len(str(text)) for text in texts if text) // 4 + GEMINI_OUTPUT_TOKENS_ESTIMATE
+
+
+class _Bucket:
+    # Token bucket refilled at `per_minute`, holding `burst_seconds` of quota.
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def seconds_until(self, amount: float) -> float:
+        return max(0.0, (amount - self.level) / self.rate) if self.rate > 0 else float("inf")
+
+
+class Reservation:
+    """
+    Quota held by one call; set `tokens_used` from the response's usage
+    metadata so the token bucket is charged the real amount.
+    """
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.tokens_used: Optional[int] = None
+
+
+class QuotaGovernor:
+    """
+    Worker-wide admission control for Gemini calls.
+
+    Behavior:
+    - A call starts only when the requests-per-minute and tokens-per-minute
+      buckets both have room and fewer than `limit` calls are in flight.
+    - Waiting calls start in priority order (CallPriority: final report,
+      then agent steps, then tool calls), FIFO within a priority.
+    - The concurrency limit adapts (AIMD): +1/limit per fast success,
+      halved on a 429, shrunk 10% when a call exceeds the latency target;
+      decreases are spaced at least one call latency apart.
+    - A 429 also pauses admission for its RetryInfo delay (or
+      `throttle_pause`) and is re-raised as QuotaExceededError.
+    - A call with a deadline raises QuotaExceededError, carrying the
+      expected wait, as soon as it is known not to start in time: it
+      must be admitted one average call latency before the deadline.
+    - `stats` reports the limit, queue depth per priority, bucket levels,
+      throttles and wait times.
+    """
+
+    def __init__(
+        self,
+        rpm: float = GEMINI_RPM,
+        tpm: float = GEMINI_TPM,
+        min_concurrency: int = GEMINI_MIN_CONCURRENCY,
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        initial_concurrency: int = GEMINI_INITIAL_CONCURRENCY,
+        latency_target: float = GEMINI_LATENCY_TARGET_SECONDS,
+        throttle_pause: float = GEMINI_THROTTLE_PAUSE_SECONDS,
+        burst_seconds: float = 60.0,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.initial_concurrency = initial_concurrency
+        self.latency_target = latency_target
+        self.throttle_pause = throttle_pause
+        # Quota may be spent this far ahead; one minute matches the API's window.
+        self.burst_seconds = burst_seconds
+        self.counters: Counter = Counter()
+        self._wait_total: Counter = Counter()
+        self._wait_max: Dict[CallPriority, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.limit = float(min(self.max_concurrency, max(self.min_concurrency, self.initial_concurrency)))
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency_ewma = 0.0
+        self._last_decrease = 0.0
+        self._requests = _Bucket(self.rpm, self.burst_seconds)
+        self._tokens = _Bucket(self.tpm, self.burst_seconds)
+        self._waiters: List[Tuple[int, int, asyncio.Future, int]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _check_loop(self) -> None:
+        # Futures and timers belong to the loop that created them.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._reset()
+
+    def _pump(self) -> None:
+        """
+        Admit waiting calls, highest priority first, while limits allow;
+        otherwise arm a timer for when the head of the queue can go.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            _, _, future, tokens = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= int(self.limit):
+                return
+
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            # A call larger than the whole per-minute budget waits for a full bucket.
+            tokens = min(tokens, self._tokens.capacity)
+            delay = max(
+                self.paused_until - now,
+                self._requests.seconds_until(1),
+                self._tokens.seconds_until(tokens),
+            )
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+                return
+
+            heapq.heappop(self._waiters)
+            self._requests.level -= 1
+            self._tokens.level -= tokens
+            self.in_flight += 1
+            future.set_result(None)
+
+    def expected_wait(self, tokens: int) -> float:
+        """
+        Seconds until quota allows a call of `tokens`, ignoring the queue
+        and the concurrency limit.
+        """
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        return max(
+            0.0,
+            self.paused_until - now,
+            self._requests.seconds_until(1),
+            self._tokens.seconds_until(min(tokens, self._tokens.capacity)),
+        )
+
+    def _deadline_exceeded(self, tokens: int) -> QuotaExceededError:
+        self.counters["deadline_exceeded"] += 1
+        # Queued behind in-flight calls, a slot frees up within about one latency.
+        return QuotaExceededError(max(self.expected_wait(tokens), self.latency_ewma))
+
+    async def _acquire(self, priority: CallPriority, tokens: int, deadline: Optional[float] = None) -> None:
+        self._check_loop()
+        if deadline is not None:
+            # Leave room for the call itself once admitted.
+            deadline -= self.latency_ewma
+            if time.monotonic() + self.expected_wait(tokens) > deadline:
+                raise self._deadline_exceeded(tokens)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future, tokens))
+        if self._timer is None:
+            self._pump()
+        try:
+            if deadline is None:
+                await future
+            else:
+                await asyncio.wait_for(future, max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            # wait_for cancelled the future; _pump drops it from the queue.
+            raise self._deadline_exceeded(tokens) from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller was cancelled; hand the slot back.
+                self.in_flight -= 1
+                self._pump()
+            raise
+
+    def _decrease(self, factor: float, now: float) -> None:
+        if now - self._last_decrease < max(1.0, self.latency_ewma):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_concurrency), self.limit * factor)
+
+    def _on_success(self, latency: float) -> None:
+        self.latency_ewma = latency if not self.latency_ewma else 0.8 * self.latency_ewma + 0.2 * latency
+        if latency > self.latency_target:
+            self.counters["slow"] += 1
+            self._decrease(0.9, time.monotonic())
+        else:
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+
+    def _on_throttled(self, retry_after: Optional[float]) -> float:
+        now = time.monotonic()
+        delay = retry_after if retry_after is not None else self.throttle_pause
+        self.counters["throttled"] += 1
+        self.paused_until = max(self.paused_until, now + delay)
+        self._decrease(0.5, now)
+        # Quota is spent server-side; do not let the buckets burst right after.
+        self._requests.level = min(self._requests.level, 0.0)
+        return max(delay, self.paused_until - now)
+
+    @contextlib.asynccontextmanager
+    async def reserve(
+        self,
+        priority: CallPriority,
+        tokens: int,
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[Reservation]:
+        """
+        Wait for quota, then hold one call slot for the block. A 429 raised
+        inside the block becomes QuotaExceededError. `deadline` is a
+        time.monotonic() value the call should finish by; a call that cannot
+        start in time raises QuotaExceededError instead of waiting.
+        """
+        queued_at = time.monotonic()
+        await self._acquire(priority, tokens, deadline)
+        started_at = time.monotonic()
+        waited = started_at - queued_at
+        self.counters["requests"] += 1
+        self._wait_total[priority] += waited
+        self.counters[f"requests_{priority.name.lower()}"] += 1
+        self._wait_max[priority] = max(self._wait_max.get(priority, 0.0), waited)
+
+        reservation = Reservation(tokens)
+        try:
+            yield reservation
+        except Exception as exc:
+            if not is_rate_limited(exc):
+                raise
+            raise QuotaExceededError(self._on_throttled(retry_delay_seconds(exc))) from exc
+        else:
+            self._on_success(time.monotonic() - started_at)
+        finally:
+            self.in_flight -= 1
+            used = reservation.tokens_used if reservation.tokens_used is not None else reservation.tokens
+            self.counters["tokens"] += used
+            self._tokens.level -= used - min(reservation.tokens, self._tokens.capacity)
+            self._pump()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        queued = Counter(
+            CallPriority(priority).name.lower()
+            for priority, _, future, _ in self._waiters
+            if not future.done()
+        )
+        waits = {}
+        for priority in CallPriority:
+            count = self.counters[f"requests_{priority.name.lower()}"]
+            if count:
+                waits[priority.name.lower()] = {
+                    "requests": count,
+                    "mean_wait_seconds": round(self._wait_total[priority] / count, 3),
+                    "max_wait_seconds": round(self._wait_max[priority], 3),
+                }
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": dict(queued),
+            "paused_seconds": round(max(0.0, self.paused_until - now), 1),
+            "requests_available": round(self._requests.level, 1),
+            "tokens_available": round(self._tokens.level),
+            "latency_ewma_seconds": round(self.latency_ewma, 3),
+            "requests": self.counters["requests"],
+            "tokens": self.counters["tokens"],
+            "throttled": self.counters["throttled"],
+            "deadline_exceeded": self.counters["deadline_exceeded"],
+            "slow": self.counters["slow"],
+            "by_priority": waits,
+        }
+
+
+GEMINI_GOVERNOR = QuotaGovernor()
@@ -0,0 +1,127 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List
+
+# Target passage size when grouping extracted text blocks.
+PASSAGE_CHARS = 500
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were "
+    "what when where which who why will with about into their them they these those our your you "
+    "i we me my find get give look page show tell".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def split_passages(text: str, target_chars: int = PASSAGE_CHARS) -> List[str]:
+    """
+    Group the extractor's lines (headings, paragraphs) into passages of about
+    `target_chars`, without splitting a line unless it is itself oversized.
+    """
+    passages: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        while len(line) > target_chars * 2:
+            cut = line.rfind(" ", 0, target_chars) + 1 or target_chars
+            if current:
+                passages.append("\n".join(current))
+                current, size = [], 0
+            passages.append(line[:cut].strip())
+            line = line[cut:].strip()
+        current.append(line)
+        size += len(line) + 1
+        if size >= target_chars:
+            passages.append("\n".join(current))
+            current, size = [], 0
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+def bm25_scores(query: List[str], documents: List[List[str]], k1: float = BM25_K1, b: float = BM25_B) -> List[float]:
+    """
+    Okapi BM25 score of each tokenized document for the tokenized query.
+    """
+    if not documents:
+        return []
+    avg_length = sum(map(len, documents)) / len(documents) or 1.0
+    document_frequency = Counter(token for document in documents for token in set(document))
+    terms = set(query)
+
+    scores = []
+    for document in documents:
+        counts = Counter(document)
+        score = 0.0
+        for term in terms:
+            tf = counts.get(term)
+            if not tf:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(document) / avg_length))
+        scores.append(score)
+    return scores
+
+
+def rank_passages(text: str, query: str, budget_chars: int) -> Dict[str, Any]:
+    """
+    Select the passages of `text` most relevant to `query` within `budget_chars`.
+
+    Behavior:
+    - Passages are scored with BM25 against the query; matching ones are
+      picked best-first until the budget is spent, then returned in page order.
+    - With no query terms, or no passage matching any of them, the leading
+      passages are returned (the old "first N characters" behavior).
+    - Returns:
+      - snippet: selected passages joined with blank lines
+      - passages: [{index, score}] for each selected passage
+      - coverage: passages and characters returned vs. the whole extracted page
+    """
+    passages = split_passages(text)
+    scores = bm25_scores(tokenize(query), [tokenize(passage) for passage in passages])
+
+    matching = [index for index, score in enumerate(scores) if score > 0]
+    if matching:
+        # Only passages that match the query; unrelated text is not padding.
+        order = sorted(matching, key=lambda index: (-scores[index], index))
+    else:
+        order = list(range(len(passages)))
+
+    selected: List[int] = []
+    used = 0
+    for index in order:
+        length = len(passages[index]) + 2
+        if used + length > budget_chars:
+            if selected:
+                continue
+            # A single oversized passage still yields a (trimmed) snippet.
+        selected.append(index)
+        used += length
+        if used >= budget_chars:
+            break
+    selected.sort()
+
+    snippet = "\n\n".join(passages[index] for index in selected)[:budget_chars]
+    total_chars = sum(map(len, passages))
+    returned_chars = sum(len(passages[index]) for index in selected)
+    return {
+        "snippet": snippet,
+        "passages": [{"index": index, "score": round(scores[index], 3)} for index in selected],
+        "coverage": {
+            "passages_returned": len(selected),
+            "passages_total": len(passages),
+            "chars_returned": min(returned_chars, budget_chars),
+            "chars_total": total_chars,
+        },
+    }
@@ -0,0 +1,147 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import textwrap
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfgen import canvas
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever render_pdf output changes, so stored PDFs are re-rendered.
+RENDERER_VERSION = "1"
+
+# Where PDF rendering runs: "process" (default; keeps the CPU-bound ReportLab
+# work off the worker's event loop and GIL) or "thread".
+RENDER_EXECUTOR = os.environ.get("RENDER_EXECUTOR", "process")
+# Reports rendered at once; further renders queue for a free worker.
+RENDER_MAX_WORKERS = int(os.environ.get("RENDER_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def render_pdf(markdown_report: str) -> bytes:
+    """
+    Render a Markdown report into a simple, nicely formatted PDF.
+    """
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=LETTER)
+    width, height = LETTER
+
+    # Simple layout: title + body text with wrapping
+    margin_x = 72  # 1 inch
+    margin_top = height - 72
+    line_height = 14
+
+    lines = markdown_report.splitlines()
+
+    y = margin_top
+
+    for raw_line in lines:
+        line = raw_line.rstrip()
+
+        # Interpret H1 headings as larger bold text
+        if line.startswith("# "):
+            text = line[2:].strip()
+            c.setFont("Helvetica-Bold", 18)
+            c.drawString(margin_x, y, text)
+            y -= line_height * 2
+            continue
+        elif line.startswith("## "):
+            text = line[3:].strip()
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(margin_x, y, text)
+            y -= line_height * 1.5
+            continue
+        elif line.startswith("### "):
+            text = line[4:].strip()
+            c.setFont("Helvetica-Bold", 12)
+            c.drawString(margin_x, y, text)
+            y -= line_height * 1.3
+            continue
+
+        # Normal paragraph text; wrap to page width
+        if not line.strip():
+            y -= line_height
+            continue
+
+        c.setFont("Helvetica", 11)
+        max_width = width - 2 * margin_x
+
+        wrapped = textwrap.wrap(line, width=90)
+        for wline in wrapped:
+            if y <= 72:
+                c.showPage()
+                y = margin_top
+                c.setFont("Helvetica", 11)
+            c.drawString(margin_x, y, wline)
+            y -= line_height
+
+    c.showPage()
+    c.save()
+
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+    return pdf_bytes
+
+
+class RenderPool:
+    """
+    Bounded pool that renders PDFs off the event loop.
+
+    Behavior:
+    - `kind` is "process" or "thread"; at most `max_workers` reports render
+      at once and the rest wait in the executor's queue.
+    - Process workers are spawned (not forked), since the Temporal worker
+      runs background threads.
+    - A crashed process pool is replaced on the next render; the failed
+      render raises so the activity can retry.
+    """
+
+    def __init__(self, kind: str = RENDER_EXECUTOR, max_workers: int = RENDER_MAX_WORKERS):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown render executor: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="render",
+                    )
+            return self._executor
+
+    async def render(self, markdown_report: str) -> bytes:
+        executor = self._get_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, render_pdf, markdown_report)
+        except BrokenProcessPool:
+            logger.warning("PDF render pool crashed; starting a new one.")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+RENDER_POOL = RenderPool()
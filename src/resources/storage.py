@@ -0,0 +1,28 @@
+import os
+import sqlite3
+from pathlib import Path
+
+# Root directory for local, worker-shared caches and stores.
+CACHE_DIR = Path(os.environ.get("AGENT_CACHE_DIR", ".cache"))
+
+
+def open_sqlite(path: Path) -> sqlite3.Connection:
+    """
+    Open a SQLite database that several worker processes can share.
+
+    - Creates the parent directory if needed.
+    - Uses WAL journaling so readers do not block the writer.
+    - Waits on locks instead of failing immediately.
+    - Runs in autocommit mode; callers group writes with explicit transactions.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        str(path),
+        timeout=30,
+        isolation_level=None,
+        check_same_thread=False,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
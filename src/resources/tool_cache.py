@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from .company_research_tools import _normalize_company_name
+from .storage import CACHE_DIR, open_sqlite
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60
+
+TOOL_CACHE_PATH = Path(os.environ.get("TOOL_CACHE_PATH", CACHE_DIR / "tool_results.sqlite3"))
+TOOL_CACHE_MAX_ENTRIES = int(os.environ.get("TOOL_CACHE_MAX_ENTRIES", "5000"))
+
+# Per-tool time-to-live in seconds. Tools not listed here are never cached.
+TOOL_CACHE_TTLS: Dict[str, float] = {
+    "validate_company": 30 * DAY,
+    "identify_sector": 30 * DAY,
+    "identify_competitors": 7 * DAY,
+    "profile_company": 7 * DAY,
+}
+
+# Fields a result must carry, as a JSON object, to be cached; prose,
+# truncated or malformed model output is returned but never cached.
+TOOL_CACHE_REQUIRED_FIELDS: Dict[str, Set[str]] = {
+    "validate_company": {"is_valid"},
+    "identify_sector": {"sector"},
+    "identify_competitors": {"competitors"},
+    "profile_company": {"is_valid", "sector", "competitors"},
+}
+
+# Argument fields compared case-insensitively when building cache keys.
+_CASE_INSENSITIVE_FIELDS = {"company_name", "sector"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tool_results (
+    key TEXT PRIMARY KEY,
+    tool_name TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tool_results_last_access ON tool_results(last_access);
+CREATE INDEX IF NOT EXISTS idx_tool_results_expires_at ON tool_results(expires_at);
+"""
+
+
+def normalize_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize tool arguments so equivalent requests share a cache entry.
+
+    String values have whitespace collapsed; company and sector names are
+    also compared case-insensitively.
+    """
+    normalized: Dict[str, Any] = {}
+    for key, value in arguments.items():
+        if isinstance(value, str):
+            value = _normalize_company_name(value)
+            if key in _CASE_INSENSITIVE_FIELDS:
+                value = value.casefold()
+        normalized[key] = value
+    return normalized
+
+
+def is_cacheable_result(tool_name: str, result: str) -> bool:
+    """
+    Whether `result` is a JSON object carrying the tool's required fields.
+    """
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return False
+    return isinstance(data, dict) and TOOL_CACHE_REQUIRED_FIELDS.get(tool_name, set()) <= data.keys()
+
+
+def cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        normalize_arguments(arguments),
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(f"{tool_name}\0{payload}".encode("utf-8")).hexdigest()
+
+
+class ToolResultCache:
+    """
+    Persistent, TTL-aware cache of tool results backed by SQLite.
+
+    Behavior:
+    - Only tools listed in `ttls` are cached; others always miss silently.
+    - Only results that parse as a JSON object with the tool's required
+      fields are stored; others are counted as rejected.
+    - Entries expire after the tool's TTL and are evicted least-recently-used
+      once the table holds more than `max_entries` rows.
+    - Calls block on SQLite (up to its busy timeout while another process
+      writes); async callers run them with asyncio.to_thread.
+    - The database file is shared by every worker process on the host.
+    - Storage errors are logged and treated as misses so a broken cache
+      never fails a tool call.
+    """
+
+    def __init__(
+        self,
+        path: Path = TOOL_CACHE_PATH,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = TOOL_CACHE_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.ttls = TOOL_CACHE_TTLS if ttls is None else ttls
+        self.max_entries = max_entries
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.rejected: Counter = Counter()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily so importing this module never touches the disk.
+        if self._conn is None:
+            self._conn = open_sqlite(self.path)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.ttls
+
+    def get(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[str]:
+        if not self.is_cacheable(tool_name):
+            return None
+
+        key = cache_key(tool_name, arguments)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT result, expires_at FROM tool_results WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    conn.execute(
+                        "UPDATE tool_results SET last_access = ? WHERE key = ?",
+                        (now, key),
+                    )
+                    self.hits[tool_name] += 1
+                    return row[0]
+                if row is not None:
+                    conn.execute("DELETE FROM tool_results WHERE key = ?", (key,))
+        except sqlite3.Error as exc:
+            logger.warning("Tool cache read failed for %s: %s", tool_name, exc)
+
+        self.misses[tool_name] += 1
+        return None
+
+    def put(self, tool_name: str, arguments: Dict[str, Any], result: str) -> None:
+        if not self.is_cacheable(tool_name):
+            return
+        if not is_cacheable_result(tool_name, result):
+            self.rejected[tool_name] += 1
+            logger.warning("Not caching %s result that is not the expected JSON: %.200s", tool_name, result)
+            return
+
+        key = cache_key(tool_name, arguments)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO tool_results "
+                        "(key, tool_name, result, created_at, expires_at, last_access) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, tool_name, result, now, now + self.ttls[tool_name], now),
+                    )
+                    conn.execute("DELETE FROM tool_results WHERE expires_at <= ?", (now,))
+                    (count,) = conn.execute("SELECT COUNT(*) FROM tool_results").fetchone()
+                    overflow = count - self.max_entries
+                    if overflow > 0:
+                        conn.execute(
+                            "DELETE FROM tool_results WHERE key IN ("
+                            "SELECT key FROM tool_results ORDER BY last_access ASC LIMIT ?)",
+                            (overflow,),
+                        )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as exc:
+            logger.warning("Tool cache write failed for %s: %s", tool_name, exc)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-tool hit/miss/rejected counters for this process.
+        """
+        tools = sorted(set(self.hits) | set(self.misses) | set(self.rejected))
+        return {
+            name: {"hits": self.hits[name], "misses": self.misses[name], "rejected": self.rejected[name]}
+            for name in tools
+        }
+
+
+TOOL_CACHE = ToolResultCache()
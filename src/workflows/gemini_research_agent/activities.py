@@ -1,21 +1,192 @@
-import inspect
-import typing
-import io
-import textwrap
-import base64
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
 
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 from temporalio import activity
+from temporalio.exceptions import ApplicationError
 from google import genai
 
-from pydantic import BaseModel
-from reportlab.lib.pagesizes import LETTER
-from reportlab.pdfgen import canvas
+from ...resources.artifacts import ARTIFACTS, report_key
+from ...resources.blobstore import HISTORY_BLOCKS, MissingBlocksError
+from ...resources.corpus_index import CORPUS_INDEX
+from ...resources.gemini_client import GEMINI_MODEL, get_async_client
+from ...resources.prefix_cache import PREFIX_CACHE, is_stale_cache_error
+from ...resources.quota import GEMINI_GOVERNOR, QuotaExceededError, Reservation, estimate_tokens
+from ...resources.rendering import RENDER_POOL
+from ...resources.mytools import TOOL_EXECUTOR, TOOL_SCHEMAS
+from ...resources.tool_cache import TOOL_CACHE
+from ...resources.custom_types.types import (
+    AgentStepInput,
+    AgentStepOutput,
+    CallPriority,
+    IndexReportInput,
+    ReportArtifacts,
+    ToolCall,
+)
+
+# After a streamed chunk carries function calls, wait this long for further
+# function-call chunks (parallel calls) before dispatching.
+STREAM_TOOL_CALL_GRACE_SECONDS = 0.25
+
+
+def _resolve_history(step: AgentStepInput) -> List[Dict[str, Any]]:
+    """
+    Rehydrate history sent by reference: store the new blocks, then resolve
+    every digest through the block cache and blob store.
+    """
+    HISTORY_BLOCKS.store_blocks(step.new_blocks)
+    return HISTORY_BLOCKS.resolve(step.history_refs)
+
+
+class _HeartbeatTicker:
+    """
+    Heartbeats on a timer while the activity waits with no progress to
+    report, so a slow start is not mistaken for a stalled call. Does nothing
+    outside an activity or without a heartbeat timeout.
+    """
+
+    def __init__(self, details: Dict[str, Any]):
+        self.details = details
+        self._task = None
+        timeout = activity.info().heartbeat_timeout if activity.in_activity() else None
+        if timeout:
+            self._task = asyncio.create_task(self._tick(timeout.total_seconds() / 3))
+
+    async def _tick(self, interval: float) -> None:
+        while True:
+            activity.heartbeat(self.details)
+            await asyncio.sleep(interval)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
 
-from ...resources.mytools import TOOL_DISPATCH, TOOL_SCHEMAS
-from ...resources.custom_types.types import AgentStepInput, AgentStepOutput, ToolCall
 
-client = genai.Client()
+def _activity_deadline() -> Optional[float]:
+    """
+    time.monotonic() value at which the current activity attempt times out
+    (schedule-to-close or start-to-close), or None outside an activity or
+    without either timeout.
+    """
+    if not activity.in_activity():
+        return None
+    info = activity.info()
+    now = datetime.now(timezone.utc)
+    remaining = []
+    if info.schedule_to_close_timeout:
+        remaining.append(info.scheduled_time + info.schedule_to_close_timeout - now)
+    if info.start_to_close_timeout:
+        remaining.append(info.started_time + info.start_to_close_timeout - now)
+    if not remaining:
+        return None
+    return time.monotonic() + min(remaining).total_seconds()
+
+
+async def _generate_parts(
+    contents: Any,
+    config: Any,
+    stream: bool,
+    priority: CallPriority = CallPriority.AGENT_STEP,
+) -> Tuple[List[Any], Any]:
+    """
+    Run one Gemini request, admitted by GEMINI_GOVERNOR, and return (parts, role).
+
+    Behavior:
+    - The activity heartbeats on a timer while queued for quota and, for
+      streaming requests, until the first chunk arrives (thinking models
+      can take a minute to start); then per chunk, so the heartbeat timeout
+      only catches streams that stall once flowing. Non-streaming requests
+      heartbeat on the timer throughout.
+    - A request that quota cannot admit before the activity times out
+      raises QuotaExceededError with the expected wait, instead of queueing
+      until the attempt is killed.
+    - Streams stop being read once function calls have arrived and no
+      further function-call chunk follows within
+      STREAM_TOOL_CALL_GRACE_SECONDS.
+    """
+    client = get_async_client()
+    tokens = estimate_tokens(contents, getattr(config, "system_instruction", None))
+    ticker = _HeartbeatTicker({"chunks": 0, "waiting": "quota"})
+    try:
+        async with GEMINI_GOVERNOR.reserve(priority, tokens, _activity_deadline()) as reservation:
+            if not stream:
+                ticker.details = {"waiting": "response"}
+                # Await the async client so other activities keep running on the
+                # worker event loop while this request is in flight.
+                resp = await client.models.generate_content(model=GEMINI_MODEL, contents=contents, config=config)
+                reservation.tokens_used = getattr(getattr(resp, "usage_metadata", None), "total_token_count", None)
+                msg = resp.candidates[0].content
+                return list(msg.parts or []), getattr(msg, "role", None)
+
+            ticker.details = {"chunks": 0, "waiting": "first_chunk"}
+            return await _stream_parts(client, contents, config, reservation, ticker)
+    finally:
+        ticker.stop()
+
+
+async def _stream_parts(
+    client: Any,
+    contents: Any,
+    config: Any,
+    reservation: Reservation,
+    ticker: _HeartbeatTicker,
+) -> Tuple[List[Any], Any]:
+    """
+    Read one streamed response for _generate_parts; `ticker` is stopped at
+    the first chunk.
+    """
+    parts: List[Any] = []
+    role = None
+    chunks = chars = 0
+    have_calls = False
+    responses = None
+    try:
+        responses = await client.models.generate_content_stream(model=GEMINI_MODEL, contents=contents, config=config)
+        iterator = responses.__aiter__()
+        while True:
+            try:
+                if have_calls:
+                    chunk = await asyncio.wait_for(anext(iterator), STREAM_TOOL_CALL_GRACE_SECONDS)
+                else:
+                    chunk = await anext(iterator)
+            except (StopAsyncIteration, asyncio.TimeoutError):
+                break
+
+            ticker.stop()
+            chunks += 1
+            content = chunk.candidates[0].content if chunk.candidates else None
+            chunk_parts = list(content.parts or []) if content is not None else []
+            chunk_calls = any(getattr(part, "function_call", None) for part in chunk_parts)
+            if have_calls and not chunk_calls:
+                break
+            have_calls = have_calls or chunk_calls
+            role = role or getattr(content, "role", None)
+            parts.extend(chunk_parts)
+            chars += sum(len(part.text) for part in chunk_parts if getattr(part, "text", None))
+
+            usage = getattr(chunk, "usage_metadata", None)
+            tokens = getattr(usage, "candidates_token_count", None) or chars // 4
+            reservation.tokens_used = getattr(usage, "total_token_count", None) or reservation.tokens_used
+            if activity.in_activity():
+                activity.heartbeat({"chunks": chunks, "tokens": tokens})
+    finally:
+        ticker.stop()
+        aclose = getattr(responses, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    return parts, role
+
+
+def _quota_error(exc: QuotaExceededError) -> ApplicationError:
+    # Let Temporal retry after the governor's pause instead of its default backoff.
+    return ApplicationError(
+        str(exc),
+        type="GeminiQuotaExceeded",
+        next_retry_delay=timedelta(seconds=max(1.0, exc.retry_after)),
+    )
+
 
 @activity.defn
 async def llm_step_activity(step: AgentStepInput) -> AgentStepOutput:
@@ -25,38 +196,74 @@ async def llm_step_activity(step: AgentStepInput) -> AgentStepOutput:
       - the original task text
     Return either:
       - a final answer, or
-      - a tool call request
+      - one or more tool call requests
+
+    With `step.stream`, the response is streamed: the activity heartbeats
+    while waiting for the first chunk and then per chunk, and returns as
+    soon as a function call has arrived. A step that Gemini quota cannot
+    admit before the activity times out fails with GeminiQuotaExceeded,
+    retried after the expected wait.
     """
 
     contents = step.history
-
-    config = genai.types.GenerateContentConfig(
+    if step.history_refs:
+        try:
+            contents = await asyncio.to_thread(_resolve_history, step)
+        except MissingBlocksError as exc:
+            # The workflow resends the full history when it sees this error.
+            raise ApplicationError(
+                str(exc),
+                exc.digests,
+                type="MissingHistoryBlocks",
+                non_retryable=True,
+            )
+
+    # The system instruction and tool declarations are identical on every
+    # step; reuse a provider-side cached context for them when one exists.
+    cached_content = None
+    if step.system_instruction:
+        cached_content = await PREFIX_CACHE.cached_content(GEMINI_MODEL, step.system_instruction, TOOL_SCHEMAS)
+
+    full_config = genai.types.GenerateContentConfig(
+        system_instruction=step.system_instruction,
         tools=TOOL_SCHEMAS,
     )
-
-    resp = client.models.generate_content(
-        model="gemini-2.5-pro",
-        contents=contents,
-        config=config,
-    )
-
-    msg = resp.candidates[0].content
-
-    # Parse first part for a potential function call
-    part = msg.parts[0]
-    func_call = getattr(part, "function_call", None)
-
-    if func_call:
+    config = genai.types.GenerateContentConfig(cached_content=cached_content) if cached_content else full_config
+
+    try:
+        try:
+            parts, role = await _generate_parts(contents, config, step.stream, step.priority)
+        except genai.errors.ClientError as exc:
+            if not cached_content or not is_stale_cache_error(exc, cached_content):
+                raise
+            # The cached context expired or was deleted server-side; forget it
+            # and send the full prefix for this request.
+            PREFIX_CACHE.invalidate(cached_content)
+            parts, role = await _generate_parts(contents, full_config, step.stream, step.priority)
+    except QuotaExceededError as exc:
+        raise _quota_error(exc) from exc
+
+    # Collect every function call part; the model may request several
+    # tools in a single turn.
+    tool_calls = [
+        ToolCall(name=part.function_call.name, arguments=dict(part.function_call.args or {}))
+        for part in parts
+        if getattr(part, "function_call", None)
+    ]
+
+    if tool_calls:
         return AgentStepOutput(
             is_final=False,
-            tool_call=ToolCall(name=func_call.name, arguments=dict(func_call.args)),
-            model_message={"role": getattr(msg, "role", None)},
+            tool_calls=tool_calls,
+            model_message={"role": role},
         )
 
     # Otherwise plain text; decide if this is truly final
-    txt = getattr(part, "text", None)
-    if txt is None:
-        txt = str(part)
+    texts = [part.text for part in parts if getattr(part, "text", None)]
+    if texts:
+        txt = "".join(texts)
+    else:
+        txt = str(parts[0]) if parts else ""
 
     normalized = txt.strip().lower()
     # Treat as final only if the model explicitly marks it as such.
@@ -65,109 +272,80 @@ async def llm_step_activity(step: AgentStepInput) -> AgentStepOutput:
     return AgentStepOutput(
         is_final=is_final,
         output_text=txt,
-        model_message={"role": getattr(msg, "role", None)},
+        model_message={"role": role},
     )
 
 
-def _invoke_tool(fn, args: Dict[str, Any]) -> Any:
-    """
-    Invoke a registered tool function, supporting either:
-    - A single Pydantic model argument
-    - Standard kwargs
+@activity.defn
+async def tool_activity(tool_call: ToolCall) -> str:
     """
-    sig = inspect.signature(fn)
-    params = list(sig.parameters.values())
-
-    if len(params) == 1:
-        param = params[0]
-        hints = typing.get_type_hints(fn)  # type: ignore[name-defined]
-        annotation = hints.get(param.name)
+    Run the Python tool from TOOL_DISPATCH under its declared policy
+    (executor, concurrency limit, timeout) via TOOL_EXECUTOR.
 
-        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
-            model_cls = annotation
-            return fn(model_cls(**args))
+    Results of cacheable tools are served from, and written to, the
+    worker-shared TOOL_CACHE in a thread, so a locked database never stalls
+    the event loop. Tools declared non-idempotent are never cached, and
+    their failures are not retried.
+    """
+    cached = await asyncio.to_thread(TOOL_CACHE.get, tool_call.name, tool_call.arguments)
+    if cached is not None:
+        return cached
+
+    policy = TOOL_EXECUTOR.policy(tool_call.name)
+    try:
+        text = await TOOL_EXECUTOR.run(tool_call.name, tool_call.arguments)
+    except QuotaExceededError as exc:
+        raise _quota_error(exc) from exc
+    except asyncio.TimeoutError:
+        raise ApplicationError(
+            f"Tool {tool_call.name} timed out after {policy.timeout_seconds:g}s",
+            type="ToolTimeout",
+            non_retryable=not policy.idempotent,
+        )
+    except Exception as exc:
+        if policy.idempotent:
+            raise
+        raise ApplicationError(
+            f"Tool {tool_call.name} failed: {exc}",
+            type=type(exc).__name__,
+            non_retryable=True,
+        ) from exc
 
-    return fn(**args)
+    if policy.idempotent:
+        await asyncio.to_thread(TOOL_CACHE.put, tool_call.name, tool_call.arguments, text)
+    return text
 
 
 @activity.defn
-async def tool_activity(tool_call: ToolCall) -> str:
+async def index_report(report: IndexReportInput) -> None:
     """
-    Run the Python tool from TOOL_DISPATCH.
+    Add a final Markdown report to the local corpus index so later runs can
+    find it with search_local_corpus. The write runs in a thread: it may
+    wait on the index lock held by a search, or on another process.
     """
-    tool_fn = TOOL_DISPATCH[tool_call.name]
-    result = _invoke_tool(tool_fn, tool_call.arguments)
-
-    # Convert to text for Gemini consumption
-    return str(result)
+    await asyncio.to_thread(CORPUS_INDEX.add_report, report.source, report.title, report.markdown)
 
 
 @activity.defn
-async def render_report_pdf(markdown_report: str) -> str:
+async def render_report_pdf(markdown_report: str) -> ReportArtifacts:
     """
-    Render a Markdown report into a simple, nicely formatted PDF.
+    Store a Markdown report and its PDF rendering in the artifact store.
+
+    Behavior:
+    - The PDF is keyed by the Markdown and the renderer version; if an
+      identical report was rendered before, rendering is skipped.
+    - Rendering runs in RENDER_POOL and store I/O in a thread, so neither
+      blocks the worker's other activities.
 
     Returns:
-        Base64-encoded PDF bytes as a UTF-8 string.
-    """
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=LETTER)
-    width, height = LETTER
-
-    # Simple layout: title + body text with wrapping
-    margin_x = 72  # 1 inch
-    margin_top = height - 72
-    line_height = 14
-
-    lines = markdown_report.splitlines()
-
-    y = margin_top
-
-    for raw_line in lines:
-        line = raw_line.rstrip()
-
-        # Interpret H1 headings as larger bold text
-        if line.startswith("# "):
-            text = line[2:].strip()
-            c.setFont("Helvetica-Bold", 18)
-            c.drawString(margin_x, y, text)
-            y -= line_height * 2
-            continue
-        elif line.startswith("## "):
-            text = line[3:].strip()
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(margin_x, y, text)
-            y -= line_height * 1.5
-            continue
-        elif line.startswith("### "):
-            text = line[4:].strip()
-            c.setFont("Helvetica-Bold", 12)
-            c.drawString(margin_x, y, text)
-            y -= line_height * 1.3
-            continue
-
-        # Normal paragraph text; wrap to page width
-        if not line.strip():
-            y -= line_height
-            continue
-
-        c.setFont("Helvetica", 11)
-        max_width = width - 2 * margin_x
-
-        wrapped = textwrap.wrap(line, width=90)
-        for wline in wrapped:
-            if y <= 72:
-                c.showPage()
-                y = margin_top
-                c.setFont("Helvetica", 11)
-            c.drawString(margin_x, y, wline)
-            y -= line_height
-
-    c.showPage()
-    c.save()
-
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-
-    # Return as base64 so it is easy to store / transmit
-    return base64.b64encode(pdf_bytes).decode("utf-8")
+        Handles to the stored Markdown and PDF.
+    """
+    markdown = await asyncio.to_thread(ARTIFACTS.put, markdown_report.encode("utf-8"), "text/markdown")
+    key = report_key(markdown_report)
+    pdf = await asyncio.to_thread(ARTIFACTS.find, key)
+    if pdf is not None:
+        return ReportArtifacts(markdown=markdown, pdf=pdf, rendered=False)
+
+    pdf_bytes = await RENDER_POOL.render(markdown_report)
+    pdf = await asyncio.to_thread(ARTIFACTS.put, pdf_bytes, "application/pdf", key)
+    return ReportArtifacts(markdown=markdown, pdf=pdf, rendered=True)
@@ -0,0 +1,101 @@
+import dataclasses
+import logging
+import zlib
+from typing import List, Optional, Sequence
+
+from temporalio.api.common.v1 import Payload
+from temporalio.contrib.pydantic import pydantic_data_converter
+from temporalio.converter import DataConverter, PayloadCodec
+
+from .config import PAYLOAD_COMPRESSION, PAYLOAD_COMPRESSION_MIN_BYTES
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_ZLIB = b"binary/zlib"
+ENCODING_ZSTD = b"binary/zstd"
+
+
+class CompressionCodec(PayloadCodec):
+    """
+    Payload codec that compresses large payloads with zlib or zstd.
+
+    Behavior:
+    - `algorithm` is "zlib", "zstd" or None. None never compresses but still
+      decodes, so a client or worker without compression enabled can read
+      payloads written by one that has it.
+    - "zstd" falls back to zlib when the `zstandard` package is missing.
+    - Payloads smaller than `min_bytes`, or that would not shrink, are left as-is.
+    - Compressed payloads are opaque to the Temporal UI/CLI unless a codec
+      server is configured.
+    """
+
+    def __init__(self, algorithm: Optional[str] = "zlib", min_bytes: int = 2048, level: Optional[int] = None):
+        if algorithm not in (None, "zlib", "zstd"):
+            raise ValueError(f"Unknown payload compression: {algorithm}")
+        if algorithm == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed; compressing payloads with zlib instead.")
+            algorithm = "zlib"
+        self.algorithm = algorithm
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.algorithm == "zstd":
+            return zstandard.ZstdCompressor(level=self.level or 3).compress(data)
+        return zlib.compress(data, self.level if self.level is not None else 6)
+
+    @property
+    def _encoding(self) -> bytes:
+        return ENCODING_ZSTD if self.algorithm == "zstd" else ENCODING_ZLIB
+
+    async def encode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        if self.algorithm is None:
+            return list(payloads)
+
+        encoded: List[Payload] = []
+        for payload in payloads:
+            raw = payload.SerializeToString()
+            if len(raw) < self.min_bytes:
+                encoded.append(payload)
+                continue
+            compressed = self._compress(raw)
+            if len(compressed) >= len(raw):
+                encoded.append(payload)
+                continue
+            encoded.append(Payload(metadata={"encoding": self._encoding}, data=compressed))
+        return encoded
+
+    async def decode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        decoded: List[Payload] = []
+        for payload in payloads:
+            encoding = payload.metadata.get("encoding")
+            if encoding == ENCODING_ZLIB:
+                raw = zlib.decompress(payload.data)
+            elif encoding == ENCODING_ZSTD:
+                if zstandard is None:
+                    raise RuntimeError("Received a zstd-compressed payload but zstandard is not installed")
+                raw = zstandard.ZstdDecompressor().decompress(payload.data)
+            else:
+                decoded.append(payload)
+                continue
+            decoded.append(Payload.FromString(raw))
+        return decoded
+
+
+def build_data_converter(
+    compression: Optional[str] = PAYLOAD_COMPRESSION,
+    min_bytes: int = PAYLOAD_COMPRESSION_MIN_BYTES,
+) -> DataConverter:
+    """
+    The pydantic data converter with the compression codec attached.
+
+    Used by both the client and the worker. Decoding always works; encoding
+    only compresses when `compression` is "zlib" or "zstd".
+    """
+    codec = CompressionCodec(algorithm=compression or None, min_bytes=min_bytes)
+    return dataclasses.replace(pydantic_data_converter, payload_codec=codec)
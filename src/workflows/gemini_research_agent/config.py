@@ -1,2 +1,17 @@
+import os
+
 TASK_QUEUE = "agent-task-queue" 
 ADDRESS =  "localhost:7233" 
+
+# Activity slots per worker process. LLM and tool activities are async, so a
+# single worker can have this many Gemini calls in flight at once.
+MAX_CONCURRENT_ACTIVITIES = 32
+
+# How often the worker logs fetch scheduler, tool executor and Gemini quota stats.
+FETCH_STATS_INTERVAL_SECONDS = int(os.environ.get("AGENT_FETCH_STATS_INTERVAL_SECONDS", "60"))
+
+# Opt-in payload compression for client and worker: "" (off), "zlib" or "zstd".
+# Compressed payloads are always decodable, whatever this is set to.
+PAYLOAD_COMPRESSION = os.environ.get("AGENT_PAYLOAD_COMPRESSION", "")
+# Payloads smaller than this many bytes are never compressed.
+PAYLOAD_COMPRESSION_MIN_BYTES = int(os.environ.get("AGENT_PAYLOAD_COMPRESSION_MIN_BYTES", "2048"))
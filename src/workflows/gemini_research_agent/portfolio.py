@@ -0,0 +1,191 @@
+import asyncio
+import json
+from typing import Dict, List, Optional
+
+from temporalio import workflow
+from temporalio.exceptions import ActivityError, ChildWorkflowError
+
+from ...resources.custom_types.types import (
+    AgentInput,
+    PortfolioInput,
+    SeededToolResult,
+    ToolCall,
+)
+from .workflow import AgentLoopWorkflow, tool_activity_options
+
+
+def _company_key(name: str) -> str:
+    return " ".join((name or "").split()).casefold()
+
+
+def _parse_sector(sector_result: str) -> Optional[str]:
+    try:
+        sector = json.loads(sector_result).get("sector")
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(sector, str) or not sector.strip():
+        return None
+    if sector.strip().casefold() == "unknown sector":
+        return None
+    return sector.strip()
+
+
+def _derive_competitors(shared_result: str, company: str, leader: str, sector: str) -> Optional[str]:
+    """
+    Adapt the sector leader's identify_competitors result for another company
+    in the same sector: drop the company itself and count the leader, which
+    shares its sector, as a competitor.
+    """
+    try:
+        shared = json.loads(shared_result)
+        names = [str(name) for name in shared.get("competitors", [])]
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+    competitors = [leader]
+    for name in names:
+        if _company_key(name) not in {_company_key(company), _company_key(leader)}:
+            competitors.append(name)
+
+    return json.dumps({
+        "competitors": competitors[:3],
+        "sector": shared.get("sector") or sector,
+        "reason": (
+            f"Shared sector lookup for {sector}; derived from the competitor "
+            f"analysis of {leader}. {shared.get('reason', '')}"
+        ).strip(),
+    })
+
+
+@workflow.defn
+class PortfolioResearchWorkflow:
+    """
+    Research a list of companies as child AgentLoopWorkflow runs.
+
+    Behavior:
+    - Duplicate company names (ignoring case and whitespace) are researched once.
+    - At most `max_concurrent` companies are in flight at a time.
+    - Each company's sector is looked up once; companies that resolve to the
+      same sector share a single identify_competitors call.
+    - Shared lookups are seeded into each child's history.
+    - Returns child workflow ids, statuses and per-company timings; fetch the
+      reports from the child workflows themselves.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._competitor_lookups: Dict[str, asyncio.Task] = {}
+        self._competitor_leaders: Dict[str, str] = {}
+        self.lookup_counts: Dict[str, int] = {
+            "sector_lookups": 0,
+            "competitor_lookups": 0,
+            "competitor_lookups_reused": 0,
+        }
+
+    async def _run_tool(self, tool_call: ToolCall) -> str:
+        return await workflow.execute_activity(
+            "tool_activity",
+            tool_call,
+            **tool_activity_options(tool_call.name),
+        )
+
+    async def _shared_lookups(self, company: str) -> List[SeededToolResult]:
+        sector_call = ToolCall(name="identify_sector", arguments={"company_name": company})
+        try:
+            sector_result = await self._run_tool(sector_call)
+        except ActivityError:
+            workflow.logger.warning("Sector lookup failed for %s; child will look it up.", company)
+            return []
+        self.lookup_counts["sector_lookups"] += 1
+
+        seeds = [SeededToolResult(tool_call=sector_call, result=sector_result)]
+        sector = _parse_sector(sector_result)
+        if sector is None:
+            return seeds
+
+        # The first company to resolve a sector runs its competitor lookup;
+        # later companies in the same sector await and reuse that result.
+        sector_key = sector.casefold()
+        if sector_key not in self._competitor_lookups:
+            self._competitor_leaders[sector_key] = company
+            self._competitor_lookups[sector_key] = asyncio.create_task(self._run_tool(ToolCall(
+                name="identify_competitors",
+                arguments={"company_name": company, "sector": sector},
+            )))
+            self.lookup_counts["competitor_lookups"] += 1
+        else:
+            self.lookup_counts["competitor_lookups_reused"] += 1
+
+        try:
+            shared_result = await self._competitor_lookups[sector_key]
+        except ActivityError:
+            return seeds
+
+        leader = self._competitor_leaders[sector_key]
+        if leader == company:
+            competitors_result: Optional[str] = shared_result
+        else:
+            competitors_result = _derive_competitors(shared_result, company, leader, sector)
+        if competitors_result is not None:
+            seeds.append(SeededToolResult(
+                tool_call=ToolCall(
+                    name="identify_competitors",
+                    arguments={"company_name": company, "sector": sector},
+                ),
+                result=competitors_result,
+            ))
+        return seeds
+
+    @workflow.run
+    async def run(self, input: PortfolioInput) -> dict:
+        companies: List[str] = []
+        seen = set()
+        for company in input.companies:
+            key = _company_key(company)
+            if key and key not in seen:
+                seen.add(key)
+                companies.append(company.strip())
+
+        semaphore = asyncio.Semaphore(max(1, input.max_concurrent))
+        parent_id = workflow.info().workflow_id
+        started = workflow.now()
+
+        async def research(index: int, company: str) -> Dict[str, str]:
+            async with semaphore:
+                start = workflow.now()
+                seeds = await self._shared_lookups(company)
+                lookups_done = workflow.now()
+
+                child_id = f"{parent_id}-{index}"
+                status = "completed"
+                error = ""
+                try:
+                    await workflow.execute_child_workflow(
+                        AgentLoopWorkflow.run,
+                        AgentInput(task=company, seeded_tool_results=seeds),
+                        id=child_id,
+                    )
+                except ChildWorkflowError as exc:
+                    status = "failed"
+                    error = str(exc.cause or exc)
+                    workflow.logger.warning("Research for %s failed: %s", company, error)
+                end = workflow.now()
+
+                self.timings[company] = {
+                    "queued_seconds": (start - started).total_seconds(),
+                    "lookup_seconds": (lookups_done - start).total_seconds(),
+                    "research_seconds": (end - lookups_done).total_seconds(),
+                    "total_seconds": (end - start).total_seconds(),
+                }
+                return {"workflow_id": child_id, "status": status, "error": error}
+
+        results = await asyncio.gather(
+            *(research(index, company) for index, company in enumerate(companies))
+        )
+
+        return {
+            "companies": dict(zip(companies, results)),
+            "timings": self.timings,
+            "lookups": self.lookup_counts,
+            "wall_seconds": (workflow.now() - started).total_seconds(),
+        }
@@ -1,24 +1,37 @@
 import asyncio
 import uuid
-import base64
 from pathlib import Path
 from pprint import PrettyPrinter
+from typing import List, Optional
 
 from temporalio.client import Client
-from temporalio.contrib.pydantic import pydantic_data_converter
 
-from ...resources.custom_types.types import AgentInput
+from ...resources.artifacts import ARTIFACTS, ArtifactNotFoundError
+from ...resources.custom_types.types import AgentInput, AgentResult, PortfolioInput
 from .workflow import AgentLoopWorkflow
+from .portfolio import PortfolioResearchWorkflow
+from .codec import build_data_converter
 from .config import TASK_QUEUE, ADDRESS
 
 pp = PrettyPrinter(indent=1, width=120)
 
 
-async def main(prompt: str = "Temporal") -> dict:
+def _write_pdf(prompt: str, result: AgentResult, output_dir: Path) -> Optional[Path]:
+    # The workflow returns a handle; the PDF itself comes from the artifact store.
+    if result.pdf is None:
+        return None
+    safe_name = "".join(c for c in prompt if c.isalnum() or c in ("-", "_")) or "report"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pdf_path = output_dir / f"{safe_name}_report.pdf"
+    pdf_path.write_bytes(ARTIFACTS.read(result.pdf))
+    return pdf_path
+
+
+async def main(prompt: str = "Temporal", output_dir: Path = Path("reports")) -> Optional[AgentResult]:
     interrupt_event = asyncio.Event()
     client = await Client.connect(
         ADDRESS,
-        data_converter=pydantic_data_converter,
+        data_converter=build_data_converter(),
     )
 
     handle = await client.start_workflow(
@@ -30,44 +43,118 @@ async def main(prompt: str = "Temporal") -> dict:
 
     try:
         result = await handle.result()
+    except Exception as exc:
+        print(f"Workflow finished with exception: {exc}")
+        return None
 
-        markdown = result.get("markdown_report", "")
-        pdf_b64 = result.get("pdf_base64", "")
+    # The report itself lives in the artifact store the worker wrote it to.
+    try:
+        if result.markdown is not None:
+            markdown = ARTIFACTS.read(result.markdown).decode("utf-8")
+        else:
+            markdown = result.partial_output
 
         # Write PDF to disk if available
-        pdf_path = None
-        if pdf_b64:
-            pdf_bytes = base64.b64decode(pdf_b64)
-            safe_name = "".join(c for c in prompt if c.isalnum() or c in ("-", "_")) or "report"
-            pdf_path = Path(f"{safe_name}_report.pdf")
-            pdf_path.write_bytes(pdf_bytes)
+        pdf_path = _write_pdf(prompt, result, output_dir)
+    except ArtifactNotFoundError as exc:
+        print(f"Workflow completed, but its report could not be read: {exc}")
+        return result
 
-        print("\n=== Agent Result (Markdown) ===\n")
-        print(markdown)
+    print("\n=== Agent Result (Markdown) ===\n")
+    print(markdown)
 
-        if pdf_path:
-            print(f"\nPDF written to: {pdf_path}")
-        else:
-            print("\nNo PDF generated (empty pdf_base64).")
+    if pdf_path:
+        print(f"\nPDF written to: {pdf_path}")
+    else:
+        print("\nNo PDF generated.")
 
-        return result
+    return result
+
+
+async def main_portfolio(companies: List[str], max_concurrent: int = 5, output_dir: Path = Path("reports")) -> dict:
+    client = await Client.connect(
+        ADDRESS,
+        data_converter=build_data_converter(),
+    )
+
+    handle = await client.start_workflow(
+        PortfolioResearchWorkflow.run,
+        PortfolioInput(companies=companies, max_concurrent=max_concurrent),
+        id=f"portfolio-{uuid.uuid4()}",
+        task_queue=TASK_QUEUE,
+    )
+
+    try:
+        summary = await handle.result()
     except Exception as exc:
-        print(f"Workflow finished with exception: {exc}")
+        print(f"Portfolio workflow finished with exception: {exc}")
         return {}
 
+    print("\n=== Portfolio Timings (seconds) ===\n")
+    print(f"{'company':<30} {'status':<10} {'queued':>8} {'lookups':>8} {'research':>9} {'total':>8}")
+    for company, child in summary["companies"].items():
+        t = summary["timings"].get(company, {})
+        print(
+            f"{company[:30]:<30} {child['status']:<10} "
+            f"{t.get('queued_seconds', 0):>8.1f} {t.get('lookup_seconds', 0):>8.1f} "
+            f"{t.get('research_seconds', 0):>9.1f} {t.get('total_seconds', 0):>8.1f}"
+        )
+    print("\nShared lookups:")
+    pp.pprint(summary["lookups"])
+
+    # Reports stay in the child workflows; fetch each one by id.
+    for company, child in summary["companies"].items():
+        if child["status"] != "completed":
+            continue
+        result = await client.get_workflow_handle_for(AgentLoopWorkflow.run, child["workflow_id"]).result()
+        try:
+            pdf_path = _write_pdf(company, result, output_dir)
+        except ArtifactNotFoundError as exc:
+            print(f"PDF for {company} could not be read: {exc}")
+            continue
+        if pdf_path:
+            print(f"PDF for {company} written to: {pdf_path}")
+
+    return summary
+
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(
-        description="Run the Gemini research agent for a given company."
+        description="Run the Gemini research agent for one or more companies."
     )
     parser.add_argument(
         "company",
-        nargs="?",
-        default="Temporal",
-        help="Company name to analyze (default: Temporal)",
+        nargs="*",
+        default=["Temporal"],
+        help="Company name(s) to analyze (default: Temporal). "
+        "Several names run as one portfolio workflow.",
+    )
+    parser.add_argument(
+        "--companies-file",
+        help="File with one company name per line, run as a portfolio workflow.",
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=5,
+        help="Maximum companies researched at once in portfolio mode (default: 5)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("reports"),
+        help="Directory the report PDFs are written to (default: reports)",
     )
     args = parser.parse_args()
 
-    asyncio.run(main(prompt=args.company))
+    companies = list(args.company)
+    if args.companies_file:
+        lines = Path(args.companies_file).read_text().splitlines()
+        companies = [line.strip() for line in lines if line.strip()]
+
+    if len(companies) == 1:
+        asyncio.run(main(prompt=companies[0], output_dir=args.output_dir))
+    else:
+        asyncio.run(main_portfolio(companies, max_concurrent=args.max_concurrent, output_dir=args.output_dir))
@@ -1,27 +1,63 @@
 import asyncio
+import logging
 
 from temporalio.client import Client
 from temporalio.worker import Worker
-from temporalio.contrib.pydantic import pydantic_data_converter
 from .workflow import AgentLoopWorkflow
-from .activities import llm_step_activity, tool_activity, render_report_pdf
-from .config import TASK_QUEUE, ADDRESS
+from .portfolio import PortfolioResearchWorkflow
+from .activities import llm_step_activity, tool_activity, index_report, render_report_pdf
+from .codec import build_data_converter
+from .config import TASK_QUEUE, ADDRESS, MAX_CONCURRENT_ACTIVITIES, FETCH_STATS_INTERVAL_SECONDS
+from ...resources.artifacts import ARTIFACT_STORE_DIR
+from ...resources.fetcher import FETCHER
+from ...resources.mytools import TOOL_EXECUTOR
+from ...resources.quota import GEMINI_GOVERNOR
+from ...resources.rendering import RENDER_POOL
+
+logger = logging.getLogger(__name__)
 
 interrupt_event = asyncio.Event()
 
+
+async def log_worker_stats():
+    # Per-host queue depth and wait times of the shared page fetcher,
+    # per-tool queue and run times of the tool executor, and Gemini quota
+    # governor state.
+    while True:
+        await asyncio.sleep(FETCH_STATS_INTERVAL_SECONDS)
+        stats = FETCHER.scheduler.stats()
+        if stats:
+            logger.info("Fetch scheduler: %s", stats)
+        stats = TOOL_EXECUTOR.stats()
+        if stats:
+            logger.info("Tool executor: %s", stats)
+        if GEMINI_GOVERNOR.counters["requests"]:
+            logger.info("Gemini quota governor: %s", GEMINI_GOVERNOR.stats())
+
+
 async def main():
     client = await Client.connect(
         ADDRESS,
-        data_converter=pydantic_data_converter)
+        data_converter=build_data_converter())
+    # run.py reads reports from here; it must resolve the same directory.
+    logger.info("Storing report artifacts in %s", ARTIFACT_STORE_DIR)
     
     async with Worker(
         client,
         task_queue=TASK_QUEUE,
-        workflows=[AgentLoopWorkflow],
-        activities=[llm_step_activity, tool_activity, render_report_pdf],
+        workflows=[AgentLoopWorkflow, PortfolioResearchWorkflow],
+        activities=[llm_step_activity, tool_activity, index_report, render_report_pdf],
+        max_concurrent_activities=MAX_CONCURRENT_ACTIVITIES,
         ):
-            # Keep the worker alive until interrupted (Ctrl+C during demos)
-            await interrupt_event.wait()
+            stats_task = asyncio.create_task(log_worker_stats())
+            try:
+                # Keep the worker alive until interrupted (Ctrl+C during demos)
+                await interrupt_event.wait()
+            finally:
+                stats_task.cancel()
+                RENDER_POOL.shutdown()
+                TOOL_EXECUTOR.shutdown()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
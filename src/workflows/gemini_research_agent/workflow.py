@@ -1,15 +1,26 @@
-from typing import List
-from datetime import timedelta
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set
+from datetime import datetime, timedelta
 
 from temporalio import workflow
+from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError, ApplicationError
 
 from ...resources.custom_types.types import (
     AgentInput,
+    AgentResult,
+    AgentSnapshot,
     AgentStepInput,
     AgentStepOutput,
+    CallPriority,
+    CompanyProfile,
+    IndexReportInput,
+    ReportArtifacts,
+    SeededToolResult,
     ToolCall,
 )
-from ...resources.myprompts.history import PromptHistory
+from ...resources.myprompts.history import EntryKind, PromptHistory, summarize_text
 from ...resources.myprompts.models import SystemPrompt, TaskPrompt, BasePrompt
 from ...resources.myprompts.provider import LLMProvider
 from ...resources.prompts.prompts import (
@@ -23,6 +34,133 @@ from ...resources.prompts.prompts import (
 )
 
 
+# Tool policies are declared on the @tool decorators. The registry and the
+# tool result cache import the tools' dependencies, so they are passed
+# through the sandbox; the workflow only reads the policies and uses the
+# cache's argument normalization, so memo keys match cache keys.
+with workflow.unsafe.imports_passed_through():
+    from ...resources.mytools import NON_IDEMPOTENT_TOOLS, TOOL_POLICIES, ToolPolicy, is_failed_result
+    from ...resources.tool_cache import normalize_arguments
+
+
+# Memoized results longer than this are not carried across continue-as-new.
+SNAPSHOT_MEMO_MAX_CHARS = 2000
+
+# One tool_activity attempt may take the tool's own timeout plus this margin
+# (result cache, serialization); a call allows TOOL_ACTIVITY_ATTEMPTS attempts
+# with up to TOOL_ACTIVITY_RETRY_SLACK_SECONDS of backoff before each retry.
+TOOL_ACTIVITY_MARGIN_SECONDS = 5
+TOOL_ACTIVITY_ATTEMPTS = 3
+TOOL_ACTIVITY_RETRY_SLACK_SECONDS = 15
+
+def tool_activity_options(name: str, attempts: int = TOOL_ACTIVITY_ATTEMPTS) -> Dict[str, Any]:
+    """
+    Timeouts and retry policy for a tool_activity call of tool `name`, from
+    its declared ToolPolicy. Non-idempotent tools get a single attempt.
+    """
+    policy = TOOL_POLICIES.get(name) or ToolPolicy()
+    attempt = timedelta(seconds=policy.timeout_seconds + TOOL_ACTIVITY_MARGIN_SECONDS)
+    if not policy.idempotent:
+        attempts = 1
+    backoff = timedelta(seconds=TOOL_ACTIVITY_RETRY_SLACK_SECONDS * (attempts - 1))
+    return {
+        "start_to_close_timeout": attempt,
+        "schedule_to_close_timeout": attempt * attempts + backoff,
+        "retry_policy": RetryPolicy(maximum_attempts=attempts),
+    }
+
+
+def agent_system_instruction() -> str:
+    """
+    The agent's system instruction: SYSTEM_PROMPT plus the tool-use and
+    final-answer rules. Identical for every run, so it forms a stable
+    request prefix with the tool declarations.
+    """
+    final_answer_instructions = (
+        "\n\nWhen you have completed all necessary tool calls and analysis "
+        "and are ready to give the final result, respond with a single "
+        "message starting with 'FINAL ANSWER:' followed by the final report. "
+    )
+
+    non_repetition_instructions = (
+        "You must not call a tool again with the same arguments if it has already succeeded, "
+        "unless new information makes that result invalid."
+    )
+
+    parallel_tools_instructions = (
+        " When several tool calls do not depend on each other, request them "
+        "together in a single turn; they run in parallel. To read several "
+        "pages, pass all of their URLs to a single browse_pages call. "
+        "Check search_local_corpus before browsing; earlier runs may "
+        "already have fetched the pages or reported on the company."
+    )
+
+    return (
+        SYSTEM_PROMPT.strip()
+        + non_repetition_instructions
+        + parallel_tools_instructions
+        + final_answer_instructions
+    )
+
+
+def _memo_key(tool_req: ToolCall) -> str:
+    """
+    Canonical form of a tool call: arguments normalized as for the tool
+    result cache (normalize_arguments), with keys sorted.
+    """
+    arguments = normalize_arguments(tool_req.arguments)
+    return json.dumps([tool_req.name, arguments], sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _predict_next_call(tool_req: ToolCall, tool_result: str) -> Optional[ToolCall]:
+    """
+    The lookup the initial plan calls for next: identify_sector after a
+    successful validate_company, identify_competitors once the sector is known.
+    """
+    try:
+        result = json.loads(tool_result)
+    except ValueError:
+        return None
+    if not isinstance(result, dict):
+        return None
+
+    company = tool_req.arguments.get("company_name")
+    if not company:
+        return None
+    if tool_req.name == "validate_company" and result.get("is_valid"):
+        return ToolCall(name="identify_sector", arguments={"company_name": company})
+    if tool_req.name == "identify_sector" and result.get("sector"):
+        return ToolCall(
+            name="identify_competitors",
+            arguments={"company_name": company, "sector": result["sector"]},
+        )
+    return None
+
+
+class _Speculation:
+    """
+    A tool activity started ahead of the model asking for it.
+    """
+
+    def __init__(self, handle: Any, started_at: datetime):
+        self.handle = handle
+        self.started_at = started_at
+        self.finished_at: Optional[datetime] = None
+        handle.add_done_callback(self._finished)
+
+    def _finished(self, _handle: Any) -> None:
+        self.finished_at = workflow.now()
+
+
+def _format_tool_results(tool_reqs: List[ToolCall], tool_results: List[str]) -> str:
+    return "\n\n".join(
+        f"Latest tool: {tool_req.name}\n"
+        f"Arguments: {tool_req.arguments}\n"
+        f"Result:\n{tool_result}"
+        for tool_req, tool_result in zip(tool_reqs, tool_results)
+    )
+
+
 @workflow.defn
 class AgentLoopWorkflow:
     def __init__(self):
@@ -30,63 +168,410 @@ class AgentLoopWorkflow:
         self.tools_used: List[str] = []
         self.step_counter: int = 0
         self.max_steps: int = 30
+        # Estimated prompt tokens removed by history compaction, per step.
+        self.tokens_saved: Dict[int, int] = {}
+        self.externalize_history: bool = True
+        # Digests of history blocks the activity side has already stored.
+        self._stored_blocks: Set[str] = set()
+        # Facts summarized by earlier runs of this workflow (continue-as-new).
+        self.carried_facts: List[str] = []
+        self.continue_as_new_count: int = 0
+        # Results of completed tool calls, keyed by _memo_key.
+        self.tool_memo: Dict[str, str] = {}
+        self.tool_calls_memoized: int = 0
+        # Speculative tool execution: predictions from the last tool round,
+        # activities started for them, and hit/miss accounting.
+        self.speculate: bool = False
+        self._predicted_calls: List[ToolCall] = []
+        self._speculations: Dict[str, _Speculation] = {}
+        self.speculation_hits: int = 0
+        self.speculation_misses: int = 0
+        self.speculation_saved_seconds: float = 0.0
+        # Sent with every step outside of the history, so it stays a stable prefix.
+        self.system_instruction: str = ""
+        self.stream_llm_steps: bool = True
+        self.llm_heartbeat_timeout: timedelta = timedelta(seconds=30)
+
+    def _tool_summary(self, tool_req: ToolCall, tool_result: str) -> str:
+        return (
+            f"{tool_req.name}({tool_req.arguments}) returned: "
+            f"{summarize_text(tool_result, self.history.tool_summary_chars)}"
+        )
+
+    def _should_continue_as_new(self, input: AgentInput) -> bool:
+        info = workflow.info()
+        return (
+            info.is_continue_as_new_suggested()
+            or info.get_current_history_length() >= input.continue_as_new_history_events
+            or info.get_current_history_size() >= input.continue_as_new_history_bytes
+        )
+
+    def _snapshot(self) -> AgentSnapshot:
+        """
+        Compact the current state: tool results become one-line facts and the
+        latest model message becomes the current plan.
+        """
+        facts = list(self.carried_facts)
+        plan = ""
+        for entry in self.history.entries:
+            if entry.kind == EntryKind.TOOL:
+                facts.append(entry.summary or summarize_text(entry.prompt.text, self.history.tool_summary_chars))
+            elif entry.prompt.role == "assistant":
+                plan = summarize_text(entry.prompt.text, 2000)
+        return AgentSnapshot(
+            step_counter=self.step_counter,
+            tools_used=list(self.tools_used),
+            facts=facts,
+            plan=plan,
+            history_tokens_saved=dict(self.tokens_saved),
+            continue_as_new_count=self.continue_as_new_count + 1,
+            tool_memo={
+                key: result
+                for key, result in self.tool_memo.items()
+                if len(result) <= SNAPSHOT_MEMO_MAX_CHARS and not is_failed_result(result)
+            },
+            tool_calls_memoized=self.tool_calls_memoized,
+        )
+
+    def _restore(self, snapshot: AgentSnapshot) -> None:
+        self.step_counter = snapshot.step_counter
+        self.tools_used = list(snapshot.tools_used)
+        self.carried_facts = list(snapshot.facts)
+        self.tokens_saved = dict(snapshot.history_tokens_saved)
+        self.continue_as_new_count = snapshot.continue_as_new_count
+        self.tool_memo = dict(snapshot.tool_memo)
+        self.tool_calls_memoized = snapshot.tool_calls_memoized
+
+        facts_text = "\n".join(f"- {fact}" for fact in snapshot.facts) or "- (none yet)"
+        self.history.add(BasePrompt(
+            role="user",
+            text=(
+                f"You are resuming this task after {snapshot.step_counter} completed steps.\n\n"
+                f"Facts gathered so far:\n{facts_text}\n\n"
+                f"Tools used so far: {', '.join(snapshot.tools_used) or 'none'}\n\n"
+                f"Current plan:\n{snapshot.plan or '(no plan recorded)'}\n\n"
+                "Do not repeat tool calls whose results are listed above."
+            ),
+        ), pinned=True)
+
+    def _step_input(self, task: str) -> AgentStepInput:
+        """
+        Build the next LLM step input. With externalized history, only block
+        digests plus blocks not yet stored by the activity side are sent.
+        """
+        messages = self.history.to_messages(provider=LLMProvider.GEMINI)
+        # Steps that write the final report go first when Gemini quota is scarce.
+        final_step = "generate_report" in self.tools_used or self.step_counter + 1 >= self.max_steps
+        priority = CallPriority.FINAL_REPORT if final_step else CallPriority.AGENT_STEP
+        if not self.externalize_history:
+            return AgentStepInput(
+                task=task,
+                history=messages,
+                system_instruction=self.system_instruction,
+                stream=self.stream_llm_steps,
+                priority=priority,
+            )
+
+        digests = self.history.to_message_digests(provider=LLMProvider.GEMINI)
+        new_blocks = {
+            digest: message
+            for digest, message in zip(digests, messages)
+            if digest not in self._stored_blocks
+        }
+        return AgentStepInput(
+            task=task,
+            history_refs=digests,
+            new_blocks=new_blocks,
+            system_instruction=self.system_instruction,
+            stream=self.stream_llm_steps,
+            priority=priority,
+        )
+
+    async def _run_llm_step(self, step_input: AgentStepInput) -> AgentStepOutput:
+        try:
+            llm_result = await workflow.execute_activity(
+                "llm_step_activity",
+                step_input,
+                schedule_to_close_timeout=timedelta(seconds=90),
+                heartbeat_timeout=self._llm_heartbeat_timeout(step_input),
+            )
+        except ActivityError as err:
+            cause = err.cause
+            if not (isinstance(cause, ApplicationError) and cause.type == "MissingHistoryBlocks"):
+                raise
+            # The activity ran somewhere without our blocks; resend everything once.
+            workflow.logger.warning("History blocks missing on the activity side; resending full history.")
+            self._stored_blocks.clear()
+            step_input = self._step_input(step_input.task)
+            llm_result = await workflow.execute_activity(
+                "llm_step_activity",
+                step_input,
+                schedule_to_close_timeout=timedelta(seconds=90),
+                heartbeat_timeout=self._llm_heartbeat_timeout(step_input),
+            )
+
+        self._stored_blocks.update(step_input.new_blocks)
+
+        # Temporal + data converter may deserialize to dict; normalize.
+        if isinstance(llm_result, dict):
+            llm_result = AgentStepOutput(**llm_result)
+        return llm_result
+
+    def _llm_heartbeat_timeout(self, step_input: AgentStepInput) -> timedelta | None:
+        # Only streaming steps heartbeat.
+        return self.llm_heartbeat_timeout if step_input.stream else None
+
+    def _seed_tool_results(self, seeds: List[SeededToolResult]) -> None:
+        """
+        Add precomputed tool results to history and the memo table, with a
+        pinned note telling the model not to call them again.
+        """
+        if not seeds:
+            return
+        seeded_reqs = [seed.tool_call for seed in seeds]
+        seeded_results = [seed.result for seed in seeds]
+        self.tools_used.extend(req.name for req in seeded_reqs)
+        for seeded_req, seeded_result in zip(seeded_reqs, seeded_results):
+            if seeded_req.name not in NON_IDEMPOTENT_TOOLS and not is_failed_result(seeded_result):
+                self.tool_memo[_memo_key(seeded_req)] = seeded_result
+            self.history.add(
+                BasePrompt(role="tool", text=seeded_result),
+                kind=EntryKind.TOOL,
+                summary=self._tool_summary(seeded_req, seeded_result),
+            )
+        self.history.add(BasePrompt(
+            role="user",
+            text=(
+                "The following tool calls have already succeeded; treat their results as facts "
+                "and do not call them again:\n\n"
+                f"{_format_tool_results(seeded_reqs, seeded_results)}"
+            ),
+        ), pinned=True)
+
+    async def _profile_company(self, company: str) -> List[SeededToolResult]:
+        """
+        Run the single-call company profile and express it as seeded
+        validate/sector/competitor results. On failure the agent loop simply
+        performs those steps itself.
+        """
+        try:
+            # One attempt: on failure the step-by-step path is the retry.
+            profile_json = await workflow.execute_activity(
+                "tool_activity",
+                ToolCall(name="profile_company", arguments={"company_name": company}),
+                **tool_activity_options("profile_company", attempts=1),
+            )
+            profile = CompanyProfile.model_validate_json(profile_json)
+        except (ActivityError, ValueError) as err:
+            workflow.logger.warning("Company profile failed (%s); using the step-by-step path.", err)
+            return []
+        return profile.to_seeded_tool_results(company)
+
+    def _start_speculation(self) -> None:
+        """
+        Start tool activities for the predicted next calls, to run alongside
+        the upcoming LLM step.
+        """
+        for predicted in self._predicted_calls:
+            if predicted.name in NON_IDEMPOTENT_TOOLS:
+                continue
+            key = _memo_key(predicted)
+            if key in self.tool_memo or key in self._speculations:
+                continue
+            handle = workflow.start_activity(
+                "tool_activity",
+                predicted,
+                **tool_activity_options(predicted.name),
+            )
+            self._speculations[key] = _Speculation(handle, workflow.now())
+        self._predicted_calls = []
+
+    def _discard_speculation(self) -> None:
+        # Predictions the model did not ask for: cancel and drop the results.
+        for speculation in self._speculations.values():
+            speculation.handle.cancel()
+        self.speculation_misses += len(self._speculations)
+        self._speculations.clear()
+
+    async def _claim_speculation(self, key: str, tool_req: ToolCall) -> str:
+        speculation = self._speculations.pop(key)
+        requested_at = workflow.now()
+        try:
+            result = await speculation.handle
+        except ActivityError:
+            # Retry the call normally rather than failing on a speculative run.
+            self.speculation_misses += 1
+            return await workflow.execute_activity(
+                "tool_activity",
+                tool_req,
+                **tool_activity_options(tool_req.name),
+            )
+        finished_at = speculation.finished_at or workflow.now()
+        self.speculation_hits += 1
+        self.speculation_saved_seconds += (min(requested_at, finished_at) - speculation.started_at).total_seconds()
+        return result
+
+    async def _run_tools(self, tool_reqs: List[ToolCall]) -> List[str]:
+        """
+        Run the requested tools concurrently and return results in request order.
+
+        A call already completed in this run (same tool and canonical
+        arguments) reuses the stored result instead of scheduling
+        tool_activity, and duplicates within one turn run once. Tools declared
+        non-idempotent in the registry always run, and results reporting a
+        failure (is_failed_result) are not stored, so a repeated call runs
+        again. Calls matching a speculative activity take its result.
+        """
+        keys: List[Optional[str]] = [
+            None if req.name in NON_IDEMPOTENT_TOOLS else _memo_key(req)
+            for req in tool_reqs
+        ]
+        pending: Dict[str, ToolCall] = {}
+        for req, key in zip(tool_reqs, keys):
+            if key is not None and key not in self.tool_memo and key not in pending:
+                pending[key] = req
+        always_run = [index for index, key in enumerate(keys) if key is None]
+        scheduled = list(pending.values()) + [tool_reqs[index] for index in always_run]
+
+        # gather() returns results in scheduling order, so history stays deterministic.
+        scheduled_keys: List[Optional[str]] = list(pending) + [None] * len(always_run)
+        results: List[str] = await asyncio.gather(
+            *(
+                self._claim_speculation(key, tool_req)
+                if key in self._speculations
+                else workflow.execute_activity(
+                    "tool_activity",
+                    tool_req,
+                    **tool_activity_options(tool_req.name),
+                )
+                for key, tool_req in zip(scheduled_keys, scheduled)
+            )
+        )
+        self._discard_speculation()
+
+        fresh = dict(zip(pending, results))
+        self.tool_memo.update((key, result) for key, result in fresh.items() if not is_failed_result(result))
+        direct = dict(zip(always_run, results[len(pending):]))
+        memoized = len(tool_reqs) - len(scheduled)
+        if memoized:
+            self.tool_calls_memoized += memoized
+            workflow.logger.info("Reused %d memoized tool result(s).", memoized)
+
+        ordered = [
+            direct[index] if key is None else fresh[key] if key in fresh else self.tool_memo[key]
+            for index, key in enumerate(keys)
+        ]
+        if self.speculate:
+            self._predicted_calls = [
+                predicted
+                for predicted in map(_predict_next_call, tool_reqs, ordered)
+                if predicted is not None
+            ]
+        return ordered
+
+    def _compact_history(self, step: int) -> None:
+        report = self.history.compact()
+        self.tokens_saved[step] = report.tokens_saved
+        if report.tokens_saved:
+            workflow.logger.info(
+                "Step %d: history compaction saved ~%d tokens (%d -> %d).",
+                step,
+                report.tokens_saved,
+                report.tokens_before,
+                report.tokens_after,
+            )
+
+    def _stats(self) -> dict:
+        return {
+            "steps": self.step_counter,
+            "tools_used": list(self.tools_used),
+            "history_tokens_saved": dict(self.tokens_saved),
+            "continued_as_new": self.continue_as_new_count,
+            "tool_calls_memoized": self.tool_calls_memoized,
+            "speculation": {
+                "hits": self.speculation_hits,
+                "misses": self.speculation_misses,
+                "hit_rate": (
+                    self.speculation_hits / (self.speculation_hits + self.speculation_misses)
+                    if self.speculation_hits + self.speculation_misses
+                    else 0.0
+                ),
+                "latency_saved_seconds": round(self.speculation_saved_seconds, 3),
+            },
+        }
 
     @workflow.run
-    async def run(self, input: AgentInput) -> dict:
+    async def run(self, input: AgentInput) -> AgentResult:
         """
         Main loop:
         - Build initial prompts from the task
         - Call LLM step activity
-        - Optionally invoke a tool
-        - Repeat until final answer or max_steps
+        - Optionally invoke the requested tools (concurrently)
+        - Repeat until final answer or max_steps, continuing as new with a
+          compact snapshot when the event history grows too large
         """
 
-        # Build initial prompt history using the prompt models
-        final_answer_instructions = (
-            "\n\nWhen you have completed all necessary tool calls and analysis "
-            "and are ready to give the final result, respond with a single "
-            "message starting with 'FINAL ANSWER:' followed by the final report. "
-        )
+        self.max_steps = input.max_steps
+        self.externalize_history = input.externalize_history
+        self.speculate = input.speculate
+        self.stream_llm_steps = input.stream_llm_steps
+        self.llm_heartbeat_timeout = timedelta(seconds=input.llm_heartbeat_timeout_seconds)
+        self.history.token_budget = input.history_token_budget
+        self.history.keep_recent = input.history_keep_recent
 
-        non_repetition_instructions = (
-            "You must not call a tool again with the same arguments if it has already succeeded, "
-            "unless new information makes that result invalid."
-        )
-
-        system_prompt = SystemPrompt(text=(SYSTEM_PROMPT.strip() + non_repetition_instructions + final_answer_instructions))
+        # Build initial prompt history using the prompt models
+        system_prompt = SystemPrompt(text=agent_system_instruction())
         task_text = MANAGED_AGENT_TASK.format(task_description=input.task).strip()
         task_prompt = TaskPrompt(text=task_text)
 
-        self.history.add(system_prompt)
-        self.history.add(task_prompt)
+        # The system prompt travels as the system instruction rather than a
+        # history entry; task and plan prompts are pinned so compaction never
+        # touches them.
+        self.system_instruction = system_prompt.text
+        self.history.add(task_prompt, pinned=True)
 
         # Seed the model with an initial explicit plan.
         initial_plan_prompt = BasePrompt(
             role="user",
             text=PLANNING_PROMPT_INITIAL_PLAN.strip(),
         )
-        self.history.add(initial_plan_prompt)
+        self.history.add(initial_plan_prompt, pinned=True)
 
-        # Assemble into provider-specific messages for Gemini
-        history_messages = self.history.to_messages(provider=LLMProvider.GEMINI)
+        # Resume from a continue-as-new snapshot, if any.
+        if input.snapshot is not None:
+            self._restore(input.snapshot)
+
+        # Seed results computed ahead of time (e.g. shared by a parent
+        # portfolio workflow) so the model does not request them again.
+        if input.seeded_tool_results:
+            self._seed_tool_results(input.seeded_tool_results)
+        elif input.fast_profile and input.snapshot is None:
+            self._seed_tool_results(await self._profile_company(input.task))
 
-        next_input = AgentStepInput(task=input.task, history=history_messages)
+        # Assemble into provider-specific messages for Gemini
+        next_input = self._step_input(input.task)
 
         last_output: AgentStepOutput | None = None
 
-        for step in range(1, self.max_steps + 1):
+        first_step = self.step_counter + 1
+        for step in range(first_step, self.max_steps + 1):
+            # Keep event history (and replay cost) bounded: once it is large,
+            # carry a compact snapshot into a fresh run.
+            if step > first_step and self._should_continue_as_new(input):
+                workflow.logger.info("Continuing as new after step %d.", self.step_counter)
+                workflow.continue_as_new(input.model_copy(update={
+                    "snapshot": self._snapshot(),
+                    "seeded_tool_results": [],
+                }))
+
             self.step_counter = step
 
             # ----- Step 1: Ask LLM what to do next -----
-            llm_result = await workflow.execute_activity(
-                "llm_step_activity",
-                next_input,
-                schedule_to_close_timeout=timedelta(seconds=90),
-            )
-
-            # Temporal + data converter may deserialize to dict; normalize.
-            if isinstance(llm_result, dict):
-                llm_result = AgentStepOutput(**llm_result)
+            # Predicted lookups run alongside the LLM step.
+            self._start_speculation()
+            llm_result = await self._run_llm_step(next_input)
+            if not llm_result.tool_calls:
+                self._discard_speculation()
 
             last_output = llm_result
 
@@ -94,7 +579,8 @@ class AgentLoopWorkflow:
             if llm_result.output_text:
                 assistant_prompt = BasePrompt(role="assistant", text=llm_result.output_text)
                 self.history.add(assistant_prompt)
-                history_messages = self.history.to_messages(provider=LLMProvider.GEMINI)
+                if not llm_result.is_final:
+                    self._compact_history(step)
 
             # ----- Step 2: Check if workflow is finished -----
             if llm_result.is_final:
@@ -110,39 +596,57 @@ class AgentLoopWorkflow:
                     marker_len = len("final answer:")
                     markdown = stripped[marker_len:].lstrip()
 
-                # Render PDF from the Markdown report
-                pdf_b64 = await workflow.execute_activity(
+                # Index the report for later runs while the PDF renders.
+                indexing = workflow.start_activity(
+                    "index_report",
+                    IndexReportInput(
+                        source=f"report:{workflow.info().workflow_id}",
+                        title=input.task,
+                        markdown=markdown,
+                    ),
+                    schedule_to_close_timeout=timedelta(seconds=30),
+                )
+
+                # Store the report and its PDF; the result carries handles only.
+                artifacts = await workflow.execute_activity(
                     "render_report_pdf",
                     markdown,
                     schedule_to_close_timeout=timedelta(seconds=60),
+                    result_type=ReportArtifacts,
                 )
 
-                return {
-                    "markdown_report": markdown,
-                    "pdf_base64": pdf_b64,
-                }
+                try:
+                    await indexing
+                except ActivityError as err:
+                    workflow.logger.warning("Report indexing failed: %s", err)
 
-            # ----- Step 3: If tool call requested -----
-            if llm_result.tool_call is not None:
-                tool_req: ToolCall = llm_result.tool_call
-                self.tools_used.append(tool_req.name)
+                stats = self._stats()
+                stats["pdf_rendered"] = artifacts.rendered
+                return AgentResult(markdown=artifacts.markdown, pdf=artifacts.pdf, stats=stats)
 
-                tool_result: str = await workflow.execute_activity(
-                    "tool_activity",
-                    tool_req,
-                    schedule_to_close_timeout=timedelta(seconds=30),
-                )
+            # ----- Step 3: If tool calls requested -----
+            if llm_result.tool_calls:
+                tool_reqs: List[ToolCall] = llm_result.tool_calls
+                self.tools_used.extend(req.name for req in tool_reqs)
 
-                # Add tool result to history as a tool message
-                tool_prompt = BasePrompt(role="tool", text=tool_result)
-                self.history.add(tool_prompt)
+                # Fan out the requested tools concurrently, reusing results
+                # of calls this run has already completed.
+                tool_results = await self._run_tools(tool_reqs)
 
-                # After each tool call, explicitly update facts and plan.
+                # Add each tool result to history as a tool message
+                for tool_req, tool_result in zip(tool_reqs, tool_results):
+                    tool_prompt = BasePrompt(role="tool", text=tool_result)
+                    self.history.add(
+                        tool_prompt,
+                        kind=EntryKind.TOOL,
+                        summary=self._tool_summary(tool_req, tool_result),
+                    )
+
+                # After each round of tool calls, explicitly update facts and plan.
+                latest_tools_text = _format_tool_results(tool_reqs, tool_results)
                 facts_update_text = (
                     f"{PLANNING_PROMPT_UPDATE_FACTS_PRE}\n\n"
-                    f"Latest tool: {tool_req.name}\n"
-                    f"Arguments: {tool_req.arguments}\n"
-                    f"Result:\n{tool_result}\n\n"
+                    f"{latest_tools_text}\n\n"
                     f"{PLANNING_PROMPT_UPDATE_FACTS_POST}"
                 )
                 plan_update_text = (
@@ -154,27 +658,30 @@ class AgentLoopWorkflow:
                     f"{PLANNING_PROMPT_UPDATE_PLAN_POST}"
                 )
 
-                self.history.add(BasePrompt(role="user", text=facts_update_text))
-                self.history.add(BasePrompt(role="user", text=plan_update_text))
+                tool_names = ", ".join(tool_req.name for tool_req in tool_reqs)
+                self.history.add(
+                    BasePrompt(role="user", text=facts_update_text),
+                    kind=EntryKind.PLANNING,
+                    summary=f"Facts were updated after step {step} ({tool_names}).",
+                )
+                self.history.add(
+                    BasePrompt(role="user", text=plan_update_text),
+                    kind=EntryKind.PLANNING,
+                    summary=f"Plan was updated after step {step}; tools used so far: {', '.join(self.tools_used)}.",
+                )
 
-                history_messages = self.history.to_messages(provider=LLMProvider.GEMINI)
+                self._compact_history(step)
 
                 # Send updated history back to the LLM
-                next_input = AgentStepInput(task=input.task, history=history_messages)
+                next_input = self._step_input(input.task)
                 continue
 
             # If not final and no tool call, continue with updated history
-            next_input = AgentStepInput(task=input.task, history=history_messages)
+            next_input = self._step_input(input.task)
 
         # Max steps reached
         workflow.logger.info("Max steps reached without final answer.")
         if last_output and last_output.output_text:
-            # Best-effort: return whatever we have as markdown without PDF.
-            return {
-                "markdown_report": last_output.output_text,
-                "pdf_base64": "",
-            }
-        return {
-            "markdown_report": "",
-            "pdf_base64": "",
-        }
+            # Best-effort: return whatever we have, without stored artifacts.
+            return AgentResult(partial_output=last_output.output_text, stats=self._stats())
+        return AgentResult(stats=self._stats())